@@ -0,0 +1,124 @@
+import asyncio
+import unicodedata
+from array import array
+from bisect import bisect_left
+from typing import Awaitable, Callable
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from core.cache import response_cache
+from core.conditional import table_versions
+
+# In-memory prefix indexes for the search box autocomplete. Each row is
+# indexed by its normalized name (upper case, no accents, single spaces) and
+# by its code, as a sorted list of keys with a parallel array of ids: a
+# lookup is one bisect plus a scan over the matches, with no database
+# round trip. Infix and typo-tolerant matching is /busca's job.
+#
+# Writes made through the repositories are staged on the session and
+# applied once the commit succeeds; anything else that bumps the table's
+# version in the response cache (an import, another worker) makes the next
+# lookup reload the index. The routes are not behind the cache middlewares,
+# so the lookup checks the table version (core.conditional) itself.
+
+
+def normalize(text: str | None) -> str:
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.upper().split())
+
+
+def _keys(nome: str | None, codigo: str | None) -> set[str]:
+    return {key for key in (normalize(nome), normalize(codigo)) if key}
+
+
+class PrefixIndex:
+    def __init__(self, table: str):
+        self.table = table
+        # the table's response cache version the index reflects (None: never loaded)
+        self.version: int | None = None
+        self.loading = asyncio.Lock()
+        self.keys: list[str] = []
+        self.ids = array("q")
+        self.labels: dict[int, tuple[str, str]] = {}
+
+    def load(self, rows, version: int | None = None):
+        """Rebuilds the index from (id, nome, codigo) rows."""
+        entries = sorted((key, id) for id, nome, codigo in rows for key in _keys(nome, codigo))
+        self.keys = [key for key, _ in entries]
+        self.ids = array("q", (id for _, id in entries))
+        self.labels = {id: (nome, codigo) for id, nome, codigo in rows}
+        self.version = version
+
+    def upsert(self, id: int, nome: str, codigo: str):
+        self.remove(id)
+        for key in _keys(nome, codigo):
+            position = bisect_left(self.keys, key)
+            self.keys.insert(position, key)
+            self.ids.insert(position, id)
+        self.labels[id] = (nome, codigo)
+
+    def remove(self, id: int):
+        label = self.labels.pop(id, None)
+        if label is None:
+            return
+        for key in _keys(*label):
+            position = bisect_left(self.keys, key)
+            while position < len(self.keys) and self.keys[position] == key:
+                if self.ids[position] == id:
+                    del self.keys[position]
+                    del self.ids[position]
+                    break
+                position += 1
+
+    def complete(self, prefix: str, limit: int = 10) -> list[tuple[int, str, str]]:
+        """(id, nome, codigo) of up to `limit` rows whose name or code starts with `prefix`, in key order."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        found = []
+        seen = set()
+        position = bisect_left(self.keys, prefix)
+        while position < len(self.keys) and len(found) < limit and self.keys[position].startswith(prefix):
+            id = self.ids[position]
+            if id not in seen:
+                seen.add(id)
+                found.append((id, *self.labels[id]))
+            position += 1
+        return found
+
+    async def sync(self, rows: Callable[[], Awaitable[list]]):
+        """Reloads the index from `rows()` when the table changed since it was built."""
+        # notices writes from other processes (at most max_age late) as a version bump
+        await table_versions.get((self.table,))
+        version = response_cache.versions((self.table,))[self.table]
+        if self.version == version:
+            return
+        async with self.loading:
+            if self.version != version:
+                self.load(await rows(), version)
+
+    def stage(self, session, method: str, *args):
+        """Applies `method(*args)` to the index once `session` commits."""
+        session.info.setdefault("autocomplete_writes", []).append((self, method, args))
+
+
+estabelecimentos_autocomplete = PrefixIndex("estabelecimentos")
+profissionais_autocomplete = PrefixIndex("profissionais")
+
+
+# registered after core.cache's listener, so the commit has already bumped
+# the table version when the staged writes are applied
+@event.listens_for(Session, "after_commit")
+def _apply_writes(session):
+    for index, method, args in session.info.pop("autocomplete_writes", ()):
+        getattr(index, method)(*args)
+        if index.version is not None:
+            # this write is in the index; no reload for the bump it caused
+            index.version = response_cache.versions((index.table,))[index.table]
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_writes(session):
+    session.info.pop("autocomplete_writes", None)
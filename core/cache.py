@@ -0,0 +1,328 @@
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Iterable
+from urllib.parse import parse_qsl, urlencode
+from sqlalchemy import Table, event
+from sqlalchemy.orm import Session
+from core.config import settings
+
+# Read-through cache for the GET responses of the read API. CNES data
+# changes once a month, so most reads can be answered from memory:
+#
+# - entries live in an in-process LRU bounded by count and bytes, with a TTL;
+# - every key carries the version of each table the route reads, so a write
+#   to one of them makes the old entries unreachable at once (they are also
+#   dropped from memory); a request that started before the write stores
+#   its response under the old version and is never served;
+# - ORM commits bump the versions of the tables they touched (session events
+#   below), and the importers bump the tables they load;
+# - with RESPONSE_CACHE_SHARED_PATH set, versions and bodies are also kept in
+#   a local SQLite file, shared by the uvicorn workers and the import scripts
+#   of the same host. Without it, writes from other processes are noticed
+#   through the table fingerprints of core.conditional.TableVersions, at most
+#   `max_age` seconds late (ResponseCacheMiddleware checks them before every
+#   lookup).
+
+
+@dataclass
+class CacheEntry:
+    expires: float
+    status: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+    tables: tuple[str, ...]
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    shared_hits: int = 0
+    misses: int = 0
+    expirations: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+
+class SharedStore:
+    """Table versions and response bodies in a SQLite file shared by the local processes."""
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS versions (table_name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, expires REAL NOT NULL, status INTEGER NOT NULL, headers TEXT NOT NULL, body BLOB NOT NULL)"
+        )
+
+    def versions(self, tables: Iterable[str]) -> dict[str, int]:
+        tables = list(tables)
+        rows = self.conn.execute(
+            f"SELECT table_name, version FROM versions WHERE table_name IN ({','.join('?' * len(tables))})",
+            tables
+        )
+        return dict(rows.fetchall())
+
+    def bump(self, tables: Iterable[str]):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO versions VALUES (?, 1) ON CONFLICT (table_name) DO UPDATE SET version = version + 1",
+                [(table,) for table in tables]
+            )
+            # entries of the old versions can never be read again
+            self.conn.execute("DELETE FROM entries WHERE expires < ?", (time.time(),))
+
+    def get(self, key: str) -> tuple | None:
+        row = self.conn.execute(
+            "SELECT expires, status, headers, body FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[0] < time.time():
+            return None
+        expires, status, headers, body = row
+        return expires, status, [(name.encode("latin-1"), value.encode("latin-1")) for name, value in json.loads(headers)], body
+
+    def set(self, key: str, entry: CacheEntry):
+        headers = json.dumps([(name.decode("latin-1"), value.decode("latin-1")) for name, value in entry.headers])
+        self.conn.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+            (key, entry.expires, entry.status, headers, entry.body)
+        )
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        ttl: float = 3600,
+        max_entries: int = 2048,
+        max_bytes: int = 64 * 1024 * 1024,
+        shared_path: str | None = None
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.shared = SharedStore(shared_path) if shared_path else None
+        self.entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self.size = 0
+        self.table_versions: dict[str, int] = {}
+        self.counters = CacheStats()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def versions(self, tables: tuple[str, ...]) -> dict[str, int]:
+        """The change counter of each table, bumped by every invalidation."""
+        versions = self.shared.versions(tables) if self.shared else self.table_versions
+        return {table: versions.get(table, 0) for table in tables}
+
+    def key(self, path: str, query_string: str, tables: tuple[str, ...]) -> str:
+        """Route, normalized query params and the current version of every table the route reads."""
+        query = urlencode(sorted(parse_qsl(query_string, keep_blank_values=True)))
+        tag = ",".join(f"{table}:{version}" for table, version in self.versions(tables).items())
+        return f"{path}?{query}#{tag}"
+
+    def get(self, key: str) -> CacheEntry | None:
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry.expires >= time.monotonic():
+                self.entries.move_to_end(key)
+                self.counters.hits += 1
+                return entry
+            self._drop(key)
+            self.counters.expirations += 1
+        if self.shared:
+            stored = self.shared.get(key)
+            if stored is not None:
+                expires, status, headers, body = stored
+                # the shared store keeps wall-clock expiry, memory keeps monotonic
+                entry = CacheEntry(time.monotonic() + expires - time.time(), status, headers, body, ())
+                self._store(key, entry)
+                self.counters.shared_hits += 1
+                return entry
+        self.counters.misses += 1
+        return None
+
+    def set(self, key: str, tables: tuple[str, ...], status: int, headers: list, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        entry = CacheEntry(time.monotonic() + self.ttl, status, headers, body, tables)
+        self._store(key, entry)
+        if self.shared:
+            self.shared.set(key, CacheEntry(time.time() + self.ttl, status, headers, body, tables))
+
+    def invalidate(self, *tables: str):
+        """Bumps the version of the tables and forgets every response that read them."""
+        tables = set(tables)
+        if not tables:
+            return
+        for table in tables:
+            self.table_versions[table] = self.table_versions.get(table, 0) + 1
+        if self.shared:
+            self.shared.bump(tables)
+        stale = [key for key, entry in self.entries.items() if tables.intersection(entry.tables)]
+        for key in stale:
+            self._drop(key)
+        self.counters.invalidations += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    def stats(self) -> dict:
+        return {
+            **asdict(self.counters),
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "shared": self.shared is not None,
+        }
+
+    def _store(self, key: str, entry: CacheEntry):
+        if key in self.entries:
+            self._drop(key)
+        self.entries[key] = entry
+        self.size += len(entry.body)
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            self._drop(next(iter(self.entries)))
+            self.counters.evictions += 1
+
+    def _drop(self, key: str):
+        entry = self.entries.pop(key)
+        self.size -= len(entry.body)
+
+
+class ResponseCacheMiddleware:
+    """
+    Serves repeated GETs of the cached routes from the ResponseCache. `routes`
+    maps a path prefix to the tables its responses read. Only complete JSON
+    (or packed binary) bodies with status 200 are stored, so streaming
+    exports pass through. With `versions` (a TableVersions) the fingerprints
+    of the tables are checked before the lookup, which invalidates entries
+    written behind the cache's back.
+    """
+
+    def __init__(self, app, cache: ResponseCache, routes: dict[str, tuple[str, ...]], versions=None):
+        self.app = app
+        self.cache = cache
+        self.routes = routes
+        self.versions = versions
+
+    def tables_for(self, path: str) -> tuple[str, ...] | None:
+        for prefix, tables in self.routes.items():
+            if path == prefix or path.startswith(prefix + "/"):
+                return tables
+        return None
+
+    async def __call__(self, scope, receive, send):
+        tables = self.tables_for(scope["path"]) if scope["type"] == "http" and scope["method"] == "GET" else None
+        if tables is None or not self.cache.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        if self.versions is not None:
+            await self.versions.get(tables)
+        key = self.cache.key(scope["path"], scope["query_string"].decode("latin-1"), tables)
+        entry = self.cache.get(key)
+        if entry is not None:
+            await send({
+                "type": "http.response.start",
+                "status": entry.status,
+                "headers": entry.headers + [(b"x-cache", b"HIT")],
+            })
+            await send({"type": "http.response.body", "body": entry.body})
+            return
+
+        start = {}
+
+        async def send_and_store(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-cache", b"MISS")]}
+            elif message["type"] == "http.response.body" and not start.get("stored"):
+                start["stored"] = True
+                headers = list(start.get("headers", []))
+                content_type = dict(headers).get(b"content-type", b"")
+                if (
+                    start.get("status") == 200
+                    and not message.get("more_body", False)
+                    and content_type.startswith((b"application/json", b"application/octet-stream"))
+                ):
+                    self.cache.set(key, tables, 200, headers, message.get("body", b""))
+            await send(message)
+
+        await self.app(scope, receive, send_and_store)
+
+
+response_cache = ResponseCache(
+    ttl=settings.RESPONSE_CACHE_TTL,
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=settings.RESPONSE_CACHE_MAX_MB * 1024 * 1024,
+    shared_path=settings.RESPONSE_CACHE_SHARED_PATH,
+)
+
+
+# Write tracking: the tables touched by a session are collected on flush and
+# on INSERT/UPDATE/DELETE statements, and invalidated once the commit
+# succeeds. A delete also reaches the tables its ON DELETE CASCADE foreign
+# keys clear in the database.
+
+def _written_tables(session: Session) -> set:
+    return session.info.setdefault("written_tables", set())
+
+
+def cascade_tables(table: Table) -> set[str]:
+    """`table` and every table whose rows a delete from it removes through ON DELETE CASCADE."""
+    reached = {table.name}
+    pending = [table]
+    while pending:
+        parent = pending.pop()
+        for child in parent.metadata.tables.values():
+            if child.name in reached:
+                continue
+            if any(fk.references(parent) and (fk.ondelete or "").upper() == "CASCADE" for fk in child.foreign_keys):
+                reached.add(child.name)
+                pending.append(child)
+    return reached
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session, flush_context):
+    tables = _written_tables(session)
+    for obj in (*session.new, *session.dirty):
+        table = getattr(obj, "__tablename__", None)
+        if table:
+            tables.add(table)
+    for obj in session.deleted:
+        table = getattr(obj, "__table__", None)
+        if table is not None:
+            tables.update(cascade_tables(table))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_statement(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        # ORM statements (delete(Model)) and Core ones (Model.__table__.delete()) alike
+        table = getattr(orm_execute_state.statement, "table", None)
+        if isinstance(table, Table):
+            tables = _written_tables(orm_execute_state.session)
+            if orm_execute_state.is_delete:
+                tables.update(cascade_tables(table))
+            else:
+                tables.add(table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_written(session):
+    tables = session.info.pop("written_tables", None)
+    if tables:
+        response_cache.invalidate(*tables)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_written(session):
+    session.info.pop("written_tables", None)
@@ -0,0 +1,52 @@
+import numpy as np
+
+# Server-side clustering for the map. The database groups the points of a
+# bounding box into a square degree grid whose cell shrinks by half at each
+# zoom level, so a pan returns at most a few hundred clusters whatever the
+# number of enderecos behind them. The cell is a quarter of a 256px web map
+# tile, about 64px on screen at any zoom.
+
+CELLS_PER_TILE = 4
+MAX_ZOOM = 22
+# a 4K screen shows about 60 x 34 cells; a box with more than this many at
+# the requested zoom (a whole country at street level) is grouped at the
+# deepest zoom that fits, instead of one group per address
+MAX_CELLS = 16384
+
+# packed response: one little-endian record per cluster, 16 bytes
+CLUSTER_DTYPE = np.dtype([
+    ("latitude", "<f4"),
+    ("longitude", "<f4"),
+    ("quantidade", "<u4"),
+    ("endereco_id", "<u4"),
+])
+
+
+def cluster_cell(zoom: int) -> float:
+    """Side, in degrees, of the grid cell that makes one cluster at `zoom`."""
+    return 360.0 / (2 ** zoom * CELLS_PER_TILE)
+
+
+def grid_zoom(zoom: int, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> int:
+    """`zoom`, lowered until the grid over the box has at most MAX_CELLS cells."""
+    height = max_lat - min_lat
+    width = max_lon - min_lon if min_lon <= max_lon else 360.0 - (min_lon - max_lon)
+    while zoom > 0:
+        cell = cluster_cell(zoom)
+        if (height / cell + 1) * (width / cell + 1) <= MAX_CELLS:
+            break
+        zoom -= 1
+    return zoom
+
+
+def pack_clusters(clusters: list[dict]) -> bytes:
+    """The clusters as CLUSTER_DTYPE records; endereco_id is 0 when the cluster has more than one point."""
+    packed = np.empty(len(clusters), dtype=CLUSTER_DTYPE)
+    for i, cluster in enumerate(clusters):
+        packed[i] = (
+            cluster["latitude"],
+            cluster["longitude"],
+            cluster["quantidade"],
+            cluster["endereco_id"] or 0,
+        )
+    return packed.tobytes()
@@ -0,0 +1,158 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from urllib.parse import parse_qsl, urlencode
+from sqlalchemy import select
+from starlette.datastructures import Headers
+from core.cache import ResponseCache, response_cache
+from core.config import settings
+from core.database import async_session
+from models.table_change import TableChange
+
+# Conditional GETs for the read API. Every table has a cheap version: its
+# row in table_changes, bumped by a statement-level trigger on every write
+# (migration f1c8d3a6b927), plus the change counter the response cache bumps
+# on writes and imports. The lookup is a primary-key read of table_changes
+# for all the tables of a route at once, and runs again only after a bump or
+# when the version gets older than `max_age`, so a poll whose If-None-Match
+# still matches is answered with 304 before the route runs its own query.
+#
+# A fingerprint that changed without a bump is a write this process never
+# saw (an import run from another process, a manual UPDATE): the tables are
+# invalidated in the response cache, so its old entries stop being served.
+
+
+class TableVersions:
+    def __init__(self, cache: ResponseCache, max_age: float = 60):
+        self.cache = cache
+        self.max_age = max_age
+        # table -> (change counter, fetched at, fingerprint, last modified)
+        self.known: dict[str, tuple] = {}
+
+    async def get(self, tables: tuple[str, ...]) -> tuple[str, datetime | None]:
+        """The version of `tables` (a hex digest) and the Last-Modified date of a response that reads them."""
+        counters = self.cache.versions(tables)
+        now = time.monotonic()
+        stale = [
+            table for table in tables
+            if table not in self.known
+            or self.known[table][0] != counters[table]
+            or now - self.known[table][1] > self.max_age
+        ]
+        if stale:
+            async with async_session() as session:
+                fingerprints = await self._fingerprints(session, stale)
+                for table in stale:
+                    fingerprint, modified = fingerprints[table]
+                    previous = self.known.get(table)
+                    if previous and previous[0] == counters[table] and previous[2] != fingerprint:
+                        self.cache.invalidate(table)
+                        counters[table] = self.cache.versions((table,))[table]
+                    self.known[table] = (counters[table], now, fingerprint, modified)
+
+        digest = hashlib.sha1()
+        last_modified = None
+        for table in tables:
+            counter, _, fingerprint, modified = self.known[table]
+            digest.update(f"{table}:{counter}:{fingerprint};".encode())
+            if modified is not None and (last_modified is None or modified > last_modified):
+                last_modified = modified
+        return digest.hexdigest(), last_modified
+
+    @staticmethod
+    async def _fingerprints(session, tables: list[str]) -> dict[str, tuple[str, datetime | None]]:
+        """The trigger-maintained change counter of each table and when it last moved."""
+        query = select(TableChange.table_name, TableChange.version, TableChange.changed_at).where(
+            TableChange.table_name.in_(tables)
+        )
+        changes = {name: (version, changed_at) for name, version, changed_at in await session.execute(query)}
+        fingerprints = {}
+        for table in tables:
+            # a table without triggers (SQLite, a database made before the migration) only follows the cache counter
+            version, modified = changes.get(table, (0, None))
+            if modified is not None and modified.tzinfo is None:
+                modified = modified.replace(tzinfo=timezone.utc)
+            fingerprints[table] = (str(version), modified)
+        return fingerprints
+
+
+# shared by both middlewares and the in-memory indexes: the cache drops its
+# entries when the fingerprint of a table changes without a write seen by
+# this process (an import)
+table_versions = TableVersions(response_cache, max_age=settings.TABLE_VERSION_MAX_AGE)
+
+
+def _etag(version: str, path: str, query_string: str) -> str:
+    """Strong ETag of one representation: the table version, the route and the normalized query params."""
+    query = urlencode(sorted(parse_qsl(query_string, keep_blank_values=True)))
+    digest = hashlib.sha1(f"{version}|{path}?{query}".encode())
+    return f'"{digest.hexdigest()[:20]}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def _not_modified_since(header: str, last_modified: datetime | None) -> bool:
+    if last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have one-second resolution
+    return last_modified.replace(microsecond=0) <= since
+
+
+class ConditionalGetMiddleware:
+    """
+    Adds ETag and Last-Modified to the GET responses of the routes in
+    `routes` (path prefix -> tables read) and answers a matching
+    If-None-Match (or, without it, If-Modified-Since) with 304.
+    """
+
+    def __init__(self, app, versions: TableVersions, routes: dict[str, tuple[str, ...]]):
+        self.app = app
+        self.versions = versions
+        self.routes = routes
+
+    def tables_for(self, path: str) -> tuple[str, ...] | None:
+        for prefix, tables in self.routes.items():
+            if path == prefix or path.startswith(prefix + "/"):
+                return tables
+        return None
+
+    async def __call__(self, scope, receive, send):
+        tables = None
+        if scope["type"] == "http" and scope["method"] in ("GET", "HEAD"):
+            tables = self.tables_for(scope["path"])
+        if tables is None:
+            await self.app(scope, receive, send)
+            return
+
+        version, last_modified = await self.versions.get(tables)
+        etag = _etag(version, scope["path"], scope["query_string"].decode("latin-1"))
+        validators = [(b"etag", etag.encode())]
+        if last_modified is not None:
+            validators.append((b"last-modified", format_datetime(last_modified, usegmt=True).encode()))
+
+        headers = Headers(scope=scope)
+        if "if-none-match" in headers:
+            not_modified = _etag_matches(headers["if-none-match"], etag)
+        else:
+            not_modified = _not_modified_since(headers.get("if-modified-since", ""), last_modified)
+        if not_modified:
+            await send({"type": "http.response.start", "status": 304, "headers": validators})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_validators(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                message = {**message, "headers": list(message.get("headers", [])) + validators}
+            await send(message)
+
+        await self.app(scope, receive, send_with_validators)
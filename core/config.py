@@ -10,6 +10,16 @@ class Settings(BaseSettings):
     POSTGRES_PORT: str = "5432"
     POSTGRES_DB: str = "postgres"
     DB_ECHO_LOG: bool = False
+
+    # response cache of the read API (TTL 0 disables it)
+    RESPONSE_CACHE_TTL: int = 3600
+    RESPONSE_CACHE_MAX_ENTRIES: int = 2048
+    RESPONSE_CACHE_MAX_MB: int = 64
+    RESPONSE_CACHE_SHARED_PATH: str | None = None
+    # seconds before the ETag of a table is recomputed without a known write
+    TABLE_VERSION_MAX_AGE: int = 60
+    # minimum word similarity (0 to 1) of a /busca match; lower tolerates more typos
+    SEARCH_MIN_SIMILARITY: float = 0.4
     
     @property
     def DATABASE_URL(self) -> str:
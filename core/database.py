@@ -1,4 +1,5 @@
 from typing import AsyncGenerator
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 from core.config import settings
@@ -22,10 +23,60 @@ async_session = sessionmaker(
 # Create base model
 Base = declarative_base()
 
+# what /busca needs besides the tables, as in migration c7a1f04d9e62: create_all
+# does not run the migrations. unaccent() is only STABLE, so the IMMUTABLE
+# wrapper pins the dictionary and can be used in the trigram indexes
+SEARCH_EXTENSIONS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    """
+    CREATE OR REPLACE FUNCTION cnes_unaccent(value text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS
+    $$ SELECT public.unaccent('public.unaccent'::regdictionary, value) $$
+    """,
+]
+
+# the change counters of migration f1c8d3a6b927: every statement that writes
+# one of CHANGE_TRACKED_TABLES bumps its row in table_changes, which
+# core.conditional reads instead of scanning the tables
+CHANGE_TRACKED_TABLES = ["mantenedoras", "estabelecimentos", "enderecos", "equipes", "profissionais", "equipeprofs"]
+CHANGE_TRACKING = [
+    """
+    CREATE OR REPLACE FUNCTION cnes_table_changed() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO table_changes (table_name, version, changed_at)
+        VALUES (TG_TABLE_NAME, 1, now())
+        ON CONFLICT (table_name) DO UPDATE
+        SET version = table_changes.version + 1, changed_at = now();
+        RETURN NULL;
+    END
+    $$
+    """,
+    *(
+        statement
+        for table in CHANGE_TRACKED_TABLES
+        for statement in (
+            f"INSERT INTO table_changes (table_name, version) VALUES ('{table}', 0) ON CONFLICT DO NOTHING",
+            f"""
+            CREATE OR REPLACE TRIGGER {table}_changed
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION cnes_table_changed()
+            """,
+        )
+    ),
+]
+
 async def init_models():
     async with engine.begin() as conn:
         # await conn.run_sync(Base.metadata.drop_all)  # Uncomment to reset database
+        if conn.dialect.name == "postgresql":
+            for statement in SEARCH_EXTENSIONS:
+                await conn.execute(text(statement))
         await conn.run_sync(Base.metadata.create_all)
+        if conn.dialect.name == "postgresql":
+            for statement in CHANGE_TRACKING:
+                await conn.execute(text(statement))
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session() as session:
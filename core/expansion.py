@@ -0,0 +1,127 @@
+from functools import lru_cache
+from typing import get_args, get_origin
+from fastapi import HTTPException
+from pydantic import BaseModel, Field, create_model
+from core.serialization import partial_schema
+from models import endereco, equipe, estabelecimento, mantenedora, profissional
+from schemas.endereco import Endereco
+from schemas.equipe import Equipe
+from schemas.estabelecimento import Estabelecimento
+from schemas.mantenedora import Mantenedora
+from schemas.profissional import Profissional
+
+# Relationships are never loaded behind the caller's back (the models use
+# lazy='raise'): a response carries its schema's own nested fields (the
+# endereco of an estabelecimento, the profissionais of an equipe) and any
+# other relationship only when `expand=` names it, e.g.
+#
+#   /estabelecimentos/?expand=mantenedora,equipe.profissionais
+#
+# Each level of a path costs one JOIN or one SELECT ... IN, so the depth is
+# capped. The rows of an expanded relationship come without their own
+# relationships, unless the path goes on.
+
+MAX_EXPAND_DEPTH = 2
+
+EXPAND_DESCRIPTION = (
+    "Relacionamentos a incluir, separados por vírgula; `.` desce um nível "
+    f"(até {MAX_EXPAND_DEPTH}), ex.: `mantenedora,equipe.profissionais`"
+)
+
+# schema -> relationship -> schema of the related row (list[...] for many)
+EXPANSIONS: dict[type[BaseModel], dict[str, object]] = {
+    Endereco: {"estabelecimento": Estabelecimento},
+    Equipe: {"estabelecimento": Estabelecimento, "profissionais": list[Profissional]},
+    Estabelecimento: {"endereco": Endereco, "mantenedora": Mantenedora, "equipe": Equipe},
+    Mantenedora: {"estabelecimentos": list[Estabelecimento]},
+    Profissional: {"equipes": list[Equipe]},
+}
+
+# schema -> ORM model whose relationships back its expansions
+MODELS = {
+    Endereco: endereco.Endereco,
+    Equipe: equipe.Equipe,
+    Estabelecimento: estabelecimento.Estabelecimento,
+    Mantenedora: mantenedora.Mantenedora,
+    Profissional: profissional.Profissional,
+}
+
+
+def _related(schema: type[BaseModel], name: str) -> tuple[type[BaseModel], bool]:
+    """Schema of the rows behind relationship `name` of `schema` and whether they are a list."""
+    annotation = EXPANSIONS[schema][name]
+    if get_origin(annotation) is list:
+        return get_args(annotation)[0], True
+    return annotation, False
+
+
+def expansion_tables(schema: type[BaseModel], depth: int = MAX_EXPAND_DEPTH) -> tuple[str, ...]:
+    """
+    Every table an `expand=` of `schema` can read, down to `depth` levels
+    (association tables included). The cache and the ETags of a route that
+    accepts `expand=` must track them all.
+    """
+    if depth == 0:
+        return ()
+    tables = []
+    for name in EXPANSIONS[schema]:
+        relationship = MODELS[schema].__mapper__.relationships[name]
+        if relationship.secondary is not None:
+            tables.append(relationship.secondary.name)
+        tables.append(relationship.mapper.local_table.name)
+        related, _ = _related(schema, name)
+        tables.extend(expansion_tables(related, depth - 1))
+    return tuple(dict.fromkeys(tables))
+
+
+def parse_expand(schema: type[BaseModel], expand: str | None) -> tuple[str, ...]:
+    """The relationship paths of an `expand=a,b.c` query param, checked against EXPANSIONS."""
+    if not expand:
+        return ()
+    paths = []
+    for path in (path.strip() for path in expand.split(",")):
+        if not path:
+            continue
+        names = path.split(".")
+        if len(names) > MAX_EXPAND_DEPTH:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Expansão muito profunda: {path}. Máximo de {MAX_EXPAND_DEPTH} níveis"
+            )
+        current = schema
+        for name in names:
+            if name not in EXPANSIONS[current]:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Expansão inválida: {path}. Use: {', '.join(EXPANSIONS[current])}"
+                )
+            current, _ = _related(current, name)
+        paths.append(path)
+    return tuple(dict.fromkeys(paths))
+
+
+def _expanded(schema: type[BaseModel], names: tuple[str, ...], paths: tuple[str, ...]) -> type[BaseModel]:
+    children: dict[str, list[str]] = {}
+    for path in paths:
+        name, _, rest = path.partition(".")
+        children.setdefault(name, [])
+        if rest:
+            children[name].append(rest)
+
+    fields = {name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in names}
+    for name, rest in children.items():
+        related, many = _related(schema, name)
+        own = tuple(field for field in related.model_fields if field not in EXPANSIONS.get(related, ()))
+        nested = _expanded(related, own, tuple(rest))
+        fields[name] = (list[nested], Field(default=[])) if many else (nested | None, Field(default=None))
+    return create_model(f"{schema.__name__}Expandido", **fields)
+
+
+@lru_cache(maxsize=256)
+def response_schema(
+    schema: type[BaseModel], fields: tuple[str, ...] | None, expand: tuple[str, ...]
+) -> type[BaseModel]:
+    """`schema` trimmed to `fields` (see partial_schema) plus the relationships in `expand`."""
+    if not expand:
+        return partial_schema(schema, fields)
+    return _expanded(schema, fields or tuple(schema.model_fields), expand)
@@ -0,0 +1,105 @@
+import csv
+import io
+import zlib
+from typing import Any, AsyncIterator, Callable, Literal
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from pydantic_core import to_json
+from core.database import async_session
+from core.serialization import dump, schema_fields
+
+# Streaming exports for the list endpoints. Rows come from the repository's
+# server-side cursor one batch at a time and are encoded and sent as they
+# arrive: memory does not grow with the table and the first bytes (the CSV
+# header, the gzip header) leave before the query has finished.
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+BATCH_SIZE = 1000
+
+
+def csv_columns(schema: type[BaseModel]) -> list[str]:
+    """The CSV header: a nested object becomes `parent.field` columns, a nested list one JSON column."""
+    columns = []
+    for name, nested, many in schema_fields(schema):
+        if nested is not None and not many:
+            columns += [f"{name}.{child}" for child, _, _ in schema_fields(nested)]
+        else:
+            columns.append(name)
+    return columns
+
+
+def csv_row(schema: type[BaseModel], row: dict) -> list:
+    values = []
+    for name, nested, many in schema_fields(schema):
+        value = row[name]
+        if nested is None:
+            values.append(value)
+        elif many:
+            values.append(to_json(value).decode())
+        else:
+            values += [(value or {}).get(child) for child, _, _ in schema_fields(nested)]
+    return values
+
+
+async def _rows(repository_class: Callable, batch_size: int) -> AsyncIterator[list]:
+    # the export owns its session: it must outlive the request handler,
+    # which returns as soon as the response starts
+    async with async_session() as session:
+        repository = repository_class(session)
+        async for rows in repository.stream(batch_size):
+            yield rows
+
+
+async def encode(
+    schema: type[BaseModel],
+    batches: AsyncIterator[list[Any]],
+    format: ExportFormat
+) -> AsyncIterator[bytes]:
+    if format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(csv_columns(schema))
+        yield buffer.getvalue().encode()
+        async for rows in batches:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(csv_row(schema, dump(schema, row)) for row in rows)
+            yield buffer.getvalue().encode()
+    else:
+        async for rows in batches:
+            yield b"".join(to_json(dump(schema, row)) + b"\n" for row in rows)
+
+
+async def gzipped(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    async for chunk in chunks:
+        # a sync flush per batch keeps the download moving instead of
+        # letting zlib hold everything back until the end
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def export_response(
+    repository_class: Callable,
+    schema: type[BaseModel],
+    name: str,
+    format: ExportFormat = "ndjson",
+    gzip: bool = False,
+    batch_size: int = BATCH_SIZE
+) -> StreamingResponse:
+    """A download of every row of the repository's table, `name.ndjson` or `name.csv` (`.gz` with gzip)."""
+    body = encode(schema, _rows(repository_class, batch_size), format)
+    filename = f"{name}.{format}"
+    media_type = MEDIA_TYPES[format]
+    if gzip:
+        body = gzipped(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
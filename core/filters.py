@@ -0,0 +1,147 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Iterable
+from fastapi import HTTPException
+
+# Filters of the /filtro endpoints, written as query params:
+#
+#   campo=valor                 equality (campo__eq=valor)
+#   campo__in=a,b,c             one of the values
+#   campo__prefix=abc           starts with (LIKE 'abc%')
+#   campo__range=min,max        min <= campo <= max; either bound may be empty
+#   campo__is_null=true|false
+#   order_by=-campo,outro       descending with '-'
+#   limit=100
+#
+# Each repository whitelists, in `filter_columns`, the columns an index can
+# serve and the operators that index supports; anything else is rejected
+# with 400 before a query is built. All filters go into one statement.
+
+RESERVED_PARAMS = ("order_by", "limit", "fields", "expand")
+MAX_IN_VALUES = 100
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+@dataclass
+class Filter:
+    column: str
+    op: str
+    value: Any
+
+
+def _convert(model, column: str, raw: str):
+    python_type = getattr(model, column).type.python_type
+    try:
+        if python_type is datetime:
+            return datetime.fromisoformat(raw)
+        if python_type is bool:
+            return _boolean(raw)
+        return python_type(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Valor inválido para {column}: {raw}")
+
+
+def _boolean(raw: str) -> bool:
+    if raw.lower() in ("true", "1"):
+        return True
+    if raw.lower() in ("false", "0"):
+        return False
+    raise ValueError(raw)
+
+
+def parse_filters(repository, params: Iterable[tuple[str, str]]) -> list[Filter]:
+    """The filters in the query params, validated against `repository.filter_columns`."""
+    columns = repository.filter_columns
+    filters = []
+    for name, raw in params:
+        # an empty value means no filter, as in the old equality params
+        if name in RESERVED_PARAMS or not raw:
+            continue
+        column, _, op = name.partition("__")
+        op = op or "eq"
+        if column not in columns:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Filtro inválido: {column}. Use um de: {', '.join(columns)}"
+            )
+        if op not in columns[column]:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Operador inválido para {column}: {op}. Use um de: {', '.join(columns[column])}"
+            )
+
+        model = repository.model
+        if op == "in":
+            values = [value for value in raw.split(",") if value]
+            if not values or len(values) > MAX_IN_VALUES:
+                raise HTTPException(status_code=400, detail=f"{column}__in aceita de 1 a {MAX_IN_VALUES} valores")
+            value = [_convert(model, column, item) for item in values]
+        elif op == "range":
+            low, comma, high = raw.partition(",")
+            if not comma or not (low or high):
+                raise HTTPException(status_code=400, detail=f"Use {column}__range=min,max")
+            value = (
+                _convert(model, column, low) if low else None,
+                _convert(model, column, high) if high else None,
+            )
+        elif op == "is_null":
+            try:
+                value = _boolean(raw)
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Use {column}__is_null=true ou false")
+        elif op == "prefix":
+            value = raw
+        else:
+            value = _convert(model, column, raw)
+        filters.append(Filter(column, op, value))
+    return filters
+
+
+def parse_order_by(repository, order_by: str | None) -> list[tuple[str, bool]]:
+    """(column, descending) pairs of `order_by`, limited to the repository's indexed sort keys."""
+    if not order_by:
+        return []
+    ordering = []
+    for item in order_by.split(","):
+        column = item.strip().removeprefix("-")
+        if column not in repository.sort_keys:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Ordenação inválida: {column}. Use uma de: {', '.join(repository.sort_keys)}"
+            )
+        ordering.append((column, item.strip().startswith("-")))
+    return ordering
+
+
+def filter_clause(model, filter: Filter):
+    column = getattr(model, filter.column)
+    if filter.op == "in":
+        return column.in_(filter.value)
+    if filter.op == "prefix":
+        # the whole pattern in one bound value (not `:value || '%'`), which the
+        # planner turns into a range on the text_pattern_ops index
+        escaped = filter.value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return column.like(escaped + "%", escape="\\")
+    if filter.op == "range":
+        low, high = filter.value
+        if low is None:
+            return column <= high
+        if high is None:
+            return column >= low
+        return column.between(low, high)
+    if filter.op == "is_null":
+        return column.is_(None) if filter.value else column.isnot(None)
+    return column == filter.value
+
+
+def describe_filters(repository_class) -> str:
+    """The filter whitelist of a repository, for the OpenAPI description of its /filtro route."""
+    columns = "\n".join(
+        f"- `{column}`: {', '.join(ops)}" for column, ops in repository_class.filter_columns.items()
+    )
+    return (
+        "Filtros por query param (`campo=valor` ou `campo__operador=valor`), "
+        f"limitados às colunas indexadas:\n\n{columns}\n\n"
+        f"Ordenação (`order_by`, `-` para decrescente): {', '.join(repository_class.sort_keys)}."
+    )
@@ -0,0 +1,67 @@
+import base64
+import json
+from fastapi import HTTPException
+from repositories.base import BaseRepository
+
+# Pagination shared by the /paginated endpoints. Without a cursor the page is
+# read with LIMIT/OFFSET, as before; every response carries an opaque
+# `next_cursor` that continues with keyset pagination (WHERE sort_key > last),
+# so deep pages cost the same as the first one.
+
+
+def encode_cursor(sort: str, value) -> str:
+    payload = json.dumps({"s": sort, "v": value}, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value = payload["v"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    if payload.get("s") != sort:
+        raise HTTPException(status_code=400, detail="Cursor gerado para outra ordenação")
+    return value
+
+
+async def paginate(
+    repository: BaseRepository,
+    page: int,
+    limit: int,
+    cursor: str | None = None,
+    sort: str = "id",
+    include_total: bool | None = None
+) -> tuple[list, dict]:
+    """
+    Returns the page items and the pagination block of the response. The total
+    is counted only when asked for, or by default in offset mode (where the old
+    clients expect it); a cursor request skips the count(*).
+    """
+    if sort not in repository.sort_keys:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Ordenação inválida, use uma de: {', '.join(repository.sort_keys)}"
+        )
+
+    pagination = {"limit": limit, "sort": sort}
+    if cursor:
+        after = decode_cursor(cursor, sort)
+        items = await repository.get_page_after(limit=limit + 1, sort=sort, after=after)
+    else:
+        # one extra row tells whether there is a next page
+        items = await repository.get_page_after(limit=limit + 1, sort=sort, offset=page * limit)
+        pagination["offset"] = page
+
+    has_next = len(items) > limit
+    items = items[:limit]
+    pagination["next_cursor"] = encode_cursor(sort, getattr(items[-1], sort)) if has_next and items else None
+
+    if include_total is None:
+        include_total = not cursor
+    if include_total:
+        total = await repository.get_total_count()
+        pagination["total"] = total
+        pagination["total_pages"] = (total // limit) + 1
+    return items, pagination
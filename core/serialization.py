@@ -0,0 +1,92 @@
+import types
+from functools import lru_cache
+from typing import Any, Iterable, Union, get_args, get_origin
+from fastapi import HTTPException, Response
+from pydantic import BaseModel, create_model
+from pydantic_core import to_json
+
+# Fast path for list responses. Rows read from the database are trusted, so
+# instead of validating every ORM object against the response schema (and
+# letting FastAPI validate and encode the result once more), the schema's
+# fields are read straight from the objects and the result is encoded by
+# pydantic-core in a single pass. The schemas still document the endpoints
+# through `response_model`.
+
+
+def _nested_schema(annotation) -> tuple[type[BaseModel] | None, bool]:
+    """The schema nested in a field annotation (`X`, `X | None`, `list[X]`) and whether it is a list."""
+    origin = get_origin(annotation)
+    if origin in (Union, types.UnionType):
+        for arg in get_args(annotation):
+            schema, many = _nested_schema(arg)
+            if schema:
+                return schema, many
+        return None, False
+    if origin in (list, tuple, set):
+        schema, _ = _nested_schema(get_args(annotation)[0])
+        return schema, True
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+    return None, False
+
+
+@lru_cache(maxsize=None)
+def schema_fields(schema: type[BaseModel]) -> tuple:
+    """(name, nested schema or None, is a list) for every field of `schema`."""
+    return tuple(
+        (name, *_nested_schema(field.annotation))
+        for name, field in schema.model_fields.items()
+    )
+
+
+FIELDS_DESCRIPTION = "Campos da resposta separados por vírgula (padrão: todos)"
+
+
+def parse_fields(schema: type[BaseModel], fields: str | None) -> tuple[str, ...] | None:
+    """
+    The fields of `schema` named in a `fields=a,b` query param, id always
+    first; None without the param (the whole schema).
+    """
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in schema.model_fields]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Campos inválidos: {', '.join(unknown)}. Use: {', '.join(schema.model_fields)}"
+        )
+    return tuple(dict.fromkeys(("id", *names)))
+
+
+@lru_cache(maxsize=256)
+def partial_schema(schema: type[BaseModel], fields: tuple[str, ...] | None) -> type[BaseModel]:
+    """`schema` trimmed to `fields`; the schema itself for None."""
+    if fields is None:
+        return schema
+    return create_model(
+        f"{schema.__name__}Parcial",
+        **{name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in fields}
+    )
+
+
+def dump(schema: type[BaseModel], obj: Any) -> dict | None:
+    """The fields of `schema` read from `obj`, nested schemas included."""
+    if obj is None:
+        return None
+    row = {}
+    for name, nested, many in schema_fields(schema):
+        value = getattr(obj, name, None)
+        if nested is not None:
+            value = [dump(nested, item) for item in value or ()] if many else dump(nested, value)
+        row[name] = value
+    return row
+
+
+def dump_many(schema: type[BaseModel], objs: Iterable[Any]) -> list[dict]:
+    return [dump(schema, obj) for obj in objs]
+
+
+def json_response(payload: Any, status_code: int = 200) -> Response:
+    # a Response is sent as is: FastAPI skips the response_model validation
+    return Response(content=to_json(payload), status_code=status_code, media_type="application/json")
@@ -0,0 +1,327 @@
+import asyncio
+import math
+import numpy as np
+
+# In-memory nearest-neighbour index over the coordinates of the enderecos.
+# Points are kept as unit vectors on the sphere in a k-d tree built over flat
+# NumPy arrays: the straight-line (chord) distance between two unit vectors
+# grows with the great-circle distance, so the tree can prune with plain
+# Euclidean boxes and the results come out in haversine order, with no
+# special case at the poles or the antimeridian. Leaves are scanned with
+# vectorized NumPy, and a query over all of Brazil visits a handful of them.
+#
+# Batches of points (SpatialIndex.assign) are matched block by block with
+# NumPy matrix products over the facilities of the leaves in reach.
+#
+# Writes are applied incrementally: a removed point is masked out of the
+# arrays, a new or moved one goes to a small side list scanned by brute
+# force, and the tree is rebuilt in memory once that list grows.
+
+EARTH_RADIUS_KM = 6371.0088
+LEAF_SIZE = 64
+# batch assignment: points per block and memory for one slice of the
+# block x facilities product
+ASSIGN_POINTS_PER_BLOCK = 64
+ASSIGN_LEAVES_PER_GROUP = 32
+ASSIGN_BLOCK_BYTES = 16 * 1024 * 1024
+
+
+def parse_coordinate(value, max_abs: float) -> float | None:
+    """A latitude/longitude as a number or text ('-15.78' or '-15,78'); None when invalid."""
+    if value is None:
+        return None
+    try:
+        parsed = float(str(value).strip().replace(",", "."))
+    except ValueError:
+        return None
+    if math.isnan(parsed) or abs(parsed) > max_abs:
+        return None
+    return parsed
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Great-circle distance, in km, from one point to arrays of points, all in degrees."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def unit_vectors(lats, lons) -> np.ndarray:
+    lats, lons = np.radians(lats), np.radians(lons)
+    cos_lats = np.cos(lats)
+    return np.column_stack((cos_lats * np.cos(lons), cos_lats * np.sin(lons), np.sin(lats)))
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chord / 2, 1.0))
+
+
+def km_to_chord(km: float) -> float:
+    return 2 * math.sin(min(km / (2 * EARTH_RADIUS_KM), math.pi / 2))
+
+
+def kd_tree(points: np.ndarray, leaf_size: int):
+    """
+    Median-split k-d tree over an (n, 3) array. Returns the permutation that
+    makes every node a contiguous slice and the nodes as parallel lists:
+    bounding box (min xyz + max xyz), children (-1, -1 on leaves), slice.
+    """
+    order = np.arange(len(points))
+    boxes, children, starts, ends = [], [], [], []
+
+    def add(start, end):
+        chunk = points[order[start:end]]
+        boxes.append(tuple(chunk.min(axis=0).tolist() + chunk.max(axis=0).tolist()))
+        children.append((-1, -1))
+        starts.append(start)
+        ends.append(end)
+        return len(boxes) - 1
+
+    pending = [add(0, len(points))] if len(points) else []
+    while pending:
+        node = pending.pop()
+        start, end = starts[node], ends[node]
+        if end - start <= leaf_size:
+            continue
+        box = boxes[node]
+        axis = int(np.argmax([box[3] - box[0], box[4] - box[1], box[5] - box[2]]))
+        middle = (start + end) // 2
+        part = np.argpartition(points[order[start:end], axis], middle - start)
+        order[start:end] = order[start:end][part]
+        children[node] = (add(start, middle), add(middle, end))
+        pending += list(children[node])
+    return order, boxes, children, starts, ends
+
+
+def _box_distances(boxes: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Smallest and largest squared distance between each of `boxes` and the box lo..hi."""
+    gap = np.maximum(0, np.maximum(boxes[:, :3] - hi, lo - boxes[:, 3:]))
+    span = np.maximum(np.abs(hi - boxes[:, :3]), np.abs(boxes[:, 3:] - lo))
+    return (gap * gap).sum(axis=1), (span * span).sum(axis=1)
+
+
+def _slices(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """The positions of the [start, end) ranges, concatenated."""
+    lengths = ends - starts
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(lengths.sum())
+
+
+def kd_partition(points: np.ndarray, block_size: int):
+    """Splits the points into compact blocks: the permutation and (start, end, box) of each block."""
+    order, boxes, children, starts, ends = kd_tree(points, block_size)
+    blocks = [(starts[node], ends[node], boxes[node]) for node, (left, _) in enumerate(children) if left < 0]
+    return order, blocks
+
+
+class SpatialIndex:
+    def __init__(self, rebuild_at: int = 2048):
+        self.rebuild_at = rebuild_at
+        # version of the enderecos the index reflects (None: never loaded)
+        self.version: int | None = None
+        self.loading = asyncio.Lock()
+        self.extra: dict[int, tuple[int, float, float]] = {}
+        self._extra_arrays = None
+        self._build(np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0), np.empty(0))
+
+    def __len__(self) -> int:
+        return int(self.alive.sum()) + len(self.extra)
+
+    def load(self, rows, version: int | None = None):
+        """Rebuilds the index from (endereco_id, estabelecimento_id, latitude, longitude) rows."""
+        points = []
+        for endereco_id, estabelecimento_id, latitude, longitude in rows:
+            lat, lon = parse_coordinate(latitude, 90), parse_coordinate(longitude, 180)
+            if lat is not None and lon is not None:
+                points.append((endereco_id, estabelecimento_id, lat, lon))
+        data = np.array(points, dtype=float).reshape(-1, 4)
+        self.extra = {}
+        self._build(data[:, 0].astype(np.int64), data[:, 1].astype(np.int64), data[:, 2], data[:, 3])
+        self.version = version
+
+    def upsert(self, endereco_id: int, estabelecimento_id: int, latitude, longitude):
+        self.remove(endereco_id)
+        lat, lon = parse_coordinate(latitude, 90), parse_coordinate(longitude, 180)
+        if lat is None or lon is None:
+            return
+        self.extra[endereco_id] = (estabelecimento_id, lat, lon)
+        self._extra_arrays = None
+        if len(self.extra) >= self.rebuild_at:
+            self._rebuild()
+
+    def remove(self, endereco_id: int):
+        position = self.positions.pop(endereco_id, None)
+        if position is not None:
+            self.alive[position] = False
+        if self.extra.pop(endereco_id, None) is not None:
+            self._extra_arrays = None
+
+    def nearest(self, lat: float, lon: float, k: int = 10, radius_km: float | None = None) -> list[tuple[int, float]]:
+        """The `k` closest (estabelecimento_id, distance_km), nearest first, optionally within `radius_km`."""
+        query = unit_vectors(lat, lon)[0]
+        x, y, z = query.tolist()
+        worst = km_to_chord(radius_km) ** 2 if radius_km is not None else math.inf
+        best_d = np.empty(0)
+        best_owner = np.empty(0, np.int64)
+
+        def consider(owners, d2):
+            nonlocal best_d, best_owner, worst
+            keep = d2 <= worst
+            if not keep.any():
+                return
+            best_d = np.concatenate((best_d, d2[keep]))
+            best_owner = np.concatenate((best_owner, owners[keep]))
+            if len(best_d) >= k:
+                if len(best_d) > k:
+                    top = np.argpartition(best_d, k - 1)[:k]
+                    best_d, best_owner = best_d[top], best_owner[top]
+                worst = float(best_d.max())
+
+        extra_owners, extra_points = self._extras()
+        if len(extra_owners):
+            consider(extra_owners, ((extra_points - query) ** 2).sum(axis=1))
+
+        boxes, children, starts, ends = self.boxes, self.children, self.starts, self.ends
+        stack = [0] if self.points.shape[0] else []
+        while stack:
+            node = stack.pop()
+            if self._box_gap(boxes[node], x, y, z) > worst:
+                continue
+            left, right = children[node]
+            if left < 0:
+                start, end = starts[node], ends[node]
+                alive = self.alive[start:end]
+                d2 = ((self.points[start:end] - query) ** 2).sum(axis=1)
+                consider(self.owners[start:end][alive], d2[alive])
+                continue
+            # depth first into the child holding the query point
+            if self._box_gap(boxes[left], x, y, z) <= self._box_gap(boxes[right], x, y, z):
+                stack += [right, left]
+            else:
+                stack += [left, right]
+
+        order = np.argsort(best_d)
+        return list(zip(best_owner[order].tolist(), chord_to_km(np.sqrt(best_d[order])).tolist()))
+
+    def assign(self, lats, lons, owners: list[int] | None = None) -> tuple[list, list]:
+        """
+        The nearest facility of every point of a batch, optionally among the
+        establishments in `owners` only. The points are split into small
+        compact blocks (the same median partition as the tree); for each
+        block the leaves that may hold a nearest facility are picked with
+        vectorized box-to-box bounds, and the block is matched against their
+        facilities with one matrix product: for unit vectors the nearest
+        point is the one with the largest dot product. The product is taken
+        in slices of at most ASSIGN_BLOCK_BYTES. Returns the estabelecimento
+        ids and the haversine distances in km (None when there is no facility).
+        """
+        lats, lons = np.asarray(lats, float), np.asarray(lons, float)
+        usable = self.alive if owners is None else self.alive & np.isin(self.owners, np.asarray(owners, np.int64))
+        extra_owners, extra_points = self._extras()
+        if owners is not None and len(extra_owners):
+            keep = np.isin(extra_owners, np.asarray(owners, np.int64))
+            extra_owners, extra_points = extra_owners[keep], extra_points[keep]
+
+        # usable leaves, and groups of consecutive ones: the tree keeps
+        # neighbouring leaves next to each other, so a group is compact too
+        with_usable = np.add.reduceat(usable, self.leaf_starts) > 0 if len(usable) else np.zeros(0, bool)
+        leaf_starts, leaf_ends = self.leaf_starts[with_usable], self.leaf_ends[with_usable]
+        leaf_boxes = self.leaf_boxes[with_usable]
+        group_starts = np.arange(0, len(leaf_starts), ASSIGN_LEAVES_PER_GROUP)
+        group_ends = np.minimum(group_starts + ASSIGN_LEAVES_PER_GROUP, len(leaf_starts))
+        group_boxes = np.column_stack((
+            np.minimum.reduceat(leaf_boxes[:, :3], group_starts),
+            np.maximum.reduceat(leaf_boxes[:, 3:], group_starts),
+        )) if len(group_starts) else np.empty((0, 6))
+        if not len(leaf_starts) and not len(extra_owners):
+            return [None] * len(lats), [None] * len(lats)
+
+        points = unit_vectors(lats, lons)
+        nearest_owner = np.empty(len(points), np.int64)
+        nearest_d2 = np.empty(len(points))
+        order, blocks = kd_partition(points, ASSIGN_POINTS_PER_BLOCK)
+        for block_start, block_end, box in blocks:
+            block = points[order[block_start:block_end]]
+            lo, hi = np.asarray(box[:3]), np.asarray(box[3:])
+            # every point of the block has a facility within the farthest
+            # corner distance of any box, so only boxes that come closer than
+            # the best such bound can hold a nearest facility: groups first,
+            # then the leaves of the groups that pass
+            candidates = np.empty(0, np.int64)
+            if len(group_starts):
+                min_d2, max_d2 = _box_distances(group_boxes, lo, hi)
+                bound = max_d2.min()
+                leaves = _slices(group_starts[min_d2 <= bound], group_ends[min_d2 <= bound])
+                min_d2, max_d2 = _box_distances(leaf_boxes[leaves], lo, hi)
+                leaves = leaves[min_d2 <= min(bound, max_d2.min())]
+                candidates = _slices(leaf_starts[leaves], leaf_ends[leaves])
+                candidates = candidates[usable[candidates]]
+            candidate_points = np.concatenate((self.points[candidates], extra_points))
+            candidate_owners = np.concatenate((self.owners[candidates], extra_owners))
+
+            best_dot = np.full(len(block), -np.inf)
+            best = np.zeros(len(block), np.int64)
+            step = max(1, ASSIGN_BLOCK_BYTES // (8 * len(block)))
+            for offset in range(0, len(candidate_points), step):
+                dots = block @ candidate_points[offset:offset + step].T
+                column = np.argmax(dots, axis=1)
+                value = dots[np.arange(len(block)), column]
+                better = value > best_dot
+                best_dot[better], best[better] = value[better], column[better] + offset
+
+            targets = order[block_start:block_end]
+            nearest_owner[targets] = candidate_owners[best]
+            nearest_d2[targets] = ((candidate_points[best] - block) ** 2).sum(axis=1)
+
+        return nearest_owner.tolist(), chord_to_km(np.sqrt(nearest_d2)).tolist()
+
+    @staticmethod
+    def _box_gap(box, x, y, z) -> float:
+        lo_x, lo_y, lo_z, hi_x, hi_y, hi_z = box
+        dx = lo_x - x if x < lo_x else (x - hi_x if x > hi_x else 0.0)
+        dy = lo_y - y if y < lo_y else (y - hi_y if y > hi_y else 0.0)
+        dz = lo_z - z if z < lo_z else (z - hi_z if z > hi_z else 0.0)
+        return dx * dx + dy * dy + dz * dz
+
+    def _build(self, endereco_ids, owners, lats, lons):
+        points = unit_vectors(lats, lons)
+        order, self.boxes, self.children, self.starts, self.ends = kd_tree(points, LEAF_SIZE)
+        self.points = points[order]
+        self.endereco_ids = endereco_ids[order]
+        self.owners = owners[order]
+        self.alive = np.ones(len(order), dtype=bool)
+        self.positions = dict(zip(self.endereco_ids.tolist(), range(len(order))))
+
+        # the leaves in position order, for the batch assignment
+        leaves = sorted((self.starts[node], node) for node, (left, _) in enumerate(self.children) if left < 0)
+        self.leaf_starts = np.array([start for start, _ in leaves], np.int64)
+        self.leaf_ends = np.array([self.ends[node] for _, node in leaves], np.int64)
+        self.leaf_boxes = np.array([self.boxes[node] for _, node in leaves], float).reshape(-1, 6)
+        self._extra_arrays = None
+
+    def _rebuild(self):
+        alive = self.alive
+        lats = np.degrees(np.arcsin(np.clip(self.points[alive, 2], -1, 1)))
+        lons = np.degrees(np.arctan2(self.points[alive, 1], self.points[alive, 0]))
+        extra = list(self.extra.items())
+        self.extra = {}
+        self._build(
+            np.concatenate((self.endereco_ids[alive], np.array([key for key, _ in extra], np.int64))),
+            np.concatenate((self.owners[alive], np.array([value[0] for _, value in extra], np.int64))),
+            np.concatenate((lats, [value[1] for _, value in extra])),
+            np.concatenate((lons, [value[2] for _, value in extra])),
+        )
+
+    def _extras(self):
+        if self._extra_arrays is None:
+            values = list(self.extra.values())
+            self._extra_arrays = (
+                np.array([owner for owner, _, _ in values], np.int64),
+                unit_vectors([lat for _, lat, _ in values], [lon for _, _, lon in values]).reshape(-1, 3),
+            )
+        return self._extra_arrays
+
+
+# the index behind /estabelecimentos/proximos
+estabelecimentos_index = SpatialIndex()
@@ -2,9 +2,20 @@ from contextlib import asynccontextmanager
 import logging
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from core.cache import ResponseCacheMiddleware, response_cache
+from core.conditional import ConditionalGetMiddleware, table_versions
 from core.config import settings
-from core.database import get_db, init_models, engine, Base
-from routers import equipe, estabelecimento, endereco, mantenedora, profissional
+from core.database import async_session, get_db, init_models, engine, Base
+from core.expansion import expansion_tables
+from repositories.endereco import EnderecoRepository
+from repositories.estabelecimento import EstabelecimentoRepository
+from repositories.profissional import ProfissionalRepository
+from routers import autocomplete, busca, equipe, equipeprofs, estabelecimento, endereco, mantenedora, profissional
+from schemas.endereco import Endereco
+from schemas.equipe import Equipe
+from schemas.estabelecimento import Estabelecimento
+from schemas.mantenedora import Mantenedora
+from schemas.profissional import Profissional
 
 logging.basicConfig(
     filename="app.log",
@@ -15,6 +26,10 @@ logging.basicConfig(
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_models()
+    async with async_session() as session:
+        await EnderecoRepository(session).sync_spatial_index()
+        await EstabelecimentoRepository(session).sync_autocomplete_index()
+        await ProfissionalRepository(session).sync_autocomplete_index()
     yield
 
 app = FastAPI(
@@ -23,6 +38,28 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+def _tables(schema, *tables: str) -> tuple[str, ...]:
+    """The tables of a router's own responses plus those its `expand=` can reach."""
+    return tuple(dict.fromkeys((*tables, *expansion_tables(schema))))
+
+# tables read by the responses of each router; writes to them invalidate the
+# cached responses and change the ETags
+ROUTE_TABLES = {
+    "/estabelecimentos": _tables(Estabelecimento, "estabelecimentos", "enderecos"),
+    "/enderecos": _tables(Endereco, "enderecos"),
+    "/mantenedoras": _tables(Mantenedora, "mantenedoras"),
+    "/equipes": _tables(Equipe, "equipes", "profissionais", "equipeprofs"),
+    "/equipeprofs": ("equipeprofs",),
+    "/profissionais": _tables(Profissional, "profissionais"),
+    "/busca": ("estabelecimentos", "enderecos", "mantenedoras", "profissionais"),
+}
+
+app.add_middleware(ResponseCacheMiddleware, cache=response_cache, routes=ROUTE_TABLES, versions=table_versions)
+
+# outside the cache: a matching If-None-Match is answered before any lookup
+app.add_middleware(ConditionalGetMiddleware, versions=table_versions, routes=ROUTE_TABLES)
+
+# added last so it wraps the cache and cached responses get CORS headers too
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -35,9 +72,17 @@ app.add_middleware(
 async def healthcheck(db=Depends(get_db)):
     return {"status": "healthy", "database": "connected"}
 
+@app.get("/cache/stats")
+async def cache_stats():
+    return response_cache.stats()
+
 # Include routers
 app.include_router(estabelecimento.router)
 app.include_router(endereco.router)
 app.include_router(mantenedora.router)
 app.include_router(equipe.router)
+app.include_router(equipeprofs.router)
 app.include_router(profissional.router)
+app.include_router(busca.router)
+# not in ROUTE_TABLES: served from memory, without the cache and ETag lookups
+app.include_router(autocomplete.router)
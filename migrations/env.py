@@ -15,6 +15,12 @@ from models import estabelecimento, endereco
 from models.mantenedora import Mantenedora
 from models.estabelecimento import Estabelecimento
 from models.endereco import Endereco
+from models.equipe import Equipe
+from models.profissional import Profissional
+from models.equipeprof import EquipeProf
+from models.import_reject import ImportReject
+from models.import_run import ImportRun
+from models.table_change import TableChange
 
 config = context.config
 if config.config_file_name is not None:
@@ -0,0 +1,41 @@
+"""import runs
+
+Revision ID: a6d2e9f47c31
+Revises: f3a8c1d6e205
+Create Date: 2026-10-17 15:14:52.306718
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d2e9f47c31'
+down_revision = 'f3a8c1d6e205'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('import_runs',
+    sa.Column('run_id', sa.String(), nullable=False),
+    sa.Column('table_name', sa.String(), nullable=False),
+    sa.Column('source_file', sa.String(), nullable=False),
+    sa.Column('file_hash', sa.String(), nullable=False),
+    sa.Column('rows_committed', sa.Integer(), nullable=False),
+    sa.Column('rows_written', sa.Integer(), nullable=False),
+    sa.Column('rows_skipped', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('deleted', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('run_id', 'table_name')
+    )
+    op.create_index(op.f('ix_import_runs_run_id'), 'import_runs', ['run_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_import_runs_run_id'), table_name='import_runs')
+    op.drop_table('import_runs')
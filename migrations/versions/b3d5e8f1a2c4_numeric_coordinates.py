@@ -0,0 +1,42 @@
+"""numeric coordinates
+
+Revision ID: b3d5e8f1a2c4
+Revises: a6d2e9f47c31
+Create Date: 2026-10-18 10:12:31.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3d5e8f1a2c4'
+down_revision = 'a6d2e9f47c31'
+branch_labels = None
+depends_on = None
+
+# the importers wrote the coordinates as text, sometimes with a decimal comma
+NUMBER = "'^[-+]?([0-9]+([.,][0-9]*)?|[.,][0-9]+)([eE][-+]?[0-9]+)?$'"
+
+
+def _to_double(column: str, max_abs: int) -> str:
+    text = f"btrim({column}::text)"
+    value = f"replace({text}, ',', '.')::double precision"
+    # nested CASE: only a valid number is cast, out-of-range values become NULL
+    return (
+        f"ALTER TABLE enderecos ALTER COLUMN {column} TYPE double precision USING "
+        f"CASE WHEN {text} ~ {NUMBER} THEN "
+        f"CASE WHEN abs({value}) <= {max_abs} THEN {value} END END"
+    )
+
+
+def upgrade() -> None:
+    op.execute(_to_double('latitude', 90))
+    op.execute(_to_double('longitude', 180))
+    op.create_index('ix_enderecos_latitude_longitude', 'enderecos', ['latitude', 'longitude'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_enderecos_latitude_longitude', table_name='enderecos')
+    op.alter_column('enderecos', 'longitude', type_=sa.String(), postgresql_using='longitude::text')
+    op.alter_column('enderecos', 'latitude', type_=sa.String(), postgresql_using='latitude::text')
@@ -0,0 +1,47 @@
+"""trigram search
+
+Revision ID: c7a1f04d9e62
+Revises: 9b4c2e71d5a8
+Create Date: 2026-10-18 14:03:12.558301
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7a1f04d9e62'
+down_revision = '9b4c2e71d5a8'
+branch_labels = None
+depends_on = None
+
+# (index, table, column) searched by /busca
+SEARCH_INDEXES = [
+    ('ix_estabelecimentos_nome_fantasia_trgm', 'estabelecimentos', 'nome_fantasia_estabelecimento'),
+    ('ix_estabelecimentos_razao_social_trgm', 'estabelecimentos', 'nome_razao_social_estabelecimento'),
+    ('ix_mantenedoras_razao_social_trgm', 'mantenedoras', 'nome_razao_social_mantenedora'),
+    ('ix_profissionais_nome_trgm', 'profissionais', 'nome_profissional'),
+]
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+    # unaccent() is only STABLE (it depends on the search_path), so it cannot
+    # be used in an index; this wrapper pins the dictionary and is IMMUTABLE
+    op.execute("""
+        CREATE OR REPLACE FUNCTION cnes_unaccent(value text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS
+        $$ SELECT public.unaccent('public.unaccent'::regdictionary, value) $$
+    """)
+    for name, table, column in SEARCH_INDEXES:
+        op.create_index(
+            name, table, [sa.text(f'cnes_unaccent({column}) gin_trgm_ops')],
+            unique=False, postgresql_using='gin'
+        )
+
+
+def downgrade() -> None:
+    for name, table, _ in SEARCH_INDEXES:
+        op.drop_index(name, table_name=table)
+    op.execute('DROP FUNCTION IF EXISTS cnes_unaccent(text)')
@@ -0,0 +1,58 @@
+"""filter indexes
+
+Revision ID: d2e6b9c35f17
+Revises: c7a1f04d9e62
+Create Date: 2026-10-18 17:41:06.913554
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2e6b9c35f17'
+down_revision = 'c7a1f04d9e62'
+branch_labels = None
+depends_on = None
+
+# text_pattern_ops b-trees: equality and prefix filters
+PATTERN_INDEXES = [
+    ('estabelecimentos', 'codigo_unidade'),
+    ('estabelecimentos', 'codigo_cnes'),
+    ('estabelecimentos', 'nome_fantasia_estabelecimento'),
+    ('enderecos', 'cep_estabelecimento'),
+    ('enderecos', 'bairro'),
+    ('equipes', 'codigo_equipe'),
+    ('equipes', 'nome_equipe'),
+    ('mantenedoras', 'cnpj_mantenedora'),
+    ('mantenedoras', 'nome_razao_social_mantenedora'),
+    ('profissionais', 'codigo_profissional_sus'),
+    ('profissionais', 'nome_profissional'),
+]
+# plain b-trees: foreign keys and equality filters
+INDEXES = [
+    ('estabelecimentos', 'mantenedora_id'),
+    ('enderecos', 'estabelecimento_id'),
+    ('equipes', 'tipo_equipe'),
+    ('equipes', 'estabelecimento_id'),
+    ('equipeprofs', 'equipe_id'),
+    ('equipeprofs', 'profissional_id'),
+    ('profissionais', 'codigo_cns'),
+]
+
+
+def upgrade() -> None:
+    for table, column in PATTERN_INDEXES:
+        op.create_index(
+            f'ix_{table}_{column}_pattern', table, [column],
+            unique=False, postgresql_ops={column: 'text_pattern_ops'}
+        )
+    for table, column in INDEXES:
+        op.create_index(op.f(f'ix_{table}_{column}'), table, [column], unique=False)
+
+
+def downgrade() -> None:
+    for table, column in reversed(INDEXES):
+        op.drop_index(op.f(f'ix_{table}_{column}'), table_name=table)
+    for table, column in reversed(PATTERN_INDEXES):
+        op.drop_index(f'ix_{table}_{column}_pattern', table_name=table)
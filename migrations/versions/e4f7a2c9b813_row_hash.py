@@ -0,0 +1,29 @@
+"""row hash
+
+Revision ID: e4f7a2c9b813
+Revises: d2e6b9c35f17
+Create Date: 2026-10-19 09:26:44.170382
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4f7a2c9b813'
+down_revision = 'd2e6b9c35f17'
+branch_labels = None
+depends_on = None
+
+# tables loaded from the CNES files; the delta sync compares their row_hash
+TABLES = ['mantenedoras', 'estabelecimentos', 'enderecos', 'equipes', 'profissionais', 'equipeprofs']
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.add_column(table, sa.Column('row_hash', sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.drop_column(table, 'row_hash')
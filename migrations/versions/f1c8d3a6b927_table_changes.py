@@ -0,0 +1,56 @@
+"""table changes
+
+Revision ID: f1c8d3a6b927
+Revises: e4f7a2c9b813
+Create Date: 2026-10-20 10:12:37.604219
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c8d3a6b927'
+down_revision = 'e4f7a2c9b813'
+branch_labels = None
+depends_on = None
+
+# tables read by the API; every statement that writes them bumps their
+# counter, which core.conditional.TableVersions reads instead of scanning them
+TABLES = ['mantenedoras', 'estabelecimentos', 'enderecos', 'equipes', 'profissionais', 'equipeprofs']
+
+
+def upgrade() -> None:
+    op.create_table(
+        'table_changes',
+        sa.Column('table_name', sa.String(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('table_name')
+    )
+    op.execute("""
+        CREATE OR REPLACE FUNCTION cnes_table_changed() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO table_changes (table_name, version, changed_at)
+            VALUES (TG_TABLE_NAME, 1, now())
+            ON CONFLICT (table_name) DO UPDATE
+            SET version = table_changes.version + 1, changed_at = now();
+            RETURN NULL;
+        END
+        $$
+    """)
+    for table in TABLES:
+        op.execute(f"INSERT INTO table_changes (table_name, version) VALUES ('{table}', 0)")
+        op.execute(f"""
+            CREATE TRIGGER {table}_changed
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION cnes_table_changed()
+        """)
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_changed ON {table}')
+    op.execute('DROP FUNCTION IF EXISTS cnes_table_changed()')
+    op.drop_table('table_changes')
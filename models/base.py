@@ -1,6 +1,6 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, DateTime, Boolean
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, DateTime, Boolean, Index, LargeBinary
+from sqlalchemy.sql import func, null
 from core.database import Base
 
 class BaseModel(Base):
@@ -11,3 +11,17 @@ class BaseModel(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, onupdate=func.now())
     deleted = Column(Boolean, default=False)
+
+
+class SourceRow:
+    """Linhas importadas dos arquivos do CNES"""
+
+    # hash of the source values written by the COPY loaders and the delta
+    # sync (scripts.CNES.transform.row_hash); any other UPDATE clears it, so
+    # the next sync compares the row as changed
+    row_hash = Column(LargeBinary, nullable=True, onupdate=null())
+
+
+def pattern_index(table: str, column: str) -> Index:
+    """B-tree with text_pattern_ops: serves equality and LIKE 'prefix%' whatever the collation"""
+    return Index(f"ix_{table}_{column}_pattern", column, postgresql_ops={column: "text_pattern_ops"})
@@ -1,17 +1,22 @@
-from sqlalchemy import Column, String, Float, Integer, ForeignKey
+from sqlalchemy import Column, String, Float, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship
-from models.base import BaseModel
+from models.base import BaseModel, SourceRow, pattern_index
 
-class Endereco(BaseModel):
+class Endereco(BaseModel, SourceRow):
     __tablename__ = "enderecos"
+    __table_args__ = (
+        Index("ix_enderecos_latitude_longitude", "latitude", "longitude"),
+        pattern_index("enderecos", "cep_estabelecimento"),
+        pattern_index("enderecos", "bairro"),
+    )
 
-    estabelecimento_id = Column(Integer, ForeignKey("estabelecimentos.id", ondelete="CASCADE"), nullable=False)
-    latitude = Column(String, nullable=True)  # Changed from String to Float
-    longitude = Column(String, nullable=True)  # Changed from String to Float
+    estabelecimento_id = Column(Integer, ForeignKey("estabelecimentos.id", ondelete="CASCADE"), nullable=False, index=True)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
     cep_estabelecimento = Column(String, nullable=False)
     bairro = Column(String, nullable=False)
     logradouro = Column(String, nullable=False)
     numero = Column(String, nullable=True)
     complemento = Column(String, nullable=True)
 
-    estabelecimento = relationship("Estabelecimento", back_populates="endereco")
+    estabelecimento = relationship("Estabelecimento", back_populates="endereco", lazy='raise')
@@ -1,16 +1,20 @@
 from sqlalchemy import Column, ForeignKey, Integer, String, DateTime
 from sqlalchemy.orm import relationship
-from models.base import BaseModel
+from models.base import BaseModel, SourceRow, pattern_index
 from models.equipeprof import EquipeProf
 
-class Equipe(BaseModel):
+class Equipe(BaseModel, SourceRow):
     __tablename__ = "equipes"
+    __table_args__ = (
+        pattern_index("equipes", "codigo_equipe"),
+        pattern_index("equipes", "nome_equipe"),
+    )
 
     codigo_equipe = Column(String, nullable=False, unique=True)
     nome_equipe = Column(String, nullable=False)
-    tipo_equipe = Column(String, nullable=False)
+    tipo_equipe = Column(String, nullable=False, index=True)
     codigo_unidade = Column(String, nullable=False)
-    estabelecimento_id = Column(Integer, ForeignKey("estabelecimentos.id", ondelete="CASCADE"), nullable=False)
+    estabelecimento_id = Column(Integer, ForeignKey("estabelecimentos.id", ondelete="CASCADE"), nullable=False, index=True)
 
-    profissionais = relationship("Profissional", secondary="equipeprofs", back_populates="equipes", cascade="all", passive_deletes=True, lazy='selectin')
-    estabelecimento = relationship("Estabelecimento", back_populates="equipe")
\ No newline at end of file
+    profissionais = relationship("Profissional", secondary="equipeprofs", back_populates="equipes", cascade="all", passive_deletes=True, lazy='raise')
+    estabelecimento = relationship("Estabelecimento", back_populates="equipe", lazy='raise')
\ No newline at end of file
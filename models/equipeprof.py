@@ -1,9 +1,9 @@
 from sqlalchemy import Column, ForeignKey, Integer, String, DateTime
 from sqlalchemy.orm import relationship
-from models.base import BaseModel
+from models.base import BaseModel, SourceRow
 
-class EquipeProf(BaseModel):
+class EquipeProf(BaseModel, SourceRow):
     __tablename__ = "equipeprofs"
 
-    equipe_id = Column(Integer, ForeignKey("equipes.id", ondelete="CASCADE"), nullable=False)
-    profissional_id = Column(Integer, ForeignKey("profissionais.id", ondelete="CASCADE"), nullable=False)
\ No newline at end of file
+    equipe_id = Column(Integer, ForeignKey("equipes.id", ondelete="CASCADE"), nullable=False, index=True)
+    profissional_id = Column(Integer, ForeignKey("profissionais.id", ondelete="CASCADE"), nullable=False, index=True)
\ No newline at end of file
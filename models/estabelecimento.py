@@ -1,9 +1,14 @@
 from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Boolean
 from sqlalchemy.orm import relationship
-from models.base import BaseModel
+from models.base import BaseModel, SourceRow, pattern_index
 
-class Estabelecimento(BaseModel):
+class Estabelecimento(BaseModel, SourceRow):
     __tablename__ = "estabelecimentos"
+    __table_args__ = (
+        pattern_index("estabelecimentos", "codigo_unidade"),
+        pattern_index("estabelecimentos", "codigo_cnes"),
+        pattern_index("estabelecimentos", "nome_fantasia_estabelecimento"),
+    )
 
     codigo_unidade = Column(String, nullable=False, unique=True)
     codigo_cnes = Column(String, nullable=False, unique=True)
@@ -13,9 +18,9 @@ class Estabelecimento(BaseModel):
     email_estabelecimento = Column(String, nullable=True)
     
     # Change ForeignKey definition
-    mantenedora_id = Column(Integer, ForeignKey("mantenedoras.id", ondelete="CASCADE"), nullable=False)
+    mantenedora_id = Column(Integer, ForeignKey("mantenedoras.id", ondelete="CASCADE"), nullable=False, index=True)
     cnpj_mantenedora = Column(String, nullable=False)
     
-    mantenedora = relationship("Mantenedora", back_populates="estabelecimentos")
-    endereco = relationship("Endereco", back_populates="estabelecimento", uselist=False)
-    equipe = relationship("Equipe", back_populates="estabelecimento", uselist=False)
+    mantenedora = relationship("Mantenedora", back_populates="estabelecimentos", lazy='raise')
+    endereco = relationship("Endereco", back_populates="estabelecimento", uselist=False, lazy='raise')
+    equipe = relationship("Equipe", back_populates="estabelecimento", uselist=False, lazy='raise')
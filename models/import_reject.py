@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String
+from sqlalchemy.dialects.postgresql import JSONB
+from models.base import BaseModel
+
+class ImportReject(BaseModel):
+    """Linhas de arquivos do CNES recusadas durante a importação"""
+    __tablename__ = "import_rejects"
+
+    source = Column(String, nullable=False)
+    target_table = Column(String, nullable=False)
+    reason = Column(String, nullable=False)
+    data = Column(JSONB, nullable=True)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, UniqueConstraint
+from models.base import BaseModel
+
+class ImportRun(BaseModel):
+    """Diário de progresso de uma importação do CNES: uma linha por tabela de cada execução"""
+    __tablename__ = "import_runs"
+    __table_args__ = (UniqueConstraint("run_id", "table_name"),)
+
+    run_id = Column(String, nullable=False, index=True)
+    table_name = Column(String, nullable=False)
+    source_file = Column(String, nullable=False)
+    file_hash = Column(String, nullable=False)
+    # rows of the source file already handled and committed (the resume offset)
+    rows_committed = Column(Integer, nullable=False, default=0)
+    rows_written = Column(Integer, nullable=False, default=0)
+    rows_skipped = Column(Integer, nullable=False, default=0)
+    status = Column(String, nullable=False, default="pending")
@@ -1,10 +1,14 @@
 from sqlalchemy import Column, String, DateTime, Boolean
 from sqlalchemy.orm import relationship
-from models.base import BaseModel
+from models.base import BaseModel, SourceRow, pattern_index
 from datetime import datetime
 
-class Mantenedora(BaseModel):
+class Mantenedora(BaseModel, SourceRow):
     __tablename__ = "mantenedoras"
+    __table_args__ = (
+        pattern_index("mantenedoras", "cnpj_mantenedora"),
+        pattern_index("mantenedoras", "nome_razao_social_mantenedora"),
+    )
 
     cnpj_mantenedora = Column(String, nullable=False, unique=True)
     nome_razao_social_mantenedora = Column(String, nullable=False)
@@ -18,5 +22,6 @@ class Mantenedora(BaseModel):
         "Estabelecimento", 
         back_populates="mantenedora", 
         cascade="all, delete-orphan",
-        passive_deletes=True
+        passive_deletes=True,
+        lazy='raise'
     )
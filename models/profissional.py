@@ -1,15 +1,19 @@
 from sqlalchemy import Column, ForeignKey, Integer, String, DateTime
 from sqlalchemy.orm import relationship
-from models.base import BaseModel
+from models.base import BaseModel, SourceRow, pattern_index
 from models.equipeprof import EquipeProf
 
-class Profissional(BaseModel):
+class Profissional(BaseModel, SourceRow):
     __tablename__ = "profissionais"
+    __table_args__ = (
+        pattern_index("profissionais", "codigo_profissional_sus"),
+        pattern_index("profissionais", "nome_profissional"),
+    )
 
     codigo_profissional_sus = Column(String, nullable=False, unique=True)
     nome_profissional = Column(String, nullable=False)
-    codigo_cns = Column(String, nullable=False)
+    codigo_cns = Column(String, nullable=False, index=True)
     situacao_profissional_cadsus = Column(String, nullable=False)
 
-    equipes = relationship("Equipe", secondary="equipeprofs", back_populates="profissionais", lazy='selectin')
+    equipes = relationship("Equipe", secondary="equipeprofs", back_populates="profissionais", lazy='raise')
 
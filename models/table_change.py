@@ -0,0 +1,12 @@
+from sqlalchemy import BigInteger, Column, DateTime, String
+from sqlalchemy.sql import func
+from core.database import Base
+
+class TableChange(Base):
+    """Contador de alterações de cada tabela do CNES, mantido pelos triggers cnes_table_changed"""
+    __tablename__ = "table_changes"
+
+    table_name = Column(String, primary_key=True)
+    # bumped once per INSERT/UPDATE/DELETE/TRUNCATE statement on the table
+    version = Column(BigInteger, nullable=False, default=0)
+    changed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -1,35 +1,206 @@
-from typing import TypeVar, Generic, Type, Union
-from sqlalchemy import select, update, delete
+from typing import AsyncIterator, TypeVar, Generic, Type, Union
+from sqlalchemy import inspect, select, update, delete, func, or_
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import MANYTOONE, joinedload, load_only, selectinload, with_loader_criteria
+from core.filters import Filter, filter_clause
 from models.base import BaseModel
 
 ModelType = TypeVar("ModelType", bound=BaseModel)
 
+LOADERS = {"joinedload": joinedload, "selectinload": selectinload}
+
+# the delta sync keeps the rows dropped from a release with deleted = true;
+# reads leave them out, both from the rows they select and from the
+# relationships they load
+NOT_DELETED = with_loader_criteria(BaseModel, lambda cls: cls.deleted.isnot(True), include_aliases=True)
+
 class BaseRepository(Generic[ModelType]):
+    # unique, indexed columns the keyset pagination may sort by
+    sort_keys: tuple[str, ...] = ("id",)
+    # indexed columns the /filtro endpoints may filter on, with the operators
+    # their index serves (see core.filters)
+    filter_columns: dict[str, tuple[str, ...]] = {"id": ("eq", "in", "range")}
+    # name columns of the fuzzy search, each with a trigram index on
+    # cnes_unaccent(column) (migration c7a1f04d9e62)
+    search_columns: tuple[str, ...] = ()
+    # relationships the response schema includes; every other one raises on
+    # access (lazy='raise') unless a read expands it
+    included_relationships: tuple[str, ...] = ()
+
     def __init__(self, session: AsyncSession, model: Type[ModelType]):
         self.session = session
         self.model = model
+        # response fields the reads must load (None: all of them)
+        self.fields: tuple[str, ...] | None = None
+        # dotted relationship paths the reads load besides the included ones
+        self.expanded: tuple[str, ...] = ()
+        # writes commit on success and roll the session back on failure, unless
+        # the caller runs them inside its own transaction
+        self.owns_transaction = True
+
+    def select_fields(self, fields: tuple[str, ...] | None) -> "BaseRepository[ModelType]":
+        """Restricts the reads to the columns and relationships behind `fields`."""
+        self.fields = fields
+        return self
+
+    def expand(self, paths: tuple[str, ...]) -> "BaseRepository[ModelType]":
+        """Makes the reads also load the relationships of `paths` (e.g. "equipe.profissionais")."""
+        self.expanded = paths
+        return self
+
+    def within_transaction(self) -> "BaseRepository[ModelType]":
+        """Leaves the commits and rollbacks of the writes to the caller."""
+        self.owns_transaction = False
+        return self
+
+    async def _commit(self):
+        if self.owns_transaction:
+            await self.session.commit()
+
+    async def _rollback(self):
+        if self.owns_transaction:
+            await self.session.rollback()
 
     async def get_all(self) -> list[ModelType]:
-        query = select(self.model)
+        query = select(self.model).options(*self.list_options())
         result = await self.session.execute(query)
         return list(result.scalars().all())
 
     async def get_by_id(self, id: int) -> ModelType | None:
-        query = select(self.model).where(self.model.id == id)
+        query = select(self.model).options(*self.list_options()).where(self.model.id == id)
         result = await self.session.execute(query)
         return result.scalar_one_or_none()
 
+    def list_options(self) -> tuple:
+        """
+        Loader options of the reads: the soft-delete filter, the included
+        relationships, the expanded ones and, with select_fields, only the
+        selected columns. The sort keys are always loaded, since the
+        pagination reads them from the last row.
+        """
+        included = self.included_relationships
+        options = [NOT_DELETED]
+        if self.fields is not None:
+            included = tuple(name for name in included if name in self.fields)
+            columns = self.model.__table__.columns
+            names = dict.fromkeys((*self.sort_keys, *(name for name in self.fields if name in columns)))
+            options.append(load_only(*(getattr(self.model, name) for name in names)))
+        for path in dict.fromkeys((*included, *self.expanded)):
+            options.append(self._relationship_loader(path))
+        return tuple(options)
+
+    def _relationship_loader(self, path: str):
+        """
+        Eager loader of a dotted relationship path: a JOIN for a many-to-one,
+        which matches at most one row, and one extra SELECT ... IN per level
+        for the others.
+        """
+        loader = None
+        model = self.model
+        for name in path.split("."):
+            relationship = inspect(model).relationships[name]
+            strategy = "joinedload" if relationship.direction is MANYTOONE else "selectinload"
+            attribute = getattr(model, name)
+            loader = getattr(loader, strategy)(attribute) if loader else LOADERS[strategy](attribute)
+            model = relationship.mapper.class_
+        return loader
+
+    async def get_page_after(self, limit: int, sort: str = "id", after=None, offset: int = 0) -> list[ModelType]:
+        """
+        Keyset page: the first `limit` rows whose `sort` value comes after
+        `after`. Served by the column's index, so every page costs the same;
+        `offset` serves the numbered pages of the offset mode.
+        """
+        column = getattr(self.model, sort)
+        query = select(self.model).options(*self.list_options())
+        if after is not None:
+            query = query.where(column > after)
+        query = query.order_by(column).limit(limit)
+        if offset:
+            query = query.offset(offset)
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+
+    async def get_by_filters(
+        self,
+        filters: dict | list[Filter],
+        order_by: list[tuple[str, bool]] = (),
+        limit: int | None = None
+    ) -> list[ModelType]:
+        """
+        Rows matching every filter, in one statement. `filters` is a list of
+        parsed Filters or, for plain equality, a column -> value dict;
+        `order_by` holds (column, descending) pairs, with id as the tiebreaker.
+        """
+        if isinstance(filters, dict):
+            filters = [Filter(column, "eq", value) for column, value in filters.items()]
+        query = select(self.model).options(*self.list_options())
+        for filter in filters:
+            query = query.where(filter_clause(self.model, filter))
+        ordering = [
+            getattr(self.model, column).desc() if descending else getattr(self.model, column)
+            for column, descending in order_by
+        ]
+        if "id" not in (column for column, _ in order_by):
+            ordering.append(self.model.id)
+        query = query.order_by(*ordering)
+        if limit:
+            query = query.limit(limit)
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+
+    async def search(self, term: str, limit: int, threshold: float = 0.4) -> list[tuple[ModelType, float]]:
+        """
+        Rows whose search columns contain words close to `term`, ignoring
+        case and accents, best matches first, with their word similarity
+        (0 to 1). The filter and the ranking run in the database, the
+        filter through the trigram indexes.
+        """
+        await self.session.execute(
+            select(func.set_config("pg_trgm.word_similarity_threshold", str(threshold), True))
+        )
+        needle = func.cnes_unaccent(term)
+        columns = [func.cnes_unaccent(getattr(self.model, name)) for name in self.search_columns]
+        scores = [func.word_similarity(needle, column) for column in columns]
+        score = (func.greatest(*scores) if len(scores) > 1 else scores[0]).label("relevancia")
+        query = (
+            select(self.model, score)
+            .options(*self.list_options())
+            # `column %> needle`: word_similarity(needle, column) above the threshold
+            .where(or_(*(column.op("%>")(needle) for column in columns)))
+            .order_by(score.desc(), self.model.id)
+            .limit(limit)
+        )
+        result = await self.session.execute(query)
+        return [(row, relevancia) for row, relevancia in result.all()]
+
+    async def stream(self, batch_size: int = 1000) -> AsyncIterator[list[ModelType]]:
+        """
+        Every row in id order, `batch_size` rows at a time, read through a
+        server-side cursor. The identity map only holds weak references, so a
+        batch is released as soon as the caller drops it and memory stays flat
+        however large the table is.
+        """
+        query = (
+            select(self.model)
+            .options(*self.list_options())
+            .order_by(self.model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.session.stream_scalars(query)
+        async for rows in result.partitions():
+            yield rows
+
     async def create(self, data: dict) -> ModelType:
         try:
             entity = self.model(**data)
             self.session.add(entity)
             await self.session.flush()
             await self.session.refresh(entity)
-            await self.session.commit()
+            await self._commit()
             return entity
         except Exception:
-            await self.session.rollback()
+            await self._rollback()
             raise
 
     async def update(self, entity: Union[ModelType, int], data: dict) -> ModelType | None:
@@ -41,10 +212,10 @@ class BaseRepository(Generic[ModelType]):
             result = await self.session.execute(query)
             updated = result.scalar_one_or_none()
             if updated:
-                await self.session.commit()
+                await self._commit()
             return updated
         except Exception:
-            await self.session.rollback()
+            await self._rollback()
             raise
 
     async def delete(self, entity: Union[ModelType, int]) -> bool:
@@ -53,9 +224,9 @@ class BaseRepository(Generic[ModelType]):
             query = delete(self.model).where(self.model.id == entity_id)
             result = await self.session.execute(query)
             if result.rowcount > 0:
-                await self.session.commit()
+                await self._commit()
                 return True
             return False
         except Exception:
-            await self.session.rollback()
+            await self._rollback()
             raise
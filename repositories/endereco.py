@@ -1,17 +1,28 @@
-from sqlalchemy import select, func
+from sqlalchemy import select, func, or_
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
-from repositories.base import BaseRepository
+from core.cache import response_cache
+from core.spatial import estabelecimentos_index
+from repositories.base import NOT_DELETED, BaseRepository
 from models.endereco import Endereco
 from typing import List
 
 class EnderecoRepository(BaseRepository[Endereco]):
+    filter_columns = {
+        "id": ("eq", "in", "range"),
+        "estabelecimento_id": ("eq", "in"),
+        "cep_estabelecimento": ("eq", "in", "prefix"),
+        "bairro": ("eq", "prefix"),
+        # leading column of ix_enderecos_latitude_longitude
+        "latitude": ("range", "is_null"),
+    }
+
     def __init__(self, session):
         super().__init__(session, Endereco)
     
     async def create(self, data: dict) -> Endereco:
         try:
-            return await super().create(data)
+            endereco = await super().create(data)
         except IntegrityError as e:
             if 'enderecos_estabelecimento_id_fkey' in str(e):
                 raise HTTPException(
@@ -19,10 +30,12 @@ class EnderecoRepository(BaseRepository[Endereco]):
                     detail="Estabelecimento não encontrado ou já possui um endereço cadastrado"
                 )
             raise
+        self._index(endereco)
+        return endereco
 
     async def update(self, id: int, data: dict) -> Endereco | None:
         try:
-            return await super().update(id, data)
+            endereco = await super().update(id, data)
         except IntegrityError as e:
             if 'enderecos_estabelecimento_id_fkey' in str(e):
                 raise HTTPException(
@@ -30,32 +43,103 @@ class EnderecoRepository(BaseRepository[Endereco]):
                     detail="Estabelecimento não encontrado ou já possui um endereço cadastrado"
                 )
             raise
+        if endereco:
+            self._index(endereco)
+        return endereco
+
+    async def delete(self, id: int) -> bool:
+        deleted = await super().delete(id)
+        if deleted:
+            estabelecimentos_index.remove(id)
+            self._mark_index_current()
+        return deleted
+
+    def _index(self, endereco: Endereco):
+        estabelecimentos_index.upsert(
+            endereco.id, endereco.estabelecimento_id, endereco.latitude, endereco.longitude
+        )
+        self._mark_index_current()
+
+    @staticmethod
+    def _mark_index_current():
+        # the commit bumped the enderecos version; this write is already in the index
+        if estabelecimentos_index.version is not None:
+            estabelecimentos_index.version = response_cache.versions(("enderecos",))["enderecos"]
+
+    async def get_coordinates(self) -> list[tuple]:
+        """(id, estabelecimento_id, latitude, longitude) of every address."""
+        query = select(
+            Endereco.id, Endereco.estabelecimento_id, Endereco.latitude, Endereco.longitude
+        ).where(Endereco.deleted.isnot(True))
+        result = await self.session.execute(query)
+        return [tuple(row) for row in result.all()]
+
+    async def sync_spatial_index(self):
+        """Reloads the nearest-establishment index when the enderecos changed elsewhere (e.g. an import)."""
+        version = response_cache.versions(("enderecos",))["enderecos"]
+        if estabelecimentos_index.version == version:
+            return
+        async with estabelecimentos_index.loading:
+            if estabelecimentos_index.version != version:
+                estabelecimentos_index.load(await self.get_coordinates(), version)
     
+    async def get_clusters(
+        self, min_lat: float, min_lon: float, max_lat: float, max_lon: float, cell: float
+    ) -> list[dict]:
+        """
+        The addresses inside the box grouped into `cell`-degree squares: count,
+        mean position and, for a single point, its id. A box with min_lon >
+        max_lon crosses the antimeridian.
+        """
+        if min_lon <= max_lon:
+            longitude = Endereco.longitude.between(min_lon, max_lon)
+        else:
+            longitude = or_(Endereco.longitude >= min_lon, Endereco.longitude <= max_lon)
+        row = func.floor(Endereco.latitude / cell).label("row")
+        column = func.floor(Endereco.longitude / cell).label("column")
+        query = (
+            select(
+                func.count().label("quantidade"),
+                func.avg(Endereco.latitude).label("latitude"),
+                func.avg(Endereco.longitude).label("longitude"),
+                func.min(Endereco.id).label("endereco_id"),
+            )
+            .where(
+                Endereco.latitude.between(min_lat, max_lat),
+                longitude,
+                Endereco.deleted.isnot(True),
+            )
+            .group_by(row, column)
+        )
+        result = await self.session.execute(query)
+        return [
+            {
+                "latitude": latitude,
+                "longitude": longitude,
+                "quantidade": quantidade,
+                "endereco_id": endereco_id if quantidade == 1 else None,
+            }
+            for quantidade, latitude, longitude, endereco_id in result.all()
+        ]
+
     async def get_by_estabelecimento_id(self, estabelecimento_id: int) -> Endereco | None:
         query = select(self.model).where(self.model.estabelecimento_id == estabelecimento_id)
         result = await self.session.execute(query)
         return result.scalar_one_or_none()
 
-    async def get_by_filters(self, filters: dict) -> List[Endereco]:
-        query = select(Endereco)
-        for key, value in filters.items():
-            query = query.where(getattr(Endereco, key) == value)
-        result = await self.session.execute(query)
-        return result.scalars().all()
-    
     async def get_total_count(self) -> int:
-        query = select(func.count()).select_from(Endereco)
+        query = select(func.count()).select_from(Endereco).where(Endereco.deleted.isnot(True))
         result = await self.session.execute(query)
         return result.scalar()
     
     async def get_paginated(self, limit: int, offset: int) -> List[Endereco]:
-        query = select(Endereco).limit(limit).offset((offset))
+        query = select(Endereco).options(NOT_DELETED).limit(limit).offset((offset))
         result = await self.session.execute(query)
         return result.scalars().all()
     
     async def get_all(self) -> list[Endereco]:
         print("\n Entrou no get_all de endereco \n")
-        query = select(self.model)
+        query = select(self.model).options(*self.list_options())
         result = await self.session.execute(query)
         print("\n Resultado do get_all de endereco \n")
         return result.scalars().all()
@@ -1,23 +1,35 @@
 from sqlalchemy import select, update, func
 from typing import List
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
 from models.estabelecimento import Estabelecimento
-from repositories.base import BaseRepository
+from repositories.base import NOT_DELETED, BaseRepository
 from models.equipe import Equipe
 
 class EquipeRepository(BaseRepository[Equipe]):
+    sort_keys = ("id", "codigo_equipe")
+    filter_columns = {
+        "id": ("eq", "in", "range"),
+        "codigo_equipe": ("eq", "in", "prefix"),
+        "nome_equipe": ("eq", "prefix"),
+        "tipo_equipe": ("eq", "in"),
+        "estabelecimento_id": ("eq", "in"),
+    }
+    included_relationships = ("profissionais",)
+
     def __init__(self, session):
         super().__init__(session, Equipe)
     
-    async def create(self, data: dict) -> Equipe:
+    async def create(self, data: dict, estabelecimento_id: int | None = None) -> Equipe:
         try:
-            query = select(Estabelecimento.id).where(
-                    Estabelecimento.codigo_unidade == str(data['codigo_unidade'])
-                )
-            result = await self.session.execute(query)
-            estabelecimento_id = result.scalar_one_or_none()
+            if estabelecimento_id is None:
+                query = select(Estabelecimento.id).where(
+                        Estabelecimento.codigo_unidade == str(data['codigo_unidade'])
+                    )
+                result = await self.session.execute(query)
+                estabelecimento_id = result.scalar_one_or_none()
             if not estabelecimento_id:
                 raise HTTPException(
                     status_code=400,
@@ -28,19 +40,21 @@ class EquipeRepository(BaseRepository[Equipe]):
             self.session.add(entity)
             await self.session.flush()
             await self.session.refresh(entity)
+            # a new equipe has no profissionais yet; no query to find that out
+            set_committed_value(entity, "profissionais", [])
             return entity
         except IntegrityError as e:
-            await self.session.rollback()
+            await self._rollback()
             raise HTTPException(status_code=400, detail=e)
     
     async def get_all(self) -> list[Equipe]:
-        query = select(self.model)
+        query = select(self.model).options(*self.list_options())
         result = await self.session.execute(query)
         return list(result.scalars().all())
 
     async def update(self, id: int, data: dict) -> Equipe | None:
         try:
-            return await super().update(id, data)
+            equipe = await super().update(id, data)
         except IntegrityError as e:
             if 'equipes_profissional_id_fkey' in str(e):
                 raise HTTPException(
@@ -48,9 +62,11 @@ class EquipeRepository(BaseRepository[Equipe]):
                     detail="Profissional não encontrado ou já possui uma equipe cadastrada"
                 )
             raise
+        # the UPDATE ... RETURNING row comes without its profissionais
+        return await self.get_by_id(id) if equipe else None
     
     async def get_with_profissionais(self, id: int) -> Equipe:
-        query = select(Equipe).options(selectinload(Equipe.profissionais)).where(Equipe.id == id)
+        query = select(Equipe).options(selectinload(Equipe.profissionais), NOT_DELETED).where(Equipe.id == id)
         result = await self.session.execute(query)
         print(result)
         return result.scalar_one_or_none()
@@ -65,19 +81,21 @@ class EquipeRepository(BaseRepository[Equipe]):
         await self.session.execute(query)
         await self.session.flush()
 
-    async def get_by_filters(self, filters: dict) -> List[Equipe]:
-        query = select(Equipe)
-        for key, value in filters.items():
-            query = query.where(getattr(Equipe, key) == value)
+    async def get_estabelecimento_ids_by_tipo(self, tipo_equipe: str) -> list[int]:
+        query = (
+            select(Equipe.estabelecimento_id)
+            .where(Equipe.tipo_equipe == tipo_equipe, Equipe.deleted.isnot(True))
+            .distinct()
+        )
         result = await self.session.execute(query)
-        return result.scalars().all()
+        return list(result.scalars())
 
     async def get_total_count(self) -> int:
-        query = select(func.count()).select_from(Equipe)
+        query = select(func.count()).select_from(Equipe).where(Equipe.deleted.isnot(True))
         result = await self.session.execute(query)
         return result.scalar()
 
     async def get_paginated(self, limit: int, offset: int) -> List[Equipe]:
-        query = select(Equipe).limit(limit).offset(offset)
+        query = select(Equipe).options(NOT_DELETED).limit(limit).offset(offset)
         result = await self.session.execute(query)
         return result.scalars().all()
\ No newline at end of file
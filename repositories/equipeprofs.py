@@ -3,32 +3,40 @@ from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
 from models.equipe import Equipe
 from models.profissional import Profissional
-from repositories.base import BaseRepository
+from repositories.base import NOT_DELETED, BaseRepository
 from models.equipeprof import EquipeProf
 from typing import List
 
 class EquipeProfRepository(BaseRepository[EquipeProf]):
+    filter_columns = {
+        "id": ("eq", "in", "range"),
+        "equipe_id": ("eq", "in"),
+        "profissional_id": ("eq", "in"),
+    }
+
     def __init__(self, session):
         super().__init__(session, EquipeProf)
     
-    async def create(self, data: dict) -> EquipeProf:
+    async def create(self, data: dict, equipe_id: int | None = None, profissional_id: int | None = None) -> EquipeProf:
         try:
-            query = select(Profissional.id).where(
-                    Profissional.codigo_profissional_sus == data['codigo_profissional_sus']
-                )
-            result = await self.session.execute(query)
-            profissional_id = result.scalar_one_or_none()
+            if profissional_id is None:
+                query = select(Profissional.id).where(
+                        Profissional.codigo_profissional_sus == data['codigo_profissional_sus']
+                    )
+                result = await self.session.execute(query)
+                profissional_id = result.scalar_one_or_none()
             if not profissional_id:
                 raise HTTPException(
                     status_code=400,
                     detail="Profissional não encontrado"
                 )
             data['profissional_id'] = profissional_id
-            query = select(Equipe.id).where(
-                    Equipe.codigo_equipe == data['codigo_equipe']
-                )
-            result = await self.session.execute(query)
-            equipe_id = result.scalar_one_or_none()
+            if equipe_id is None:
+                query = select(Equipe.id).where(
+                        Equipe.codigo_equipe == data['codigo_equipe']
+                    )
+                result = await self.session.execute(query)
+                equipe_id = result.scalar_one_or_none()
             if not equipe_id:
                 raise HTTPException(
                     status_code=400,
@@ -41,14 +49,14 @@ class EquipeProfRepository(BaseRepository[EquipeProf]):
             entity = self.model(**data)
             self.session.add(entity)
             await self.session.flush()
-            await self.session.refresh(self.model)
+            await self.session.refresh(entity)
             return entity
         except IntegrityError as e:
-            await self.session.rollback()
+            await self._rollback()
             raise HTTPException(status_code=400, detail=e)
     
     async def get_all(self) -> list[EquipeProf]:
-        query = select(self.model)
+        query = select(self.model).options(*self.list_options())
         result = await self.session.execute(query)
         return list(result.scalars().all())
 
@@ -72,20 +80,13 @@ class EquipeProfRepository(BaseRepository[EquipeProf]):
         query = self.model.__table__.delete().where(self.model.id == id)
         await self.session.execute(query)
         await self
-    
-    async def get_by_filters(self, filters: dict) -> List[EquipeProf]:
-        query = select(EquipeProf)
-        for key, value in filters.items():
-            query = query.where(getattr(EquipeProf, key) == value)
-        result = await self.session.execute(query)
-        return result.scalars().all
 
     async def get_total_count(self) -> int:
-        query = select(func.count()).select_from(EquipeProf)
+        query = select(func.count()).select_from(EquipeProf).where(EquipeProf.deleted.isnot(True))
         result = await self.session.execute(query)
         return result.scalar()
 
     async def get_paginated(self, limit: int, offset: int) -> List[EquipeProf]:
-        query = select(EquipeProf).limit(limit).offset(offset)
+        query = select(EquipeProf).options(NOT_DELETED).limit(limit).offset(offset)
         result = await self.session.execute(query)
         return result.scalars().all()
\ No newline at end of file
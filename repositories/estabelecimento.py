@@ -3,23 +3,36 @@ from typing import List
 from sqlalchemy.orm import selectinload
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
-from repositories.base import BaseRepository
+from core.autocomplete import estabelecimentos_autocomplete
+from repositories.base import NOT_DELETED, BaseRepository
 from models.estabelecimento import Estabelecimento
 from models.mantenedora import Mantenedora
 
 class EstabelecimentoRepository(BaseRepository[Estabelecimento]):
+    sort_keys = ("id", "codigo_unidade", "codigo_cnes")
+    filter_columns = {
+        "id": ("eq", "in", "range"),
+        "codigo_unidade": ("eq", "in", "prefix"),
+        "codigo_cnes": ("eq", "in", "prefix"),
+        "nome_fantasia_estabelecimento": ("eq", "prefix"),
+        "mantenedora_id": ("eq", "in"),
+    }
+    search_columns = ("nome_fantasia_estabelecimento", "nome_razao_social_estabelecimento")
+    included_relationships = ("endereco",)
+
     def __init__(self, session):
         super().__init__(session, Estabelecimento)
 
-    async def create(self, data: dict) -> Estabelecimento:
+    async def create(self, data: dict, mantenedora_id: int | None = None) -> Estabelecimento:
         try:
-            # Get mantenedora_id from cnpj
+            # Get mantenedora_id from cnpj, unless the caller already resolved it
             if 'cnpj_mantenedora' in data:
-                query = select(Mantenedora.id).where(
-                    Mantenedora.cnpj_mantenedora == data['cnpj_mantenedora']
-                )
-                result = await self.session.execute(query)
-                mantenedora_id = result.scalar_one_or_none()
+                if mantenedora_id is None:
+                    query = select(Mantenedora.id).where(
+                        Mantenedora.cnpj_mantenedora == data['cnpj_mantenedora']
+                    )
+                    result = await self.session.execute(query)
+                    mantenedora_id = result.scalar_one_or_none()
                 
                 if not mantenedora_id:
                     raise HTTPException(status_code=400, detail="Mantenedora não encontrada")
@@ -44,6 +57,8 @@ class EstabelecimentoRepository(BaseRepository[Estabelecimento]):
             await self.session.flush()
             await self.session.refresh(entity)
             
+            self._stage_autocomplete(entity)
+
             # Get fresh copy with relationships
             query = select(self.model).options(
                 selectinload(self.model.endereco)
@@ -52,7 +67,7 @@ class EstabelecimentoRepository(BaseRepository[Estabelecimento]):
             return result.scalar_one()
             
         except IntegrityError as e:
-            await self.session.rollback()
+            await self._rollback()
             print(f"IntegrityError: {str(e)}")  # Add debug print
             if 'estabelecimentos_codigo_unidade_key' in str(e):
                 raise HTTPException(status_code=400, detail="Código da unidade já existe")
@@ -74,6 +89,7 @@ class EstabelecimentoRepository(BaseRepository[Estabelecimento]):
             # Get fresh copy with relationships
             entity = result.scalar_one_or_none()
             if entity:
+                self._stage_autocomplete(entity)
                 query = select(self.model).options(
                     selectinload(self.model.endereco)
                 ).where(self.model.id == id)
@@ -82,47 +98,62 @@ class EstabelecimentoRepository(BaseRepository[Estabelecimento]):
             return None
             
         except IntegrityError as e:
-            await self.session.rollback()
+            await self._rollback()
             raise HTTPException(status_code=400, detail="Erro ao atualizar estabelecimento")
 
+    async def delete(self, id: int) -> bool:
+        estabelecimentos_autocomplete.stage(self.session, "remove", id)
+        return await super().delete(id)
+
+    def _stage_autocomplete(self, estabelecimento: Estabelecimento):
+        estabelecimentos_autocomplete.stage(
+            self.session, "upsert",
+            estabelecimento.id, estabelecimento.nome_fantasia_estabelecimento, estabelecimento.codigo_cnes
+        )
+
+    async def get_autocomplete_rows(self) -> list[tuple]:
+        """(id, nome_fantasia_estabelecimento, codigo_cnes) of every establishment."""
+        query = select(
+            Estabelecimento.id, Estabelecimento.nome_fantasia_estabelecimento, Estabelecimento.codigo_cnes
+        ).where(Estabelecimento.deleted.isnot(True))
+        result = await self.session.execute(query)
+        return [tuple(row) for row in result.all()]
+
+    async def sync_autocomplete_index(self):
+        await estabelecimentos_autocomplete.sync(self.get_autocomplete_rows)
+
     async def get_all_with_endereco(self) -> list[Estabelecimento]:
-        query = select(self.model).options(selectinload(self.model.endereco))
+        query = select(self.model).options(*self.list_options())
         result = await self.session.execute(query)
         print(result.scalars().unique())
         return list(result.scalars().unique())
     
     async def get_by_id_with_endereco(self, id: int) -> Estabelecimento | None:
-        query = select(self.model).options(selectinload(self.model.endereco)).where(self.model.id == id)
+        query = select(self.model).options(*self.list_options()).where(self.model.id == id)
         result = await self.session.execute(query)
         return result.scalar_one_or_none()
     
+    async def get_by_ids(self, ids: list[int]) -> dict[int, Estabelecimento]:
+        query = select(Estabelecimento).options(*self.list_options()).where(Estabelecimento.id.in_(ids))
+        result = await self.session.execute(query)
+        return {estabelecimento.id: estabelecimento for estabelecimento in result.scalars()}
+
     async def get_by_codigo_unidade(self, codigo: str) -> Estabelecimento | None:
-        query = select(self.model).where(self.model.codigo_unidade == codigo)
+        query = select(self.model).options(NOT_DELETED).where(self.model.codigo_unidade == codigo)
         result = await self.session.execute(query)
         return result.scalar_one_or_none()
     
     async def get_by_codigo_cnes(self, codigo: str) -> Estabelecimento | None:
-        query = select(self.model).where(self.model.codigo_cnes == codigo)
+        query = select(self.model).options(NOT_DELETED).where(self.model.codigo_cnes == codigo)
         result = await self.session.execute(query)
         return result.scalar_one_or_none()
 
-    async def get_by_filters(self, filters: dict) -> list[Estabelecimento]:
-        query = select(Estabelecimento)
-        print(filters)
-        for key, value in filters.items():
-            print(key, value)
-            query = query.where(getattr(Estabelecimento, key) == value)
-        print("bejhcbjhcb")
-        result = await self.session.execute(query)
-        print("\n", query, "\n")
-        return result.scalars().all()
-
     async def get_total_count(self) -> int:
-        query = select(func.count()).select_from(Estabelecimento)
+        query = select(func.count()).select_from(Estabelecimento).where(Estabelecimento.deleted.isnot(True))
         result = await self.session.execute(query)
         return result.scalar()
     
     async def get_paginated(self, limit: int, offset: int) -> List[Estabelecimento]:
-        query = select(Estabelecimento).limit(limit).offset(offset)
+        query = select(Estabelecimento).options(NOT_DELETED).limit(limit).offset(offset)
         result = await self.session.execute(query)
         return result.scalars().all()
\ No newline at end of file
@@ -2,11 +2,19 @@ from sqlalchemy import select, update, func
 from sqlalchemy.orm import selectinload
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
-from repositories.base import BaseRepository
+from repositories.base import NOT_DELETED, BaseRepository
 from models.mantenedora import Mantenedora
 from typing import List
 
 class MantenedoraRepository(BaseRepository[Mantenedora]):
+    sort_keys = ("id", "cnpj_mantenedora")
+    filter_columns = {
+        "id": ("eq", "in", "range"),
+        "cnpj_mantenedora": ("eq", "in", "prefix"),
+        "nome_razao_social_mantenedora": ("eq", "prefix"),
+    }
+    search_columns = ("nome_razao_social_mantenedora",)
+
     def __init__(self, session):
         super().__init__(session, Mantenedora)
 
@@ -18,18 +26,18 @@ class MantenedoraRepository(BaseRepository[Mantenedora]):
             await self.session.refresh(entity)
             return entity
         except IntegrityError as e:
-            await self.session.rollback()
+            await self._rollback()
             if 'mantenedoras_cnpj_mantenedora_key' in str(e):
                 raise HTTPException(status_code=400, detail="CNPJ já cadastrado")
             raise HTTPException(status_code=400, detail="Erro ao criar mantenedora")
 
     async def get_all(self) -> list[Mantenedora]:
-        query = select(self.model).options(selectinload(self.model.estabelecimentos))
+        query = select(self.model).options(*self.list_options())
         result = await self.session.execute(query)
         return list(result.scalars().all())
     
     async def get_by_id(self, id: int) -> Mantenedora:
-        query = select(self.model).where(self.model.id == id)
+        query = select(self.model).options(*self.list_options()).where(self.model.id == id)
         result = await self.session.execute(query)
         return result.scalar_one_or_none()
     
@@ -39,7 +47,7 @@ class MantenedoraRepository(BaseRepository[Mantenedora]):
             result = await self.session.execute(query)
             return result.scalar_one_or_none()
         except IntegrityError as e:
-            await self.session.rollback()
+            await self._rollback()
             if 'mantenedoras_cnpj_mantenedora_key' in str(e):
                 raise HTTPException(status_code=400, detail="CNPJ já cadastrado")
             raise HTTPException(status_code=400, detail="Erro ao atualizar mantenedora")
@@ -49,19 +57,12 @@ class MantenedoraRepository(BaseRepository[Mantenedora]):
         await self.session.execute(query)
         await self.session.flush()
 
-    async def get_by_filters(self, filters: dict) -> List[Mantenedora]:
-        query = select(Mantenedora)
-        for key, value in filters.items():
-            query = query.where(getattr(Mantenedora, key) == value)
-        result = await self.session.execute(query)
-        return result.scalars().all()
-    
     async def get_total_count(self) -> int:
-        query = select(func.count()).select_from(Mantenedora)
+        query = select(func.count()).select_from(Mantenedora).where(Mantenedora.deleted.isnot(True))
         result = await self.session.execute(query)
         return result.scalar()
 
     async def get_paginated(self, limit: int, offset: int) -> List[Mantenedora]:
-        query = select(Mantenedora).limit(limit).offset(offset)
+        query = select(Mantenedora).options(NOT_DELETED).limit(limit).offset(offset)
         result = await self.session.execute(query)
         return result.scalars().all()
\ No newline at end of file
@@ -1,11 +1,21 @@
 from sqlalchemy import select, update, func
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
-from repositories.base import BaseRepository
+from core.autocomplete import profissionais_autocomplete
+from repositories.base import NOT_DELETED, BaseRepository
 from models.profissional import Profissional
 from typing import List
 
 class ProfissionalRepository(BaseRepository[Profissional]):
+    sort_keys = ("id", "codigo_profissional_sus")
+    filter_columns = {
+        "id": ("eq", "in", "range"),
+        "codigo_profissional_sus": ("eq", "in", "prefix"),
+        "nome_profissional": ("eq", "prefix"),
+        "codigo_cns": ("eq", "in"),
+    }
+    search_columns = ("nome_profissional",)
+
     def __init__(self, session):
         super().__init__(session, Profissional)
 
@@ -15,20 +25,21 @@ class ProfissionalRepository(BaseRepository[Profissional]):
             self.session.add(entity)
             await self.session.flush()
             await self.session.refresh(entity)
+            self._stage_autocomplete(entity)
             return entity
         except IntegrityError as e:
-            await self.session.rollback()
+            await self._rollback()
             if 'profissionais_codigo_profissional_sus_key' in str(e):
                 raise HTTPException(status_code=400, detail="Código do profissional SUS já cadastrado")
             raise HTTPException(status_code=400, detail="Erro ao criar profissional")
 
     async def get_all(self) -> list[Profissional]:
-        query = select(self.model)
+        query = select(self.model).options(*self.list_options())
         result = await self.session.execute(query)
         return list(result.scalars().all())
     
     async def get_by_id(self, id: int) -> Profissional:
-        query = select(self.model).where(self.model.id == id)
+        query = select(self.model).options(*self.list_options()).where(self.model.id == id)
         result = await self.session.execute(query)
         return result.scalar_one_or_none()
     
@@ -36,9 +47,12 @@ class ProfissionalRepository(BaseRepository[Profissional]):
         try:
             query = update(self.model).where(self.model.id == id).values(**data).returning(self.model)
             result = await self.session.execute(query)
-            return result.scalar_one_or_none()
+            profissional = result.scalar_one_or_none()
+            if profissional:
+                self._stage_autocomplete(profissional)
+            return profissional
         except IntegrityError as e:
-            await self.session.rollback()
+            await self._rollback()
             if 'profissionais_codigo_profissional_sus_key' in str(e):
                 raise HTTPException(status_code=400, detail="Código do profissional SUS já cadastrado")
             raise HTTPException(status_code=400, detail="Erro ao atualizar profissional")
@@ -47,20 +61,31 @@ class ProfissionalRepository(BaseRepository[Profissional]):
         query = self.model.__table__.delete().where(self.model.id == id)
         await self.session.execute(query)
         await self.session.flush()
+        profissionais_autocomplete.stage(self.session, "remove", id)
+
+    def _stage_autocomplete(self, profissional: Profissional):
+        profissionais_autocomplete.stage(
+            self.session, "upsert",
+            profissional.id, profissional.nome_profissional, profissional.codigo_profissional_sus
+        )
 
-    async def get_by_filters(self, filters: dict) -> List[Profissional]:
-        query = select(Profissional)
-        for key, value in filters.items():
-            query = query.where(getattr(Profissional, key) == value)
+    async def get_autocomplete_rows(self) -> list[tuple]:
+        """(id, nome_profissional, codigo_profissional_sus) of every professional."""
+        query = select(
+            Profissional.id, Profissional.nome_profissional, Profissional.codigo_profissional_sus
+        ).where(Profissional.deleted.isnot(True))
         result = await self.session.execute(query)
-        return result.scalars().all()
-    
+        return [tuple(row) for row in result.all()]
+
+    async def sync_autocomplete_index(self):
+        await profissionais_autocomplete.sync(self.get_autocomplete_rows)
+
     async def get_total_count(self) -> int:
-        query = select(func.count()).select_from(Profissional)
+        query = select(func.count()).select_from(Profissional).where(Profissional.deleted.isnot(True))
         result = await self.session.execute(query)
         return result.scalar()
 
     async def get_paginated(self, limit: int, offset: int) -> List[Profissional]:
-        query = select(Profissional).limit(limit).offset(offset)
+        query = select(Profissional).options(NOT_DELETED).limit(limit).offset(offset)
         result = await self.session.execute(query)
         return result.scalars().all()
\ No newline at end of file
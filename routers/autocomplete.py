@@ -0,0 +1,38 @@
+from typing import List
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.autocomplete import estabelecimentos_autocomplete, profissionais_autocomplete
+from core.database import get_db
+from core.serialization import json_response
+from repositories.estabelecimento import EstabelecimentoRepository
+from repositories.profissional import ProfissionalRepository
+from schemas.autocomplete import Sugestao
+
+# Answered from the in-memory indexes: the database is only read when a
+# write from outside the API (e.g. an import) changed the table.
+
+router = APIRouter(
+    prefix="/autocomplete",
+    tags=["autocomplete"]
+)
+
+def _sugestoes(found: list[tuple]) -> Response:
+    return json_response([{"id": id, "nome": nome, "codigo": codigo} for id, nome, codigo in found])
+
+@router.get("/estabelecimentos", response_model=List[Sugestao])
+async def autocompletar_estabelecimentos(
+    prefix: str = Query(..., min_length=1, max_length=100, description="Início do nome fantasia ou do código CNES"),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db)
+) -> Response:
+    await EstabelecimentoRepository(db).sync_autocomplete_index()
+    return _sugestoes(estabelecimentos_autocomplete.complete(prefix, limit))
+
+@router.get("/profissionais", response_model=List[Sugestao])
+async def autocompletar_profissionais(
+    prefix: str = Query(..., min_length=1, max_length=100, description="Início do nome ou do código SUS do profissional"),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db)
+) -> Response:
+    await ProfissionalRepository(db).sync_autocomplete_index()
+    return _sugestoes(profissionais_autocomplete.complete(prefix, limit))
@@ -0,0 +1,47 @@
+from typing import List, Literal
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.config import settings
+from core.database import get_db
+from core.serialization import dump, json_response
+from repositories.estabelecimento import EstabelecimentoRepository
+from repositories.mantenedora import MantenedoraRepository
+from repositories.profissional import ProfissionalRepository
+from schemas.busca import ResultadoBusca
+from schemas.estabelecimento import Estabelecimento
+from schemas.mantenedora import Mantenedora
+from schemas.profissional import Profissional
+import logging
+
+router = APIRouter(
+    prefix="/busca",
+    tags=["busca"]
+)
+
+# result key -> (repository, schema of the rows)
+ALVOS = {
+    "estabelecimentos": (EstabelecimentoRepository, Estabelecimento),
+    "mantenedoras": (MantenedoraRepository, Mantenedora),
+    "profissionais": (ProfissionalRepository, Profissional),
+}
+
+@router.get("/", response_model=ResultadoBusca)
+async def buscar(
+    q: str = Query(..., min_length=2, max_length=100, description="Nome ou parte do nome, sem distinção de acentos e maiúsculas"),
+    tipo: List[Literal["estabelecimentos", "mantenedoras", "profissionais"]] = Query(None, description="Restringe a busca (padrão: todos)"),
+    limit: int = Query(10, ge=1, le=50, description="Resultados por tipo"),
+    db: AsyncSession = Depends(get_db)
+) -> Response:
+    q = q.strip()
+    res = {"q": q}
+    total = 0
+    for alvo in tipo or ALVOS:
+        repository_class, schema = ALVOS[alvo]
+        encontrados = await repository_class(db).search(q, limit, settings.SEARCH_MIN_SIMILARITY)
+        res[alvo] = [
+            {**dump(schema, row), "relevancia": round(relevancia, 3)}
+            for row, relevancia in encontrados
+        ]
+        total += len(encontrados)
+    logging.info(f"Busca '{q}': {total} resultados")
+    return json_response(res)
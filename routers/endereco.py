@@ -1,10 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Literal
+from core.clusters import MAX_ZOOM, cluster_cell, grid_zoom, pack_clusters
 from core.database import get_db
+from core.expansion import EXPAND_DESCRIPTION, parse_expand, response_schema
+from core.export import ExportFormat, export_response
+from core.filters import DEFAULT_LIMIT, MAX_LIMIT, describe_filters, parse_filters, parse_order_by
+from core.pagination import paginate
+from core.serialization import FIELDS_DESCRIPTION, dump, dump_many, json_response, parse_fields
 from repositories.endereco import EnderecoRepository
 from repositories.estabelecimento import EstabelecimentoRepository
-from schemas.endereco import Endereco, EnderecoCreate, EnderecoUpdate
+from schemas.pagination import FilterResult, Page
+from schemas.endereco import Endereco, EnderecoCreate, EnderecoUpdate, MapaEnderecos
 import logging
 
 router = APIRouter(
@@ -14,62 +22,101 @@ router = APIRouter(
 
 @router.get("/", response_model=List[Endereco])
 async def listar_enderecos(
+    fields: str = Query(None, description=FIELDS_DESCRIPTION),
+    expand: str = Query(None, description=EXPAND_DESCRIPTION),
     db: AsyncSession = Depends(get_db)
-) -> List[Endereco]:
-    repository = EnderecoRepository(db)
+) -> Response:
+    selected = parse_fields(Endereco, fields)
+    expanded = parse_expand(Endereco, expand)
+    repository = EnderecoRepository(db).select_fields(selected).expand(expanded)
     logging.info("Listando enderecos")
-    return await repository.get_all()
+    return json_response(dump_many(response_schema(Endereco, selected, expanded), await repository.get_all()))
 
-@router.get("/filtro")
+@router.get("/filtro", response_model=FilterResult[Endereco], description=describe_filters(EnderecoRepository))
 async def filtrar_enderecos(
-    estabelecimento_id: int = Query(None),
-    cep_estabelecimento: str = Query(None),
-    bairro: str = Query(None),
+    request: Request,
+    order_by: str = Query(None, description="Colunas de ordenação separadas por vírgula, '-' para decrescente"),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    fields: str = Query(None, description=FIELDS_DESCRIPTION),
+    expand: str = Query(None, description=EXPAND_DESCRIPTION),
     db: AsyncSession = Depends(get_db)
-) -> dict:
-    repository = EnderecoRepository(db)
-    filters = {}
-    if estabelecimento_id:
-        filters["estabelecimento_id"] = estabelecimento_id
-    if cep_estabelecimento:
-        filters["cep_estabelecimento"] = cep_estabelecimento
-    if bairro:
-        filters["bairro"] = bairro
-    res = await repository.get_by_filters(filters)
-    return {"res":[[str(key)+": "+str(value) for key, value in endereco.__dict__.items() if (not key.startswith("_"))] for endereco in res]}
+) -> Response:
+    selected = parse_fields(Endereco, fields)
+    expanded = parse_expand(Endereco, expand)
+    repository = EnderecoRepository(db).select_fields(selected).expand(expanded)
+    filters = parse_filters(repository, request.query_params.multi_items())
+    res = await repository.get_by_filters(filters, parse_order_by(repository, order_by), limit)
+    return json_response({"res": dump_many(response_schema(Endereco, selected, expanded), res)})
 
-@router.get("/paginated")
+@router.get("/paginated", response_model=Page[Endereco])
 async def listar_enderecos_paginados(
     page: int = Query(0, ge=0),
     limit: int = Query(10, ge=1),
+    cursor: str = Query(None, description="next_cursor da página anterior"),
+    sort: str = Query("id"),
+    include_total: bool = Query(None, description="conta o total de registros (padrão: só sem cursor)"),
+    fields: str = Query(None, description=FIELDS_DESCRIPTION),
+    expand: str = Query(None, description=EXPAND_DESCRIPTION),
+    db: AsyncSession = Depends(get_db)
+) -> Response:
+    selected = parse_fields(Endereco, fields)
+    expanded = parse_expand(Endereco, expand)
+    repository = EnderecoRepository(db).select_fields(selected).expand(expanded)
+    enderecos, pagination = await paginate(repository, page, limit, cursor, sort, include_total)
+    return json_response({
+        "data": dump_many(response_schema(Endereco, selected, expanded), enderecos),
+        "pagination": pagination
+    })
+
+@router.get("/export")
+async def exportar_enderecos(
+    format: ExportFormat = Query("ndjson"),
+    gzip: bool = Query(False),
+) -> StreamingResponse:
+    logging.info(f"Exportando enderecos ({format})")
+    return export_response(EnderecoRepository, Endereco, "enderecos", format, gzip)
+
+@router.get("/bbox", response_model=MapaEnderecos)
+async def enderecos_no_mapa(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    zoom: int = Query(..., ge=0, le=MAX_ZOOM),
+    format: Literal["json", "bin"] = Query("json", description="bin: registros de 16 bytes (lat, lon, quantidade, endereco_id)"),
     db: AsyncSession = Depends(get_db)
-) -> dict:
+) -> Response:
+    if min_lat > max_lat:
+        raise HTTPException(status_code=400, detail="min_lat deve ser menor ou igual a max_lat")
     repository = EnderecoRepository(db)
-    total = await repository.get_total_count()
-    enderecos = await repository.get_paginated(limit=limit, offset=page * limit)
-    total_pages = (total // limit) + 1
-    enderecos = [[str(key)+": "+str(value) for key, value in endereco.__dict__.items()] for endereco in enderecos]
-    return {
-        "data": enderecos,
-        "pagination": {
-            "total_pages": total_pages,
-            "total": total,
-            "offset": page,
-            "limit": limit
-        }
-    }
+    zoom = grid_zoom(zoom, min_lat, min_lon, max_lat, max_lon)
+    cell = cluster_cell(zoom)
+    clusters = await repository.get_clusters(min_lat, min_lon, max_lat, max_lon, cell)
+    logging.info(f"Mapa de enderecos: zoom {zoom}, {len(clusters)} agrupamentos")
+    if format == "bin":
+        return Response(pack_clusters(clusters), media_type="application/octet-stream")
+    return json_response({
+        "zoom": zoom,
+        "celula_graus": cell,
+        "total": sum(cluster["quantidade"] for cluster in clusters),
+        "data": clusters
+    })
 
 @router.get("/{id}", response_model=Endereco)
 async def obter_endereco(
     id: int,
+    fields: str = Query(None, description=FIELDS_DESCRIPTION),
+    expand: str = Query(None, description=EXPAND_DESCRIPTION),
     db: AsyncSession = Depends(get_db)
-) -> Endereco:
-    repository = EnderecoRepository(db)
+) -> Response:
+    selected = parse_fields(Endereco, fields)
+    expanded = parse_expand(Endereco, expand)
+    repository = EnderecoRepository(db).select_fields(selected).expand(expanded)
     endereco = await repository.get_by_id(id)
     if not endereco:
         logging.error(f"Endereço com ID {id} não encontrado")
         raise HTTPException(status_code=404, detail="Endereço não encontrado")
-    return endereco
+    return json_response(dump(response_schema(Endereco, selected, expanded), endereco))
 
 @router.post("/", response_model=Endereco, status_code=201)
 async def criar_endereco(
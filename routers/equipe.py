@@ -1,9 +1,16 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from core.database import get_db
+from core.expansion import EXPAND_DESCRIPTION, parse_expand, response_schema
+from core.export import ExportFormat, export_response
+from core.filters import DEFAULT_LIMIT, MAX_LIMIT, describe_filters, parse_filters, parse_order_by
+from core.pagination import paginate
+from core.serialization import FIELDS_DESCRIPTION, dump, dump_many, json_response, parse_fields
 import logging
 
+from schemas.pagination import FilterResult, Page
 from schemas.equipe import Equipe
 from repositories.equipe import EquipeRepository
 
@@ -14,50 +21,59 @@ router = APIRouter(
 
 @router.get("/", response_model=List[Equipe])
 async def listar_equipes(
+    fields: str = Query(None, description=FIELDS_DESCRIPTION),
+    expand: str = Query(None, description=EXPAND_DESCRIPTION),
     db: AsyncSession = Depends(get_db)
-) -> List[Equipe]:
-    repository = EquipeRepository(db)
+) -> Response:
+    selected = parse_fields(Equipe, fields)
+    expanded = parse_expand(Equipe, expand)
+    repository = EquipeRepository(db).select_fields(selected).expand(expanded)
     logging.info("Listando equipes")
-    return await repository.get_all()
+    return json_response(dump_many(response_schema(Equipe, selected, expanded), await repository.get_all()))
 
-@router.get("/filtro")
+@router.get("/filtro", response_model=FilterResult[Equipe], description=describe_filters(EquipeRepository))
 async def filtrar_equipes(
-    codigo_equipe: str = Query(None),
-    nome_equipe: str = Query(None),
-    tipo_equipe: str = Query(None),
+    request: Request,
+    order_by: str = Query(None, description="Colunas de ordenação separadas por vírgula, '-' para decrescente"),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    fields: str = Query(None, description=FIELDS_DESCRIPTION),
+    expand: str = Query(None, description=EXPAND_DESCRIPTION),
     db: AsyncSession = Depends(get_db)
-) -> dict:
-    repository = EquipeRepository(db)
-    filters = {}
-    if codigo_equipe:
-        filters["codigo_equipe"] = codigo_equipe
-    if nome_equipe:
-        filters["nome_equipe"] = nome_equipe
-    if tipo_equipe:
-        filters["tipo_equipe"] = tipo_equipe
-    res = await repository.get_by_filters(filters)
-    return {"res":[[str(key)+": "+str(value) for key, value in equipe.__dict__.items() if (not key.startswith("_"))] for equipe in res]}
+) -> Response:
+    selected = parse_fields(Equipe, fields)
+    expanded = parse_expand(Equipe, expand)
+    repository = EquipeRepository(db).select_fields(selected).expand(expanded)
+    filters = parse_filters(repository, request.query_params.multi_items())
+    res = await repository.get_by_filters(filters, parse_order_by(repository, order_by), limit)
+    return json_response({"res": dump_many(response_schema(Equipe, selected, expanded), res)})
 
-@router.get("/paginated")
+@router.get("/paginated", response_model=Page[Equipe])
 async def listar_equipes_paginadas(
     page: int = Query(0, ge=0),
     limit: int = Query(10, ge=1),
+    cursor: str = Query(None, description="next_cursor da página anterior"),
+    sort: str = Query("id"),
+    include_total: bool = Query(None, description="conta o total de registros (padrão: só sem cursor)"),
+    fields: str = Query(None, description=FIELDS_DESCRIPTION),
+    expand: str = Query(None, description=EXPAND_DESCRIPTION),
     db: AsyncSession = Depends(get_db)
-) -> dict:
-    repository = EquipeRepository(db)
-    total = await repository.get_total_count()
-    equipes = await repository.get_paginated(limit=limit, offset=page * limit)
-    total_pages = (total // limit) + 1
-    equipes = [[str(key)+": "+str(value) for key, value in equipe.__dict__.items()] for equipe in equipes]
-    return {
-        "data": equipes,
-        "pagination": {
-            "total_pages": total_pages,
-            "total": total,
-            "offset": page,
-            "limit": limit
-        }
-    }
+) -> Response:
+    selected = parse_fields(Equipe, fields)
+    expanded = parse_expand(Equipe, expand)
+    repository = EquipeRepository(db).select_fields(selected).expand(expanded)
+    equipes, pagination = await paginate(repository, page, limit, cursor, sort, include_total)
+    return json_response({
+        "data": dump_many(response_schema(Equipe, selected, expanded), equipes),
+        "pagination": pagination
+    })
+
+@router.get("/export")
+async def exportar_equipes(
+    format: ExportFormat = Query("ndjson"),
+    gzip: bool = Query(False),
+) -> StreamingResponse:
+    logging.info(f"Exportando equipes ({format})")
+    return export_response(EquipeRepository, Equipe, "equipes", format, gzip)
 
 @router.post("/", response_model=Equipe, status_code=201)
 async def criar_equipe(
@@ -71,15 +87,19 @@ async def criar_equipe(
 @router.get("/{id}", response_model=Equipe)
 async def obter_equipe(
     id: int,
+    fields: str = Query(None, description=FIELDS_DESCRIPTION),
+    expand: str = Query(None, description=EXPAND_DESCRIPTION),
     db: AsyncSession = Depends(get_db)
-) -> Equipe:
-    repository = EquipeRepository(db)
+) -> Response:
+    selected = parse_fields(Equipe, fields)
+    expanded = parse_expand(Equipe, expand)
+    repository = EquipeRepository(db).select_fields(selected).expand(expanded)
     equipe = await repository.get_by_id(id)
     logging.info(f"Obtendo equipe com ID {id}")
     if not equipe:
         logging.error(f"Equipe com ID {id} não encontrada")
         raise HTTPException(status_code=404, detail="Equipe não encontrada")
-    return equipe
+    return json_response(dump(response_schema(Equipe, selected, expanded), equipe))
 
 @router.put("/{id}", response_model=Equipe)
 async def atualizar_equipe(
@@ -1,10 +1,16 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from core.database import get_db
+from core.export import ExportFormat, export_response
+from core.filters import DEFAULT_LIMIT, MAX_LIMIT, describe_filters, parse_filters, parse_order_by
+from core.pagination import paginate
+from core.serialization import FIELDS_DESCRIPTION, dump, dump_many, json_response, parse_fields, partial_schema
 import logging
 
-from models.equipeprof import EquipeProf
+from schemas.pagination import FilterResult, Page
+from schemas.equipeprof import EquipeProf
 from repositories.equipeprofs import EquipeProfRepository
 
 router = APIRouter(
@@ -14,47 +20,53 @@ router = APIRouter(
 
 @router.get("/", response_model=List[EquipeProf])
 async def listar_equipeprofs(
+    fields: str = Query(None, description=FIELDS_DESCRIPTION),
     db: AsyncSession = Depends(get_db)
-) -> List[EquipeProf]:
-    repository = EquipeProfRepository(db)
+) -> Response:
+    selected = parse_fields(EquipeProf, fields)
+    repository = EquipeProfRepository(db).select_fields(selected)
     logging.info("Listando equipeprofs")
-    return await repository.get_all()
+    return json_response(dump_many(partial_schema(EquipeProf, selected), await repository.get_all()))
 
-@router.get("/filtro")
+@router.get("/filtro", response_model=FilterResult[EquipeProf], description=describe_filters(EquipeProfRepository))
 async def filtrar_equipeprofs(
-    equipe_id: int = Query(None),
-    profissional_id: int = Query(None),
+    request: Request,
+    order_by: str = Query(None, description="Colunas de ordenação separadas por vírgula, '-' para decrescente"),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    fields: str = Query(None, description=FIELDS_DESCRIPTION),
     db: AsyncSession = Depends(get_db)
-) -> dict:
-    repository = EquipeProfRepository(db)
-    filters = {}
-    if equipe_id:
-        filters["equipe_id"] = equipe_id
-    if profissional_id:
-        filters["profissional_id"] = profissional_id
-    res = await repository.get_by_filters(filters)
-    return {"res":[[str(key)+": "+str(value) for key, value in equipeprof.__dict__.items() if (not key.startswith("_"))] for equipeprof in res]}
+) -> Response:
+    selected = parse_fields(EquipeProf, fields)
+    repository = EquipeProfRepository(db).select_fields(selected)
+    filters = parse_filters(repository, request.query_params.multi_items())
+    res = await repository.get_by_filters(filters, parse_order_by(repository, order_by), limit)
+    return json_response({"res": dump_many(partial_schema(EquipeProf, selected), res)})
 
-@router.get("/paginated")
+@router.get("/paginated", response_model=Page[EquipeProf])
 async def listar_equipeprofs_paginados(
     page: int = Query(0, ge=0),
     limit: int = Query(10, ge=1),
+    cursor: str = Query(None, description="next_cursor da página anterior"),
+    sort: str = Query("id"),
+    include_total: bool = Query(None, description="conta o total de registros (padrão: só sem cursor)"),
+    fields: str = Query(None, description=FIELDS_DESCRIPTION),
     db: AsyncSession = Depends(get_db)
-) -> dict:
-    repository = EquipeProfRepository(db)
-    total = await repository.get_total_count()
-    equipeprofs = await repository.get_paginated(limit=limit, offset=page * limit)
-    total_pages = (total // limit) + 1
-    equipeprofs = [[str(key)+": "+str(value) for key, value in equipeprof.__dict__.items()] for equipeprof in equipeprofs]
-    return {
-        "data": equipeprofs,
-        "pagination": {
-            "total_pages": total_pages,
-            "total": total,
-            "offset": page,
-            "limit": limit
-        }
-    }
+) -> Response:
+    selected = parse_fields(EquipeProf, fields)
+    repository = EquipeProfRepository(db).select_fields(selected)
+    equipeprofs, pagination = await paginate(repository, page, limit, cursor, sort, include_total)
+    return json_response({
+        "data": dump_many(partial_schema(EquipeProf, selected), equipeprofs),
+        "pagination": pagination
+    })
+
+@router.get("/export")
+async def exportar_equipeprofs(
+    format: ExportFormat = Query("ndjson"),
+    gzip: bool = Query(False),
+) -> StreamingResponse:
+    logging.info(f"Exportando equipeprofs ({format})")
+    return export_response(EquipeProfRepository, EquipeProf, "equipeprofs", format, gzip)
 
 @router.post("/", response_model=EquipeProf, status_code=201)
 async def criar_equipeprof(
@@ -68,16 +80,18 @@ async def criar_equipeprof(
 @router.get("/{id}", response_model=EquipeProf)
 async def obter_equipeprof(
     id: int,
+    fields: str = Query(None, description=FIELDS_DESCRIPTION),
     db: AsyncSession = Depends(get_db)
-) -> EquipeProf:
-    repository = EquipeProfRepository(db)
+) -> Response:
+    selected = parse_fields(EquipeProf, fields)
+    repository = EquipeProfRepository(db).select_fields(selected)
     equipeprof = await repository.get_by_id(id)
     logging.info(f"Obtendo equipeprof com ID {id}")
     if not equipeprof:
         logging.error(f"EquipeProf com ID {id} não encontrada")
         raise HTTPException(status_code=404, detail="EquipeProf não encontrada")
     logging.info(f"EquipeProf encontrada: {equipeprof}")
-    return equipeprof
+    return json_response(dump(partial_schema(EquipeProf, selected), equipeprof))
 
 @router.put("/{id}", response_model=EquipeProf)
 async def atualizar_equipeprof(
@@ -1,11 +1,25 @@
 import json
-from fastapi import APIRouter, Depends, HTTPException, Query
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from core.database import get_db
+from core.expansion import EXPAND_DESCRIPTION, parse_expand, response_schema
+from core.export import ExportFormat, export_response
+from core.filters import DEFAULT_LIMIT, MAX_LIMIT, describe_filters, parse_filters, parse_order_by
+from core.pagination import paginate
+from core.serialization import FIELDS_DESCRIPTION, dump, dump_many, json_response, parse_fields
+from core.spatial import estabelecimentos_index
 from core.exceptions import EstabelecimentoError, DatabaseValidationError
+from repositories.endereco import EnderecoRepository
+from repositories.equipe import EquipeRepository
 from repositories.estabelecimento import EstabelecimentoRepository
-from schemas.estabelecimento import Estabelecimento, EstabelecimentoCreate, EstabelecimentoUpdate
+from schemas.pagination import FilterResult, Page
+from schemas.estabelecimento import (
+    Estabelecimento, EstabelecimentoCreate, EstabelecimentoProximo, EstabelecimentoUpdate,
+    LoteProximos, ResultadoLoteProximos
+)
 import logging
 router = APIRouter(
     prefix="/estabelecimentos",
@@ -14,59 +28,129 @@ router = APIRouter(
 
 @router.get("/", response_model=List[Estabelecimento])
 async def listar_estabelecimentos(
+    fields: str = Query(None, description=FIELDS_DESCRIPTION),
+    expand: str = Query(None, description=EXPAND_DESCRIPTION),
     db: AsyncSession = Depends(get_db)
-) -> List[Estabelecimento]:
+) -> Response:
     
-    repository = EstabelecimentoRepository(db)
+    selected = parse_fields(Estabelecimento, fields)
+    expanded = parse_expand(Estabelecimento, expand)
+    repository = EstabelecimentoRepository(db).select_fields(selected).expand(expanded)
     logging.info("Listando estabelecimentos")
-    return await repository.get_all_with_endereco()
+    return json_response(dump_many(response_schema(Estabelecimento, selected, expanded), await repository.get_all_with_endereco()))
 
-@router.get("/filtro")
+@router.get("/filtro", response_model=FilterResult[Estabelecimento], description=describe_filters(EstabelecimentoRepository))
 async def filtrar_estabelecimentos(
-    codigo_unidade: str = Query(None),
-    codigo_cnes: str = Query(None),
-    nome_fantasia_estabelecimento: str = Query(None),
+    request: Request,
+    order_by: str = Query(None, description="Colunas de ordenação separadas por vírgula, '-' para decrescente"),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    fields: str = Query(None, description=FIELDS_DESCRIPTION),
+    expand: str = Query(None, description=EXPAND_DESCRIPTION),
     db: AsyncSession = Depends(get_db)
-) -> dict:
-    repository = EstabelecimentoRepository(db)
-    filters = {}
-    if codigo_unidade:
-        filters["codigo_unidade"] = codigo_unidade
-    if codigo_cnes:
-        filters["codigo_cnes"] = codigo_cnes
-    if nome_fantasia_estabelecimento:
-        filters["nome_fantasia_estabelecimento"] = nome_fantasia_estabelecimento
-    res = await repository.get_by_filters(filters)
-    return {"res":[[str(key)+": "+str(value) for key, value in estabelecimento.__dict__.items() if (not key.startswith("_"))] for estabelecimento in res]}
+) -> Response:
+    selected = parse_fields(Estabelecimento, fields)
+    expanded = parse_expand(Estabelecimento, expand)
+    repository = EstabelecimentoRepository(db).select_fields(selected).expand(expanded)
+    filters = parse_filters(repository, request.query_params.multi_items())
+    res = await repository.get_by_filters(filters, parse_order_by(repository, order_by), limit)
+    return json_response({"res": dump_many(response_schema(Estabelecimento, selected, expanded), res)})
     
 
-@router.get("/paginated")
+@router.get("/paginated", response_model=Page[Estabelecimento])
 async def listar_estabelecimentos_p(
     page: int = Query(0, ge=0),
     limit: int = Query(10, ge=1),
+    cursor: str = Query(None, description="next_cursor da página anterior"),
+    sort: str = Query("id"),
+    include_total: bool = Query(None, description="conta o total de registros (padrão: só sem cursor)"),
+    fields: str = Query(None, description=FIELDS_DESCRIPTION),
+    expand: str = Query(None, description=EXPAND_DESCRIPTION),
     db: AsyncSession = Depends(get_db)
-) -> dict:
+) -> Response:
+    selected = parse_fields(Estabelecimento, fields)
+    expanded = parse_expand(Estabelecimento, expand)
+    repository = EstabelecimentoRepository(db).select_fields(selected).expand(expanded)
+    estabelecimentos, pagination = await paginate(repository, page, limit, cursor, sort, include_total)
+    return json_response({
+        "data": dump_many(response_schema(Estabelecimento, selected, expanded), estabelecimentos),
+        "pagination": pagination
+    })
+
+@router.get("/export")
+async def exportar_estabelecimentos(
+    format: ExportFormat = Query("ndjson"),
+    gzip: bool = Query(False),
+) -> StreamingResponse:
+    logging.info(f"Exportando estabelecimentos ({format})")
+    return export_response(EstabelecimentoRepository, Estabelecimento, "estabelecimentos", format, gzip)
+
+@router.get("/proximos", response_model=List[EstabelecimentoProximo])
+async def listar_estabelecimentos_proximos(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    raio_km: float = Query(None, gt=0),
+    k: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+) -> Response:
+    await EnderecoRepository(db).sync_spatial_index()
     repository = EstabelecimentoRepository(db)
-    total = await repository.get_total_count()
-    estabelecimentos = await repository.get_paginated(limit=limit, offset=page * limit) 
-    total_pages = (total // limit) + 1
-    estabelecimentos = [[str(key)+": "+str(value) for key, value in estabelecimento.__dict__.items()] for estabelecimento in estabelecimentos]
-    return {
-        "data": estabelecimentos,
-        "pagination": {
-            "total_pages": total_pages,
-            "total": total,
-            "offset": page,
-            "limit": limit
-        }
-    }
+    # the index may still hold establishments deleted (or soft-deleted) since it
+    # was loaded: they are skipped and the search widened by as many, until k
+    # remain or the index has no more candidates
+    wanted = k
+    estabelecimentos = {}
+    checked = set()
+    while True:
+        nearest = estabelecimentos_index.nearest(lat, lon, wanted, raio_km)
+        unchecked = [id for id, _ in nearest if id not in checked]
+        checked.update(unchecked)
+        estabelecimentos.update(await repository.get_by_ids(unchecked))
+        found = [(id, distancia) for id, distancia in nearest if id in estabelecimentos]
+        if len(found) >= k or len(nearest) < wanted:
+            break
+        wanted += k - len(found)
+    return json_response([
+        {**dump(Estabelecimento, estabelecimentos[id]), "distancia_km": round(distancia, 3)}
+        for id, distancia in found[:k]
+    ])
+
+@router.post("/proximos/lote", response_model=ResultadoLoteProximos)
+async def atribuir_estabelecimentos_proximos(
+    data: LoteProximos,
+    db: AsyncSession = Depends(get_db)
+) -> Response:
+    await EnderecoRepository(db).sync_spatial_index()
+    owners = None
+    if data.tipo_equipe:
+        owners = await EquipeRepository(db).get_estabelecimento_ids_by_tipo(data.tipo_equipe)
+
+    start = time.perf_counter()
+    ids, distancias = estabelecimentos_index.assign(
+        [ponto.lat for ponto in data.pontos], [ponto.lon for ponto in data.pontos], owners
+    )
+    segundos = time.perf_counter() - start
+    pontos_por_segundo = len(data.pontos) / segundos if segundos > 0 else float(len(data.pontos))
+    logging.info(f"Atribuídos {len(data.pontos)} pontos em {segundos:.3f}s ({pontos_por_segundo:,.0f} pontos/s)")
+    return json_response({
+        "res": [
+            {"estabelecimento_id": id, "distancia_km": None if distancia is None else round(distancia, 3)}
+            for id, distancia in zip(ids, distancias)
+        ],
+        "pontos": len(data.pontos),
+        "segundos": segundos,
+        "pontos_por_segundo": pontos_por_segundo
+    })
 
 @router.get("/{id}", response_model=Estabelecimento)
 async def obter_estabelecimento(
     id: int, 
+    fields: str = Query(None, description=FIELDS_DESCRIPTION),
+    expand: str = Query(None, description=EXPAND_DESCRIPTION),
     db: AsyncSession = Depends(get_db)
-) -> Estabelecimento:
-    repository = EstabelecimentoRepository(db)
+) -> Response:
+    selected = parse_fields(Estabelecimento, fields)
+    expanded = parse_expand(Estabelecimento, expand)
+    repository = EstabelecimentoRepository(db).select_fields(selected).expand(expanded)
     estabelecimento = await repository.get_by_id_with_endereco(id)
     logging.info(f"Estabelecimento encontrado: {estabelecimento}")
     if not estabelecimento:
@@ -75,8 +159,7 @@ async def obter_estabelecimento(
             status_code=404, 
             detail=EstabelecimentoError.NOT_FOUND
         )
-    logging.info(f"Endereço do estabelecimento: {estabelecimento.endereco}")
-    return estabelecimento
+    return json_response(dump(response_schema(Estabelecimento, selected, expanded), estabelecimento))
 
 @router.post("/", response_model=Estabelecimento, status_code=201)
 async def criar_estabelecimento(
@@ -1,8 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from core.database import get_db
+from core.expansion import EXPAND_DESCRIPTION, parse_expand, response_schema
+from core.export import ExportFormat, export_response
+from core.filters import DEFAULT_LIMIT, MAX_LIMIT, describe_filters, parse_filters, parse_order_by
+from core.pagination import paginate
+from core.serialization import FIELDS_DESCRIPTION, dump, dump_many, json_response, parse_fields
 from repositories.mantenedora import MantenedoraRepository
+from schemas.pagination import FilterResult, Page
 from schemas.mantenedora import Mantenedora, MantenedoraCreate, MantenedoraUpdate
 import logging
 
@@ -13,47 +20,59 @@ router = APIRouter(
 
 @router.get("/", response_model=List[Mantenedora])
 async def listar_mantenedoras(
+    fields: str = Query(None, description=FIELDS_DESCRIPTION),
+    expand: str = Query(None, description=EXPAND_DESCRIPTION),
     db: AsyncSession = Depends(get_db)
-) -> List[Mantenedora]:
-    repository = MantenedoraRepository(db)
+) -> Response:
+    selected = parse_fields(Mantenedora, fields)
+    expanded = parse_expand(Mantenedora, expand)
+    repository = MantenedoraRepository(db).select_fields(selected).expand(expanded)
     logging.info("Listando mantenedoras")
-    return await repository.get_all()
+    return json_response(dump_many(response_schema(Mantenedora, selected, expanded), await repository.get_all()))
 
-@router.get("/filtro")
+@router.get("/filtro", response_model=FilterResult[Mantenedora], description=describe_filters(MantenedoraRepository))
 async def filtrar_mantenedoras(
-    cnpj_mantenedora: str = Query(None),
-    nome_razao_social_mantenedora: str = Query(None),
+    request: Request,
+    order_by: str = Query(None, description="Colunas de ordenação separadas por vírgula, '-' para decrescente"),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    fields: str = Query(None, description=FIELDS_DESCRIPTION),
+    expand: str = Query(None, description=EXPAND_DESCRIPTION),
     db: AsyncSession = Depends(get_db)
-) -> dict:
-    repository = MantenedoraRepository(db)
-    filters = {}
-    if cnpj_mantenedora:
-        filters["cnpj_mantenedora"] = cnpj_mantenedora
-    if nome_razao_social_mantenedora:
-        filters["nome_razao_social_mantenedora"] = nome_razao_social_mantenedora
-    res = await repository.get_by_filters(filters)
-    return {"res":[[str(key)+": "+str(value) for key, value in mantenedora.__dict__.items() if (not key.startswith("_"))] for mantenedora in res]}
+) -> Response:
+    selected = parse_fields(Mantenedora, fields)
+    expanded = parse_expand(Mantenedora, expand)
+    repository = MantenedoraRepository(db).select_fields(selected).expand(expanded)
+    filters = parse_filters(repository, request.query_params.multi_items())
+    res = await repository.get_by_filters(filters, parse_order_by(repository, order_by), limit)
+    return json_response({"res": dump_many(response_schema(Mantenedora, selected, expanded), res)})
 
-@router.get("/paginated")
+@router.get("/paginated", response_model=Page[Mantenedora])
 async def listar_mantenedoras_paginadas(
     page: int = Query(0, ge=0),
     limit: int = Query(10, ge=1),
+    cursor: str = Query(None, description="next_cursor da página anterior"),
+    sort: str = Query("id"),
+    include_total: bool = Query(None, description="conta o total de registros (padrão: só sem cursor)"),
+    fields: str = Query(None, description=FIELDS_DESCRIPTION),
+    expand: str = Query(None, description=EXPAND_DESCRIPTION),
     db: AsyncSession = Depends(get_db)
-) -> dict:
-    repository = MantenedoraRepository(db)
-    total = await repository.get_total_count()
-    mantenedoras = await repository.get_paginated(limit=limit, offset=page * limit)
-    total_pages = (total // limit) + 1
-    mantenedoras = [[str(key)+": "+str(value) for key, value in mantenedora.__dict__.items()] for mantenedora in mantenedoras]
-    return {
-        "data": mantenedoras,
-        "pagination": {
-            "total_pages": total_pages,
-            "total": total,
-            "offset": page,
-            "limit": limit
-        }
-    }
+) -> Response:
+    selected = parse_fields(Mantenedora, fields)
+    expanded = parse_expand(Mantenedora, expand)
+    repository = MantenedoraRepository(db).select_fields(selected).expand(expanded)
+    mantenedoras, pagination = await paginate(repository, page, limit, cursor, sort, include_total)
+    return json_response({
+        "data": dump_many(response_schema(Mantenedora, selected, expanded), mantenedoras),
+        "pagination": pagination
+    })
+
+@router.get("/export")
+async def exportar_mantenedoras(
+    format: ExportFormat = Query("ndjson"),
+    gzip: bool = Query(False),
+) -> StreamingResponse:
+    logging.info(f"Exportando mantenedoras ({format})")
+    return export_response(MantenedoraRepository, Mantenedora, "mantenedoras", format, gzip)
 
 @router.post("/", response_model=Mantenedora, status_code=201)
 async def criar_mantenedora(
@@ -67,16 +86,20 @@ async def criar_mantenedora(
 @router.get("/{id}", response_model=Mantenedora)
 async def obter_mantenedora(
     id: int,
+    fields: str = Query(None, description=FIELDS_DESCRIPTION),
+    expand: str = Query(None, description=EXPAND_DESCRIPTION),
     db: AsyncSession = Depends(get_db)
-) -> Mantenedora:
-    repository = MantenedoraRepository(db)
+) -> Response:
+    selected = parse_fields(Mantenedora, fields)
+    expanded = parse_expand(Mantenedora, expand)
+    repository = MantenedoraRepository(db).select_fields(selected).expand(expanded)
     mantenedora = await repository.get_by_id(id)
     logging.info(f"Obtendo mantenedora de id {id}")
     if not mantenedora:
         logging.error(f"Mantenedora de id {id} não encontrada")
         raise HTTPException(status_code=404, detail="Mantenedora não encontrada")
     logging.info(f"Mantenedora de id {id} encontrada")
-    return mantenedora
+    return json_response(dump(response_schema(Mantenedora, selected, expanded), mantenedora))
 
 @router.put("/{id}", response_model=Mantenedora)
 async def atualizar_mantenedora(
@@ -1,8 +1,15 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from core.database import get_db
+from core.expansion import EXPAND_DESCRIPTION, parse_expand, response_schema
+from core.export import ExportFormat, export_response
+from core.filters import DEFAULT_LIMIT, MAX_LIMIT, describe_filters, parse_filters, parse_order_by
+from core.pagination import paginate
+from core.serialization import FIELDS_DESCRIPTION, dump, dump_many, json_response, parse_fields
 import logging
+from schemas.pagination import FilterResult, Page
 from schemas.profissional import Profissional
 from repositories.profissional import ProfissionalRepository
 
@@ -14,50 +21,59 @@ router = APIRouter(
 
 @router.get("/", response_model=List[Profissional])
 async def listar_profissionals(
+    fields: str = Query(None, description=FIELDS_DESCRIPTION),
+    expand: str = Query(None, description=EXPAND_DESCRIPTION),
     db: AsyncSession = Depends(get_db)
-) -> List[Profissional]:
-    repository = ProfissionalRepository(db)
+) -> Response:
+    selected = parse_fields(Profissional, fields)
+    expanded = parse_expand(Profissional, expand)
+    repository = ProfissionalRepository(db).select_fields(selected).expand(expanded)
     logging.info("Listando todos os profissionais")
-    return await repository.get_all()
+    return json_response(dump_many(response_schema(Profissional, selected, expanded), await repository.get_all()))
 
-@router.get("/filtro")
+@router.get("/filtro", response_model=FilterResult[Profissional], description=describe_filters(ProfissionalRepository))
 async def filtrar_profissionais(
-    codigo_profissional_sus: str = Query(None),
-    nome_profissional: str = Query(None),
-    codigo_cns: str = Query(None),
+    request: Request,
+    order_by: str = Query(None, description="Colunas de ordenação separadas por vírgula, '-' para decrescente"),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    fields: str = Query(None, description=FIELDS_DESCRIPTION),
+    expand: str = Query(None, description=EXPAND_DESCRIPTION),
     db: AsyncSession = Depends(get_db)
-) -> dict:
-    repository = ProfissionalRepository(db)
-    filters = {}
-    if codigo_profissional_sus:
-        filters["codigo_profissional_sus"] = codigo_profissional_sus
-    if nome_profissional:
-        filters["nome_profissional"] = nome_profissional
-    if codigo_cns:
-        filters["codigo_cns"] = codigo_cns
-    res = await repository.get_by_filters(filters)
-    return {"res":[[str(key)+": "+str(value) for key, value in profissional.__dict__.items() if (not key.startswith("_"))] for profissional in res]}
+) -> Response:
+    selected = parse_fields(Profissional, fields)
+    expanded = parse_expand(Profissional, expand)
+    repository = ProfissionalRepository(db).select_fields(selected).expand(expanded)
+    filters = parse_filters(repository, request.query_params.multi_items())
+    res = await repository.get_by_filters(filters, parse_order_by(repository, order_by), limit)
+    return json_response({"res": dump_many(response_schema(Profissional, selected, expanded), res)})
 
-@router.get("/paginated", response_model=dict)
+@router.get("/paginated", response_model=Page[Profissional])
 async def listar_profissionais_paginados(
     page: int = Query(0, ge=0),
     limit: int = Query(10, ge=1),
+    cursor: str = Query(None, description="next_cursor da página anterior"),
+    sort: str = Query("id"),
+    include_total: bool = Query(None, description="conta o total de registros (padrão: só sem cursor)"),
+    fields: str = Query(None, description=FIELDS_DESCRIPTION),
+    expand: str = Query(None, description=EXPAND_DESCRIPTION),
     db: AsyncSession = Depends(get_db)
-) -> dict:
-    repository = ProfissionalRepository(db)
-    total = await repository.get_total_count()
-    profissionais = await repository.get_paginated(limit=limit, offset=page * limit)
-    total_pages = (total // limit) + 1
-    profissionais = [[str(key)+": "+str(value) for key, value in profissional.__dict__.items()] for profissional in profissionais]
-    return {
-        "data": profissionais,
-        "pagination": {
-            "total_pages": total_pages,
-            "total": total,
-            "offset": page,
-            "limit": limit
-        }
-    }
+) -> Response:
+    selected = parse_fields(Profissional, fields)
+    expanded = parse_expand(Profissional, expand)
+    repository = ProfissionalRepository(db).select_fields(selected).expand(expanded)
+    profissionais, pagination = await paginate(repository, page, limit, cursor, sort, include_total)
+    return json_response({
+        "data": dump_many(response_schema(Profissional, selected, expanded), profissionais),
+        "pagination": pagination
+    })
+
+@router.get("/export")
+async def exportar_profissionais(
+    format: ExportFormat = Query("ndjson"),
+    gzip: bool = Query(False),
+) -> StreamingResponse:
+    logging.info(f"Exportando profissionais ({format})")
+    return export_response(ProfissionalRepository, Profissional, "profissionais", format, gzip)
 
 @router.post("/", response_model=Profissional, status_code=201)
 async def criar_profissional(
@@ -71,16 +87,20 @@ async def criar_profissional(
 @router.get("/{id}", response_model=Profissional)
 async def obter_profissional(
     id: int,
+    fields: str = Query(None, description=FIELDS_DESCRIPTION),
+    expand: str = Query(None, description=EXPAND_DESCRIPTION),
     db: AsyncSession = Depends(get_db)
-) -> Profissional:
-    repository = ProfissionalRepository(db)
+) -> Response:
+    selected = parse_fields(Profissional, fields)
+    expanded = parse_expand(Profissional, expand)
+    repository = ProfissionalRepository(db).select_fields(selected).expand(expanded)
     profissional = await repository.get_by_id(id)
     logging.info(f"Obtendo profissional de id {id}")
     if not profissional:
         logging.error(f"Profissional de id {id} não encontrado")
         raise HTTPException(status_code=404, detail="Profissional não encontrado")
     logging.info(f"Profissional encontrado: {profissional}")
-    return profissional
+    return json_response(dump(response_schema(Profissional, selected, expanded), profissional))
 
 @router.put("/{id}", response_model=Profissional)
 async def atualizar_profissional(
@@ -0,0 +1,6 @@
+from pydantic import BaseModel, Field
+
+class Sugestao(BaseModel):
+    id: int
+    nome: str = Field(example="UBS CENTRO", description="Nome fantasia do estabelecimento ou nome do profissional")
+    codigo: str = Field(example="2345678", description="Código CNES do estabelecimento ou código SUS do profissional")
@@ -0,0 +1,19 @@
+from pydantic import BaseModel, Field
+from schemas.estabelecimento import Estabelecimento
+from schemas.mantenedora import Mantenedora
+from schemas.profissional import Profissional
+
+class EstabelecimentoEncontrado(Estabelecimento):
+    relevancia: float = Field(example=0.875, description="Similaridade com o termo buscado, de 0 a 1")
+
+class MantenedoraEncontrada(Mantenedora):
+    relevancia: float = Field(example=0.875, description="Similaridade com o termo buscado, de 0 a 1")
+
+class ProfissionalEncontrado(Profissional):
+    relevancia: float = Field(example=0.875, description="Similaridade com o termo buscado, de 0 a 1")
+
+class ResultadoBusca(BaseModel):
+    q: str
+    estabelecimentos: list[EstabelecimentoEncontrado] = []
+    mantenedoras: list[MantenedoraEncontrada] = []
+    profissionais: list[ProfissionalEncontrado] = []
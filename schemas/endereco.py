@@ -1,14 +1,18 @@
 from pydantic import BaseModel, Field, field_validator
 
 class EnderecoBase(BaseModel):
-    latitude: str | None = Field(
+    latitude: float | None = Field(
         default=None,
-        example="-3.7436",
+        example=-3.7436,
+        ge=-90,
+        le=90,
         description="Latitude do estabelecimento"
     )
-    longitude: str | None = Field(
+    longitude: float | None = Field(
         default=None,
-        example="-38.5229",
+        example=-38.5229,
+        ge=-180,
+        le=180,
         description="Longitude do estabelecimento"
     )
     cep_estabelecimento: str = Field(
@@ -61,3 +65,18 @@ class Endereco(EnderecoBase):
 
     class Config:
         from_attributes = True
+
+class AgrupamentoEnderecos(BaseModel):
+    latitude: float = Field(description="Posição média dos endereços do agrupamento")
+    longitude: float = Field(description="Posição média dos endereços do agrupamento")
+    quantidade: int = Field(example=12, description="Número de endereços no agrupamento")
+    endereco_id: int | None = Field(
+        default=None,
+        description="ID do endereço quando o agrupamento tem um só ponto"
+    )
+
+class MapaEnderecos(BaseModel):
+    zoom: int
+    celula_graus: float = Field(description="Lado, em graus, da célula de agrupamento")
+    total: int = Field(description="Endereços dentro da área")
+    data: list[AgrupamentoEnderecos]
@@ -0,0 +1,23 @@
+from pydantic import BaseModel, Field
+
+class EquipeProfBase(BaseModel):
+    equipe_id: int = Field(
+        example=1,
+        description="ID da equipe"
+    )
+    profissional_id: int = Field(
+        example=1,
+        description="ID do profissional"
+    )
+
+class EquipeProfCreate(EquipeProfBase):
+    pass
+
+class EquipeProf(EquipeProfBase):
+    id: int = Field(
+        example=1,
+        description="ID do vínculo entre equipe e profissional"
+    )
+
+    class Config:
+        from_attributes = True
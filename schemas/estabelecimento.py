@@ -59,3 +59,35 @@ class Estabelecimento(EstabelecimentoBase):
 
     class Config:
         from_attributes = True
+
+class EstabelecimentoProximo(Estabelecimento):
+    distancia_km: float = Field(
+        example=1.25,
+        description="Distância em linha reta (haversine) até o ponto consultado"
+    )
+
+class Ponto(BaseModel):
+    lat: float = Field(example=-15.7801, ge=-90, le=90)
+    lon: float = Field(example=-47.9292, ge=-180, le=180)
+
+class LoteProximos(BaseModel):
+    pontos: list[Ponto] = Field(
+        min_length=1,
+        max_length=200_000,
+        description="Coordenadas (pacientes, domicílios) a atribuir"
+    )
+    tipo_equipe: str | None = Field(
+        default=None,
+        example="70",
+        description="Considera só estabelecimentos com uma equipe deste tipo"
+    )
+
+class AtribuicaoProxima(BaseModel):
+    estabelecimento_id: int | None
+    distancia_km: float | None
+
+class ResultadoLoteProximos(BaseModel):
+    res: list[AtribuicaoProxima] = Field(description="Um item por ponto, na ordem do pedido")
+    pontos: int
+    segundos: float
+    pontos_por_segundo: float
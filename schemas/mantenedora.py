@@ -49,7 +49,7 @@ class MantenedoraUpdate(MantenedoraBase):
 
 class Mantenedora(MantenedoraBase):
     id: int
-    data_criacao_mantenedora: datetime
+    data_criacao_mantenedora: datetime | None = None
 
     class Config:
         from_attributes = True
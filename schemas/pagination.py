@@ -0,0 +1,19 @@
+from typing import Generic, TypeVar
+from pydantic import BaseModel, Field
+
+T = TypeVar("T")
+
+class Pagination(BaseModel):
+    limit: int
+    sort: str = Field(default="id", description="Chave de ordenação")
+    offset: int | None = Field(default=None, description="Página pedida (só sem cursor)")
+    next_cursor: str | None = Field(default=None, description="Cursor da próxima página; nulo na última")
+    total: int | None = Field(default=None, description="Total de registros, quando contado")
+    total_pages: int | None = None
+
+class Page(BaseModel, Generic[T]):
+    data: list[T]
+    pagination: Pagination
+
+class FilterResult(BaseModel, Generic[T]):
+    res: list[T]
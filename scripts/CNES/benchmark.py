@@ -0,0 +1,144 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from core.database import Base, engine
+from scripts.CNES import populate_db
+from scripts.CNES.bulk_loader import QUERIES, LoadStats
+from scripts.CNES.generate import FILE_PREFIXES, generate
+
+# End-to-end import benchmark: generates (or reuses) a synthetic release,
+# runs populate_db against the configured Postgres and writes a JSON report
+# (wall time, rows/s per table, peak RSS, statements sent to the server)
+# that can be compared between commits.
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Mede a importação do CNES com dados sintéticos")
+    parser.add_argument("--rows", type=int, default=100_000, help="linhas do tbProf gerado")
+    parser.add_argument("--mode", choices=["orm", "bulk", "delta", "staging"], default="bulk")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--cache-dir", default=None)
+    parser.add_argument("--data-dir", default=None, help="reaproveita arquivos já gerados neste diretório")
+    parser.add_argument("--competencia", default="202501")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--reset",
+        action="store_true",
+        help="apaga e recria as tabelas antes da carga (use um banco descartável)"
+    )
+    parser.add_argument("--output", default=None, help="arquivo JSON do relatório")
+    return parser.parse_args(argv)
+
+
+def populate_args(args: argparse.Namespace, data_dir: str) -> List[str]:
+    argv = [
+        "--mode", args.mode,
+        "--data-dir", data_dir,
+        "--competencia", args.competencia,
+        "--workers", str(args.workers),
+    ]
+    if args.stream:
+        argv.append("--stream")
+    if args.chunk_size:
+        argv += ["--chunk-size", str(args.chunk_size)]
+    if args.cache_dir:
+        argv += ["--cache-dir", args.cache_dir]
+    return argv
+
+
+def table_report(stats) -> Dict[str, Dict]:
+    if isinstance(stats, LoadStats):
+        return stats.tables
+    # delta_sync returns its own counters per table
+    report = {}
+    for table, result in (stats or {}).items():
+        rows = result["inserted"] + result["updated"] + result["deleted"] + result["unchanged"]
+        seconds = result["seconds"]
+        report[table] = {
+            **result,
+            "rows": rows,
+            "rows_per_sec": rows / seconds if seconds > 0 else float(rows),
+        }
+    return report
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    # ru_maxrss is in KiB on Linux (bytes on macOS)
+    scale = 1024 * 1024 if platform.system() == "Darwin" else 1024
+    return {
+        "importer": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        "workers": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    }
+
+
+async def reset_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def benchmark(args: argparse.Namespace) -> Dict:
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="cnes-bench-")
+    expected = os.path.join(data_dir, f"{FILE_PREFIXES['profissionais']}{args.competencia}.csv")
+    if not os.path.exists(expected):
+        start = time.perf_counter()
+        generate(data_dir, args.rows, args.competencia, args.seed)
+        print(f"Generated {args.rows} rows in {time.perf_counter() - start:.2f}s at {data_dir}")
+
+    if args.reset:
+        await reset_tables()
+
+    # the ORM path goes through the SQLAlchemy engine; the loaders count their own
+    event.listen(engine.sync_engine, "before_cursor_execute", QUERIES)
+    QUERIES.count = 0
+    start = time.perf_counter()
+    try:
+        stats = await populate_db.run(populate_db.parse_args(populate_args(args, data_dir)))
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", QUERIES)
+    wall = time.perf_counter() - start
+
+    tables = table_report(stats)
+    total_rows = sum(table["rows"] for table in tables.values())
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "mode": args.mode,
+        "workers": args.workers,
+        "rows": args.rows,
+        "data_dir": data_dir,
+        "wall_seconds": wall,
+        "rows_written": total_rows,
+        "rows_per_sec": total_rows / wall if wall > 0 else float(total_rows),
+        "tables": tables,
+        "peak_rss_mb": peak_rss_mb(),
+        "db_round_trips": QUERIES.count,
+        "python": platform.python_version(),
+    }
+
+
+async def main():
+    args = parse_args()
+    report = await benchmark(args)
+    output = args.output or f"benchmark-{args.mode}-{args.rows}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(
+        f"{report['rows_written']} rows in {report['wall_seconds']:.2f}s "
+        f"({report['rows_per_sec']:,.0f} rows/s), {report['db_round_trips']} round trips, "
+        f"peak RSS {report['peak_rss_mb']['importer']:.0f} MB -> {output}"
+    )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+import asyncpg
+import time
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+from core.config import settings
+from scripts.CNES.reader import DEFAULT_CHUNK_SIZE, read_normalized
+from scripts.CNES.resolution import KeyIndex
+from scripts.CNES.transform import TABLE_SPECS, TableSpec
+
+
+class QueryCounter:
+    """Statements sent to Postgres by the loaders; each one is a round trip."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+QUERIES = QueryCounter()
+
+
+async def connect() -> asyncpg.Connection:
+    conn = await asyncpg.connect(
+        user=settings.POSTGRES_USER,
+        password=settings.POSTGRES_PASSWORD,
+        host=settings.POSTGRES_HOST,
+        port=settings.POSTGRES_PORT,
+        database=settings.POSTGRES_DB
+    )
+    conn.add_query_logger(QUERIES)
+    return conn
+
+
+class LoadStats:
+    def __init__(self):
+        self.tables: Dict[str, Dict] = {}
+
+    def record(self, table: str, rows: int, skipped: int, elapsed: float):
+        rate = rows / elapsed if elapsed > 0 else float(rows)
+        self.tables[table] = {"rows": rows, "skipped": skipped, "seconds": elapsed, "rows_per_sec": rate}
+        print(f"{table}: {rows} rows in {elapsed:.2f}s ({rate:,.0f} rows/s), {skipped} skipped")
+
+
+def resolve_records(spec: TableSpec, records: Iterable[Tuple], keys: KeyIndex, counter: Dict[str, int]) -> Iterator[Tuple]:
+    if not spec.foreign_keys:
+        yield from records
+        return
+    for record in records:
+        record = keys.resolve(record, spec.foreign_keys)
+        if record is None:
+            counter["skipped"] += 1
+            continue
+        yield record
+
+
+def table_records(spec: TableSpec, file_path: str, keys: KeyIndex, counter: Dict[str, int], cache_dir: Optional[str] = None) -> Iterator[Tuple]:
+    """Streams the resolved records of one table from its source file."""
+    for frame in read_normalized(file_path, spec.source, DEFAULT_CHUNK_SIZE, cache_dir):
+        records = spec.records(frame)
+        counter["skipped"] += len(frame) - len(records)
+        yield from resolve_records(spec, records, keys, counter)
+
+
+def unique_records(spec: TableSpec, records: Iterable[Tuple], counter: Dict[str, int], seen: set = None) -> Iterator[Tuple]:
+    # COPY aborts on the first unique violation, so repeated natural keys
+    # inside the same file are dropped here (first occurrence wins).
+    seen = set() if seen is None else seen
+    for record in records:
+        key = spec.key(record)
+        if key in seen:
+            counter["skipped"] += 1
+            continue
+        seen.add(key)
+        yield record
+
+
+async def copy_records(conn: asyncpg.Connection, table: str, columns: Tuple[str, ...], records) -> int:
+    # COPY does not go through the query loggers
+    QUERIES()
+    status = await conn.copy_records_to_table(table, records=records, columns=columns)
+    return int(status.split()[-1])
+
+
+async def bulk_load(paths: Dict[str, str], cache_dir: Optional[str] = None) -> LoadStats:
+    """
+    Loads a full CNES snapshot with COPY, table by table in FK order.
+    Meant for an empty database: existing natural keys make COPY fail.
+    """
+    stats = LoadStats()
+    keys = KeyIndex()
+    conn = await connect()
+    try:
+        async with conn.transaction():
+            for spec in TABLE_SPECS:
+                start = time.perf_counter()
+                counter = {"skipped": 0}
+                records = table_records(spec, paths[spec.source], keys, counter, cache_dir)
+                records = unique_records(spec, records, counter)
+                rows = await copy_records(conn, spec.table, spec.copy_columns, spec.hashed(records))
+                stats.record(spec.table, rows, counter["skipped"], time.perf_counter() - start)
+                if spec.table in keys.maps:
+                    await keys.load_raw(conn, spec.table)
+    finally:
+        await conn.close()
+    return stats
@@ -0,0 +1,92 @@
+import hashlib
+import os
+import time
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+from typing import Iterator, Optional
+from scripts.CNES.normalize import COORDINATE_COLUMNS, DATE_COLUMNS, NORMALIZE_VERSION, normalize_frame
+from scripts.CNES.reader import read_frames
+from scripts.CNES.sources import Source, open_source, source_digest, source_name
+
+# Columnar cache of the normalized source files, stored as uncompressed
+# Arrow IPC files so they can be memory-mapped instead of re-parsed.
+# Entries are keyed by the CSV content hash and the normalization version.
+
+
+def file_digest(file_path: Source) -> str:
+    # zip members are identified from the archive directory, without reading them
+    known = source_digest(file_path)
+    if known:
+        return known
+    digest = hashlib.blake2b(digest_size=16)
+    with open_source(file_path) as f:
+        while block := f.read(1024 * 1024):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_path(cache_dir: str, source: str, digest: str) -> str:
+    return os.path.join(cache_dir, f"{source}-{digest}-v{NORMALIZE_VERSION}.arrow")
+
+
+def _type(source: str, column: str) -> pa.DataType:
+    if column in DATE_COLUMNS.get(source, []):
+        return pa.timestamp('ns')
+    if column in COORDINATE_COLUMNS.get(source, {}):
+        return pa.float64()
+    return pa.string()
+
+
+def _schema(source: str, columns) -> pa.Schema:
+    return pa.schema([pa.field(column, _type(source, column)) for column in columns])
+
+
+def open_cached(file_path: Source, source: str, cache_dir: str, digest: Optional[str] = None) -> Optional[pa.Table]:
+    """Memory-maps the cached table of a source file, if there is one."""
+    path = cache_path(cache_dir, source, digest or file_digest(file_path))
+    if not os.path.exists(path):
+        return None
+    return ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+
+def cached_frames(file_path: Source, source: str, cache_dir: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Normalized frames of a source file. A warm cache is read from the mapped
+    Arrow file; otherwise the CSV is parsed and the cache written on the way.
+    """
+    start = time.perf_counter()
+    digest = file_digest(file_path)
+    table = open_cached(file_path, source, cache_dir, digest)
+    if table is not None:
+        rows = 0
+        for batch in table.to_batches(max_chunksize=chunk_size):
+            rows += batch.num_rows
+            yield batch.to_pandas()
+        print(f"{source_name(file_path)}: {rows} rows from cache (warm) in {time.perf_counter() - start:.2f}s")
+        return
+
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cache_path(cache_dir, source, digest)
+    partial = f"{path}.{os.getpid()}.tmp"
+    writer = None
+    rows = 0
+    try:
+        for frame in read_frames(file_path, chunk_size):
+            frame = normalize_frame(source, frame)
+            if writer is None:
+                schema = _schema(source, frame.columns)
+                writer = ipc.new_file(partial, schema)
+            writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+            rows += len(frame)
+            yield frame
+        if writer is not None:
+            writer.close()
+            writer = None
+            os.replace(partial, path)
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(partial):
+            os.remove(partial)
+    print(f"{source_name(file_path)}: {rows} rows parsed (cold) in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,99 @@
+import asyncpg
+import time
+from typing import Dict, List, Optional, Tuple
+from scripts.CNES.bulk_loader import connect, copy_records, table_records
+from scripts.CNES.resolution import KeyIndex
+from scripts.CNES.transform import TABLE_SPECS, TableSpec, row_hash
+
+
+def compared_columns(spec: TableSpec) -> Tuple[str, ...]:
+    # the trailing `deleted` flag is managed by the sync itself
+    return spec.columns[:-1]
+
+
+async def fetch_stored(conn: asyncpg.Connection, spec: TableSpec) -> Dict[Tuple, Tuple[int, Optional[bytes], bool]]:
+    """
+    natural key -> (id, row_hash, deleted). Only the key columns and the hash
+    the loaders stored are read; row_hash is NULL for rows written by anything
+    else (the API, the ORM and staging importers), which compare as changed.
+    """
+    rows = await conn.fetch(
+        f'SELECT id, row_hash, deleted, {", ".join(spec.key_columns)} FROM {spec.table}'
+    )
+    return {tuple(row[3:]): (row[0], row[1], bool(row[2])) for row in rows}
+
+
+async def sync_table(conn: asyncpg.Connection, spec: TableSpec, paths: Dict[str, str], keys: KeyIndex, cache_dir: Optional[str] = None) -> Dict[str, float]:
+    start = time.perf_counter()
+    counter = {"skipped": 0}
+    columns = compared_columns(spec)
+    stored = await fetch_stored(conn, spec)
+
+    inserts: List[Tuple] = []
+    updates: List[Tuple] = []
+    seen = set()
+    unchanged = 0
+    for record in table_records(spec, paths[spec.source], keys, counter, cache_dir):
+        values = record[:-1]
+        key = spec.key(values)
+        if key in seen:
+            counter["skipped"] += 1
+            continue
+        seen.add(key)
+        current = stored.get(key)
+        digest = row_hash(values)
+        if current is None:
+            inserts.append(values + (False, digest))
+        elif current[1] != digest or current[2]:
+            updates.append((current[0],) + values + (digest,))
+        else:
+            unchanged += 1
+
+    deletes = [id for key, (id, _, deleted) in stored.items() if key not in seen and not deleted]
+    del stored, seen
+
+    if inserts:
+        await copy_records(conn, spec.table, spec.copy_columns, inserts)
+    if updates:
+        assignments = ", ".join(f"{column} = ${i + 2}" for i, column in enumerate(columns))
+        await conn.executemany(
+            f'UPDATE {spec.table} SET {assignments}, row_hash = ${len(columns) + 2}, '
+            f'deleted = false, updated_at = now() WHERE id = $1',
+            updates
+        )
+    if deletes:
+        await conn.execute(
+            f'UPDATE {spec.table} SET deleted = true, updated_at = now() WHERE id = ANY($1::int[])',
+            deletes
+        )
+
+    result = {
+        "inserted": len(inserts),
+        "updated": len(updates),
+        "deleted": len(deletes),
+        "unchanged": unchanged,
+        "skipped": counter["skipped"],
+    }
+    elapsed = time.perf_counter() - start
+    print(f"{spec.table}: {result} in {elapsed:.2f}s")
+    result["seconds"] = elapsed
+    return result
+
+
+async def delta_sync(paths: Dict[str, str], cache_dir: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Applies a new CNES release on top of the current database: rows are matched
+    by natural key and only the inserts, changed rows and soft-deletes are written.
+    """
+    keys = KeyIndex()
+    results = {}
+    conn = await connect()
+    try:
+        async with conn.transaction():
+            for spec in TABLE_SPECS:
+                results[spec.table] = await sync_table(conn, spec, paths, keys, cache_dir)
+                if spec.table in keys.maps:
+                    await keys.load_raw(conn, spec.table)
+    finally:
+        await conn.close()
+    return results
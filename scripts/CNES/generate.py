@@ -0,0 +1,318 @@
+import argparse
+import csv
+import os
+import time
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional
+
+# Synthetic CNES release for load tests. The files keep the headers, quoting
+# and value formats of the official export; the natural keys are unique and
+# the foreign keys follow skewed (power-law) distributions, as in the real
+# data where a few mantenedoras and units hold most of the rows.
+
+HEADERS = {
+    "mantenedoras": [
+        "NU_CNPJ_MANTENEDORA", "CO_BANCO", "NU_AGENCIA", "NU_CONTA_CORRENTE", "NO_RAZAO_SOCIAL",
+        "NO_LOGRADOURO", "NU_ENDERECO", "NO_COMPLEMENTO", "NO_BAIRRO", "CO_CEP", "CO_MUNICIPIO",
+        "CO_REGIAO_SAUDE", "NU_TELEFONE", "TO_CHAR(DT_PREENCHIMENTO,'DD/MM/YYYY')", "ST_FMS_FES",
+        "NU_CNPJ_FMS_FES", "CO_NATUREZA_JUR", "TO_CHAR(DT_ATUALIZACAO,'DD/MM/YYYY')", "CO_USUARIO",
+        "CO_GESTOR", "CO_MUNICIPIO_MANT", "TO_CHAR(DT_ATUALIZACAO_ORIGEM,'DD/MM/YYYY')",
+    ],
+    "estabelecimentos": [
+        "CO_UNIDADE", "CO_CNES", "NU_CNPJ_MANTENEDORA", "TP_PFPJ", "NIVEL_DEP", "NO_RAZAO_SOCIAL",
+        "NO_FANTASIA", "NO_LOGRADOURO", "NU_ENDERECO", "NO_COMPLEMENTO", "NO_BAIRRO", "CO_CEP",
+        "CO_REGIAO_SAUDE", "CO_MICRO_REGIAO", "CO_DISTRITO_SANITARIO", "CO_DISTRITO_ADMINISTRATIVO",
+        "NU_TELEFONE", "NU_FAX", "NO_EMAIL", "NU_CPF", "NU_CNPJ", "CO_ATIVIDADE", "CO_CLIENTELA",
+        "NU_ALVARA", "DT_EXPEDICAO", "TP_ORGAO_EXPEDIDOR", "DT_VAL_LIC_SANI", "TP_LIC_SANI",
+        "TP_UNIDADE", "CO_TURNO_ATENDIMENTO", "CO_ESTADO_GESTOR", "CO_MUNICIPIO_GESTOR",
+        "TO_CHAR(DT_ATUALIZACAO,'DD/MM/YYYY')", "CO_USUARIO", "CO_CPFDIRETORCLN", "REG_DIRETORCLN",
+        "ST_ADESAO_FILANTROP", "CO_MOTIVO_DESAB", "NO_URL", "NU_LATITUDE", "NU_LONGITUDE",
+        "TO_CHAR(DT_ATU_GEO,'DD/MM/YYYY')", "NO_USUARIO_GEO", "CO_NATUREZA_JUR", "TP_ESTAB_SEMPRE_ABERTO",
+        "ST_GERACREDITO_GERENTE_SGIF", "ST_CONEXAO_INTERNET", "CO_TIPO_UNIDADE", "NO_FANTASIA_ABREV",
+        "TP_GESTAO", "TO_CHAR(DT_ATUALIZACAO_ORIGEM,'DD/MM/YYYY')", "CO_TIPO_ESTABELECIMENTO",
+        "CO_ATIVIDADE_PRINCIPAL", "ST_CONTRATO_FORMALIZADO", "CO_TIPO_ABRANGENCIA", "ST_COWORKING",
+    ],
+    "equipes": [
+        "CO_MUNICIPIO", "CO_AREA", "SEQ_EQUIPE", "CO_UNIDADE", "TP_EQUIPE", "CO_SUB_TIPO_EQUIPE",
+        "NO_REFERENCIA", "DT_ATIVACAO", "DT_DESATIVACAO", "TP_POP_ASSIST_QUILOMB", "TP_POP_ASSIST_ASSENT",
+        "TP_POP_ASSIST_GERAL", "TP_POP_ASSIST_ESCOLA", "TP_POP_ASSIST_PRONASCI", "TP_POP_ASSIST_INDIGENA",
+        "TP_POP_ASSIST_RIBEIRINHA", "TP_POP_ASSIST_SITUACAO_RUA", "TP_POP_ASSIST_PRIV_LIBERDADE",
+        "TP_POP_ASSIST_CONFLITO_LEI", "TP_POP_ASSIST_ADOL_CONF_LEI", "CO_CNES_UOM", "NU_CH_AMB_UOM",
+        "CD_MOTIVO_DESATIV", "CD_TP_DESATIV", "CO_PROF_SUS_PRECEPTOR", "CO_CNES_PRECEPTOR", "CO_EQUIPE",
+        "TO_CHAR(DT_ATUALIZACAO)", "NO_USUARIO", "TO_CHAR(DT_ATUALIZACAO_ORIGEM)",
+    ],
+    "profissionais": [
+        "CO_PROFISSIONAL_SUS", "CO_CPF", "NO_PROFISSIONAL", "CO_CNS", "TO_CHAR(DT_ATUALIZACAO)",
+        "CO_USUARIO", "ST_NMPROF_CADSUS", "CO_NACIONALIDADE", "CO_SEQ_INCLUSAO",
+        "TO_CHAR(DT_ATUALIZACAO_ORIGEM)", "NO_SOCIAL",
+    ],
+    "equipeprofs": [
+        "CO_MUNICIPIO", "CO_AREA", "SEQ_EQUIPE", "CO_PROFISSIONAL_SUS", "CO_UNIDADE", "CO_CBO",
+        "TP_SUS_NAO_SUS", "IND_VINCULACAO", "CO_MICROAREA", "DT_ENTRADA", "DT_DESLIGAMENTO", "CO_CNES",
+        "_OUTRAEQUIPE", "CO_MUNICIPIO_OUTRAEQUIPE", "CO_AREA_OUTRAEQUIPE", "CO_PROFISSIONAL_SUS_COMPL",
+        "CO_CBO_CH_COMPL", "ST_EQUIPEMINIMA", "CO_MUN_ATUACAO", "TO_CHAR(DT_ATUALIZACAO)", "NO_USUARIO",
+        "TO_CHAR(DT_ATUALIZACAO_ORIGEM)",
+    ],
+}
+
+# file name prefix of each table; the competência is appended (see sources.py)
+FILE_PREFIXES = {
+    "mantenedoras": "tbMantenedora",
+    "estabelecimentos": "tbEstabelecimento",
+    "equipes": "tbEquipe",
+    "profissionais": "tbProf",
+    "equipeprofs": "tbEquipeProf",
+}
+
+# rows of each file per row of tbProf
+SCALE_RATIOS = {
+    "mantenedoras": 0.01,
+    "estabelecimentos": 0.1,
+    "equipes": 0.02,
+    "profissionais": 1.0,
+    "equipeprofs": 0.3,
+}
+
+WRITE_CHUNK = 500_000
+
+FIRST_NAMES = np.array([
+    "MARIA", "JOSE", "ANA", "JOAO", "FRANCISCA", "ANTONIO", "ADRIANA", "CARLOS", "JULIANA", "PAULO",
+    "MARCIA", "PEDRO", "FERNANDA", "LUCAS", "PATRICIA", "MARCOS", "ALINE", "RAFAEL", "SANDRA", "LUIZ",
+])
+LAST_NAMES = np.array([
+    "SILVA", "SANTOS", "OLIVEIRA", "SOUZA", "RODRIGUES", "FERREIRA", "ALVES", "PEREIRA", "LIMA", "GOMES",
+    "COSTA", "RIBEIRO", "MARTINS", "CARVALHO", "ALMEIDA", "LOPES", "SOARES", "FERNANDES", "VIEIRA", "BARBOSA",
+])
+UNIT_NAMES = np.array(["UBS", "USF", "HOSPITAL MUNICIPAL", "CENTRO DE SAUDE", "POLICLINICA", "CAPS", "LABORATORIO"])
+STREETS = np.array(["RUA", "AVENIDA", "TRAVESSA", "PRACA", "RODOVIA"])
+BAIRROS = np.array(["CENTRO", "JARDIM AMERICA", "VILA NOVA", "SAO JOSE", "BOA VISTA", "SANTA LUZIA", "ZONA RURAL"])
+BANKS = np.array(["001", "104", "237", "341", ""])
+TEAM_TYPES = np.array(["70", "71", "72", "73", "76"])
+CBOS = np.array(["225142", "223505", "322245", "515105", "223293", "225125"])
+
+
+def unique_codes(n: int, space: int, seed: int) -> np.ndarray:
+    """`n` distinct integers in [0, space), from an affine permutation (no big shuffle)."""
+    if n > space:
+        raise ValueError(f"{n} códigos não cabem em {space}")
+    stride = 2_654_435_761 % space or 1
+    while np.gcd(stride, space) != 1:
+        stride += 1
+    return (np.arange(n, dtype=np.int64) * stride + seed) % space
+
+
+def skewed_choice(rng: np.random.Generator, size: int, n: int, exponent: float = 2.0) -> np.ndarray:
+    """Indexes in [0, n) where low indexes are much more frequent (power law)."""
+    return np.minimum((n * rng.random(size) ** exponent).astype(np.int64), n - 1)
+
+
+def digits(values: np.ndarray, width: int) -> pd.Series:
+    return pd.Series(values).astype(str).str.zfill(width)
+
+
+def dates(rng: np.random.Generator, size: int, start: str = "2005-01-01", end: str = "2025-01-31") -> pd.Series:
+    first, last = np.datetime64(start), np.datetime64(end)
+    days = rng.integers(0, (last - first).astype(int), size)
+    return pd.Series(first + days.astype('timedelta64[D]')).dt.strftime('%d/%m/%Y')
+
+
+def names(rng: np.random.Generator, size: int) -> pd.Series:
+    return (
+        pd.Series(FIRST_NAMES[rng.integers(0, len(FIRST_NAMES), size)]) + " "
+        + pd.Series(LAST_NAMES[rng.integers(0, len(LAST_NAMES), size)]) + " "
+        + pd.Series(LAST_NAMES[rng.integers(0, len(LAST_NAMES), size)])
+    )
+
+
+def with_orphans(rng: np.random.Generator, keys: pd.Series, rate: float, fake: str) -> pd.Series:
+    """Replaces a fraction `rate` of the foreign keys with keys that exist nowhere."""
+    if rate <= 0:
+        return keys
+    mask = rng.random(len(keys)) < rate
+    return keys.mask(mask, fake + pd.Series(np.arange(len(keys))).astype(str))
+
+
+def frame(table: str, columns: Dict[str, pd.Series], size: int) -> pd.DataFrame:
+    data = {column: columns.get(column, "") for column in HEADERS[table]}
+    result = pd.DataFrame(data, index=range(size))
+    return result.fillna("")
+
+
+def write_frame(result: pd.DataFrame, path: str, header: bool):
+    result.to_csv(
+        path, sep=';', index=False, header=header, mode='w' if header else 'a',
+        quoting=csv.QUOTE_ALL, encoding='latin1', lineterminator='\n'
+    )
+
+
+class Generator:
+    def __init__(self, rows: int, seed: int = 42, orphan_rate: float = 0.001):
+        self.rng = np.random.default_rng(seed)
+        self.seed = seed
+        self.orphan_rate = orphan_rate
+        self.sizes = {table: max(int(rows * ratio), 1) for table, ratio in SCALE_RATIOS.items()}
+        # natural keys of the parents, referenced by the child files
+        self.keys: Dict[str, pd.Series] = {}
+
+    def mantenedoras(self) -> pd.DataFrame:
+        n = self.sizes["mantenedoras"]
+        rng = self.rng
+        cnpj = digits(unique_codes(n, 10**8, self.seed), 8) + "0001" + digits(rng.integers(0, 100, n), 2)
+        municipio = digits(rng.integers(110000, 530000, n), 6)
+        self.keys["mantenedoras"] = cnpj
+        update = dates(rng, n)
+        return frame("mantenedoras", {
+            "NU_CNPJ_MANTENEDORA": cnpj,
+            "CO_BANCO": pd.Series(BANKS[rng.integers(0, len(BANKS), n)]),
+            "NU_AGENCIA": digits(rng.integers(0, 10**5, n), 5),
+            "NU_CONTA_CORRENTE": digits(rng.integers(0, 10**6, n), 6),
+            "NO_RAZAO_SOCIAL": "PREFEITURA MUNICIPAL DE " + pd.Series(BAIRROS[rng.integers(0, len(BAIRROS), n)]) + " " + municipio,
+            "NO_LOGRADOURO": pd.Series(STREETS[rng.integers(0, len(STREETS), n)]) + " " + pd.Series(LAST_NAMES[rng.integers(0, len(LAST_NAMES), n)]),
+            "NU_ENDERECO": pd.Series(rng.integers(1, 3000, n)).astype(str),
+            "NO_BAIRRO": "CENTRO",
+            "CO_CEP": digits(rng.integers(10**7, 10**8 - 1, n), 8),
+            "CO_MUNICIPIO": municipio,
+            "NU_TELEFONE": digits(rng.integers(11, 99, n), 2) + " " + digits(rng.integers(0, 10**8, n), 8),
+            "TO_CHAR(DT_PREENCHIMENTO,'DD/MM/YYYY')": dates(rng, n),
+            "ST_FMS_FES": "M",
+            "CO_NATUREZA_JUR": "1244",
+            "TO_CHAR(DT_ATUALIZACAO,'DD/MM/YYYY')": update,
+            "CO_USUARIO": "SCNES",
+            "CO_GESTOR": municipio,
+            "CO_MUNICIPIO_MANT": municipio,
+        }, n)
+
+    def estabelecimentos(self) -> pd.DataFrame:
+        n = self.sizes["estabelecimentos"]
+        rng = self.rng
+        cnes = digits(unique_codes(n, 10**7, self.seed), 7)
+        municipio = digits(rng.integers(110000, 530000, n), 6)
+        unidade = municipio + cnes
+        self.keys["estabelecimentos"] = unidade
+        mantenedoras = self.keys["mantenedoras"]
+        cnpj = mantenedoras.iloc[skewed_choice(rng, n, len(mantenedoras))].reset_index(drop=True)
+        cnpj = with_orphans(rng, cnpj, self.orphan_rate, "X")
+        latitude = pd.Series(rng.uniform(-33.7, 5.2, n)).round(7).astype(str)
+        longitude = pd.Series(rng.uniform(-73.9, -34.8, n)).round(7).astype(str)
+        without_geo = rng.random(n) < 0.1
+        fantasia = pd.Series(UNIT_NAMES[rng.integers(0, len(UNIT_NAMES), n)]) + " " + pd.Series(BAIRROS[rng.integers(0, len(BAIRROS), n)])
+        return frame("estabelecimentos", {
+            "CO_UNIDADE": unidade,
+            "CO_CNES": cnes,
+            "NU_CNPJ_MANTENEDORA": cnpj,
+            "TP_PFPJ": "3",
+            "NIVEL_DEP": "3",
+            "NO_RAZAO_SOCIAL": "PREFEITURA MUNICIPAL " + municipio,
+            "NO_FANTASIA": fantasia,
+            "NO_LOGRADOURO": pd.Series(STREETS[rng.integers(0, len(STREETS), n)]) + " " + pd.Series(LAST_NAMES[rng.integers(0, len(LAST_NAMES), n)]),
+            "NU_ENDERECO": pd.Series(rng.integers(1, 3000, n)).astype(str),
+            "NO_BAIRRO": pd.Series(BAIRROS[rng.integers(0, len(BAIRROS), n)]),
+            "CO_CEP": digits(rng.integers(10**7, 10**8 - 1, n), 8),
+            "NU_TELEFONE": "(" + digits(rng.integers(11, 99, n), 2) + ")" + digits(rng.integers(0, 10**8, n), 8),
+            "TP_UNIDADE": digits(rng.integers(1, 80, n), 2),
+            "CO_ESTADO_GESTOR": municipio.str[:2],
+            "CO_MUNICIPIO_GESTOR": municipio,
+            "TO_CHAR(DT_ATUALIZACAO,'DD/MM/YYYY')": dates(rng, n),
+            "CO_USUARIO": "SCNES",
+            "NU_LATITUDE": latitude.mask(without_geo, ""),
+            "NU_LONGITUDE": longitude.mask(without_geo, ""),
+            "CO_NATUREZA_JUR": "1244",
+            "TP_GESTAO": "M",
+        }, n)
+
+    def equipes(self) -> pd.DataFrame:
+        n = self.sizes["equipes"]
+        rng = self.rng
+        seq = pd.Series(unique_codes(n, 10**7, self.seed) + 1).astype(str)
+        self.keys["equipes"] = seq
+        units = self.keys["estabelecimentos"]
+        unidade = units.iloc[skewed_choice(rng, n, len(units), 1.5)].reset_index(drop=True)
+        self.team_units = unidade
+        unidade = with_orphans(rng, unidade, self.orphan_rate, "X")
+        return frame("equipes", {
+            "CO_MUNICIPIO": unidade.str[:6],
+            "CO_AREA": pd.Series(rng.integers(1, 100, n)).astype(str),
+            "SEQ_EQUIPE": seq,
+            "CO_UNIDADE": unidade,
+            "TP_EQUIPE": pd.Series(TEAM_TYPES[rng.integers(0, len(TEAM_TYPES), n)]),
+            "NO_REFERENCIA": "EQUIPE " + seq,
+            "DT_ATIVACAO": dates(rng, n),
+            "CO_EQUIPE": seq,
+            "TO_CHAR(DT_ATUALIZACAO)": dates(rng, n),
+            "NO_USUARIO": "SCNES",
+        }, n)
+
+    def profissionais(self) -> pd.DataFrame:
+        n = self.sizes["profissionais"]
+        rng = self.rng
+        codes = unique_codes(n, 16**15, self.seed)
+        code = pd.Series(codes).map(lambda value: f"{value:016X}")
+        self.keys["profissionais"] = code
+        return frame("profissionais", {
+            "CO_PROFISSIONAL_SUS": code,
+            "CO_CPF": "CO_CPF",
+            "NO_PROFISSIONAL": names(rng, n),
+            "CO_CNS": "70" + digits(rng.integers(0, 10**13, n), 13),
+            "TO_CHAR(DT_ATUALIZACAO)": dates(rng, n),
+            "CO_USUARIO": "SCNES",
+        }, n)
+
+    def equipeprofs(self) -> pd.DataFrame:
+        n = self.sizes["equipeprofs"]
+        rng = self.rng
+        teams = skewed_choice(rng, n, len(self.keys["equipes"]), 1.5)
+        seq = self.keys["equipes"].iloc[teams].reset_index(drop=True)
+        unidade = self.team_units.iloc[teams].reset_index(drop=True)
+        profs = self.keys["profissionais"]
+        prof = profs.iloc[rng.integers(0, len(profs), n)].reset_index(drop=True)
+        seq = with_orphans(rng, seq, self.orphan_rate / 2, "X")
+        prof = with_orphans(rng, prof, self.orphan_rate / 2, "X")
+        return frame("equipeprofs", {
+            "CO_MUNICIPIO": unidade.str[:6],
+            "CO_AREA": pd.Series(rng.integers(1, 100, n)).astype(str),
+            "SEQ_EQUIPE": seq,
+            "CO_PROFISSIONAL_SUS": prof,
+            "CO_UNIDADE": unidade,
+            "CO_CBO": pd.Series(CBOS[rng.integers(0, len(CBOS), n)]),
+            "TP_SUS_NAO_SUS": "S",
+            "IND_VINCULACAO": "10301",
+            "DT_ENTRADA": dates(rng, n),
+            "CO_CBO_CH_COMPL": "1",
+            "TO_CHAR(DT_ATUALIZACAO)": dates(rng, n),
+            "NO_USUARIO": "CNES",
+        }, n)
+
+    def write(self, out_dir: str, competencia: str) -> Dict[str, str]:
+        """Writes the five files (parents first: children sample their keys)."""
+        os.makedirs(out_dir, exist_ok=True)
+        paths = {}
+        for table in HEADERS:
+            start = time.perf_counter()
+            result = getattr(self, table)()
+            path = os.path.join(out_dir, f"{FILE_PREFIXES[table]}{competencia}.csv")
+            for offset in range(0, max(len(result), 1), WRITE_CHUNK):
+                write_frame(result.iloc[offset:offset + WRITE_CHUNK], path, header=offset == 0)
+            paths[table] = path
+            print(f"{os.path.basename(path)}: {len(result)} rows in {time.perf_counter() - start:.2f}s")
+            del result
+        return paths
+
+
+def generate(out_dir: str, rows: int, competencia: str = "202501", seed: int = 42, orphan_rate: float = 0.001) -> Dict[str, str]:
+    return Generator(rows, seed, orphan_rate).write(out_dir, competencia)
+
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Gera arquivos sintéticos no formato do CNES")
+    parser.add_argument("out_dir", help="diretório de saída")
+    parser.add_argument("--rows", type=int, default=100_000, help="linhas do tbProf; os demais arquivos seguem proporções fixas")
+    parser.add_argument("--competencia", default="202501")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--orphan-rate", type=float, default=0.001, help="fração de chaves estrangeiras inexistentes")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    generate(args.out_dir, args.rows, args.competencia, args.seed, args.orphan_rate)
@@ -0,0 +1,130 @@
+import uuid
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.import_run import ImportRun
+from scripts.CNES.cache import file_digest
+from scripts.CNES.sources import source_name
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+
+
+class ImportJournal:
+    """
+    Progress of one ORM import run, kept in import_runs. The caller commits
+    every checkpoint together with the rows of the chunk it describes (the
+    import writes them in savepoints of that one transaction), so the journal
+    never gets ahead of (or behind) the committed data.
+    """
+
+    def __init__(self, session: AsyncSession, run_id: str, entries: Dict[str, ImportRun]):
+        self.session = session
+        self.run_id = run_id
+        self.state = {
+            table: {
+                "rows_committed": entry.rows_committed,
+                "rows_written": entry.rows_written,
+                "rows_skipped": entry.rows_skipped,
+                "status": entry.status,
+            }
+            for table, entry in entries.items()
+        }
+
+    @classmethod
+    async def start(cls, session: AsyncSession, paths: Dict[str, str], tables: Iterable[str]) -> "ImportJournal":
+        run_id = uuid.uuid4().hex[:12]
+        entries = {}
+        for table in tables:
+            entries[table] = ImportRun(
+                run_id=run_id,
+                table_name=table,
+                source_file=source_name(paths[table]),
+                file_hash=file_digest(paths[table]),
+                rows_committed=0,
+                rows_written=0,
+                rows_skipped=0,
+                status=PENDING
+            )
+            session.add(entries[table])
+        await session.commit()
+        print(f"Import run {run_id} started")
+        return cls(session, run_id, entries)
+
+    @classmethod
+    async def resume(cls, session: AsyncSession, paths: Dict[str, str], run_id: Optional[str] = None) -> "ImportJournal":
+        """
+        Reopens `run_id`, or the latest unfinished run. Refuses to resume when a
+        source file changed since the run started.
+        """
+        if run_id is None:
+            query = (
+                select(ImportRun.run_id)
+                .where(ImportRun.status != DONE)
+                .order_by(ImportRun.created_at.desc())
+                .limit(1)
+            )
+            run_id = (await session.execute(query)).scalar_one_or_none()
+            if run_id is None:
+                raise ValueError("Nenhuma importação pendente para retomar")
+
+        result = await session.execute(select(ImportRun).where(ImportRun.run_id == run_id))
+        entries = {entry.table_name: entry for entry in result.scalars().all()}
+        if not entries:
+            raise ValueError(f"Importação {run_id} não encontrada")
+        for table, entry in entries.items():
+            if entry.status != DONE and file_digest(paths[table]) != entry.file_hash:
+                raise ValueError(f"O arquivo de {table} mudou desde o início da importação {run_id}")
+
+        print(f"Resuming import run {run_id}")
+        return cls(session, run_id, entries)
+
+    def is_done(self, table: str) -> bool:
+        return self.state[table]["status"] == DONE
+
+    def pending_chunks(self, table: str, chunks: Iterable[List]) -> Iterator[Tuple[int, List]]:
+        """
+        Yields (offset, chunk) for the rows not committed yet; the offset is the
+        position of the chunk's first row in the source file.
+        """
+        committed = self.state[table]["rows_committed"]
+        offset = 0
+        for chunk in chunks:
+            end = offset + len(chunk)
+            if end > committed:
+                start = max(committed - offset, 0)
+                yield offset + start, chunk[start:]
+            offset = end
+
+    async def checkpoint(self, table: str, end: int, written: int, skipped: int):
+        """Records the chunk ending at row `end`; the caller commits it with the chunk."""
+        state = self.state[table]
+        state["rows_committed"] = end
+        state["rows_written"] += written
+        state["rows_skipped"] += skipped
+        state["status"] = RUNNING
+        await self._save(table)
+
+    async def finish(self, table: str):
+        self.state[table]["status"] = DONE
+        await self._save(table)
+        await self.session.commit()
+
+    async def _save(self, table: str):
+        await self.session.execute(
+            update(ImportRun)
+            .where(ImportRun.run_id == self.run_id, ImportRun.table_name == table)
+            .values(**self.state[table])
+        )
+
+
+async def run_status(session: AsyncSession, run_id: Optional[str] = None) -> List[ImportRun]:
+    """Journal rows of `run_id`, or of the latest run."""
+    if run_id is None:
+        latest = select(ImportRun.run_id).order_by(ImportRun.created_at.desc()).limit(1)
+        run_id = (await session.execute(latest)).scalar_one_or_none()
+    result = await session.execute(
+        select(ImportRun).where(ImportRun.run_id == run_id).order_by(ImportRun.id)
+    )
+    return list(result.scalars().all())
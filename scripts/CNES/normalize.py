@@ -0,0 +1,62 @@
+import pandas as pd
+from typing import Dict, List
+
+# Bump when the output of normalize_frame changes, to invalidate cached files
+NORMALIZE_VERSION = 2
+
+# Column-wise normalization of the raw CNES frames, keyed by source file.
+# Everything runs as pandas vector operations, once per frame, before the
+# rows are turned into records for the writers.
+DATE_COLUMNS = {
+    "mantenedoras": ["TO_CHAR(DT_PREENCHIMENTO,'DD/MM/YYYY')"],
+    "equipeprofs": ["DT_ENTRADA", "DT_DESLIGAMENTO"],
+}
+DIGIT_COLUMNS = {
+    "mantenedoras": ["NU_TELEFONE", "CO_CEP"],
+    "estabelecimentos": ["NU_TELEFONE", "CO_CEP"],
+}
+COORDINATE_COLUMNS = {
+    "estabelecimentos": {"NU_LATITUDE": 90, "NU_LONGITUDE": 180},
+}
+
+
+def _blank_to_na(series: pd.Series) -> pd.Series:
+    return series.mask(series == "")
+
+
+def normalize_frame(source: str, frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Trims every text column (blank -> NA), parses the date columns, keeps only
+    the digits of phones/CEPs and validates the coordinates.
+    """
+    for column in frame.columns:
+        if pd.api.types.is_string_dtype(frame[column]):
+            frame[column] = _blank_to_na(frame[column].str.strip())
+
+    for column in DATE_COLUMNS.get(source, []):
+        if column in frame:
+            frame[column] = pd.to_datetime(frame[column], format='%d/%m/%Y', errors='coerce')
+
+    for column in DIGIT_COLUMNS.get(source, []):
+        if column in frame:
+            frame[column] = _blank_to_na(frame[column].str.replace(r'\D+', '', regex=True))
+
+    for column, limit in COORDINATE_COLUMNS.get(source, {}).items():
+        if column in frame:
+            values = pd.to_numeric(frame[column].str.replace(',', '.', regex=False), errors='coerce')
+            frame[column] = values.where(values.abs() <= limit)
+
+    return frame
+
+
+def to_python(frame: pd.DataFrame) -> pd.DataFrame:
+    """Object frame with plain datetimes and None in place of NA/NaT."""
+    frame = frame.copy()
+    for column in frame.select_dtypes(include=["datetime", "datetimetz"]).columns:
+        frame[column] = pd.Series(frame[column].dt.to_pydatetime(), index=frame.index, dtype=object)
+    frame = frame.astype(object)
+    return frame.where(frame.notna(), None)
+
+
+def frame_to_dicts(frame: pd.DataFrame) -> List[Dict]:
+    return to_python(frame).to_dict(orient='records')
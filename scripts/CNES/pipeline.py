@@ -0,0 +1,188 @@
+import asyncio
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+from scripts.CNES.bulk_loader import LoadStats, connect, copy_records, resolve_records, unique_records
+from scripts.CNES.cache import open_cached
+from scripts.CNES.normalize import normalize_frame
+from scripts.CNES.reader import DEFAULT_CHUNK_SIZE, parse_csv_text
+from scripts.CNES.resolution import KeyIndex
+from scripts.CNES.sources import Source, ZipMember, open_source
+from scripts.CNES.transform import SPECS_BY_TABLE, TABLE_SPECS
+
+DEFAULT_RANGE_BYTES = 32 * 1024 * 1024
+DEFAULT_QUEUE_SIZE = 4
+
+
+def split_file(file_path: str, range_bytes: int = DEFAULT_RANGE_BYTES) -> List[Tuple[int, int]]:
+    """
+    Splits a CSV file into byte ranges that start and end on line boundaries,
+    skipping the header, so each range can be parsed on its own
+    (CNES exports never have line breaks inside quoted fields).
+    """
+    size = os.path.getsize(file_path)
+    ranges = []
+    with open(file_path, 'rb') as f:
+        f.readline()
+        start = f.tell()
+        while start < size:
+            f.seek(min(start + range_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def read_header(f) -> List[str]:
+    return next(csv.reader([f.readline().decode('latin1')], delimiter=';'))
+
+
+def stream_blocks(f, range_bytes: int) -> Iterator[str]:
+    """
+    Line-aligned text blocks of about `range_bytes` from a stream positioned
+    after the header, for sources that cannot be split by offset (zip members).
+    """
+    while block := f.read(range_bytes):
+        block += f.readline()
+        yield block.decode('latin1')
+
+
+def transform_text(table: str, header: List[str], data: str) -> Tuple[List[Tuple], int]:
+    """
+    Runs in a worker process: parses a block of lines and transforms its rows.
+    Returns the records and how many rows were dropped for lacking a key.
+    """
+    spec = SPECS_BY_TABLE[table]
+    frame = normalize_frame(spec.source, parse_csv_text(data, header))
+    records = spec.records(frame)
+    return records, len(frame) - len(records)
+
+
+def transform_range(table: str, file_path: str, start: int, end: int) -> Tuple[List[Tuple], int]:
+    """Runs in a worker process: transforms one byte range of a plain file."""
+    with open(file_path, 'rb') as f:
+        header = read_header(f)
+        f.seek(start)
+        data = f.read(end - start).decode('latin1')
+    return transform_text(table, header, data)
+
+
+async def produce_stream(
+    pool: ProcessPoolExecutor,
+    queue: asyncio.Queue,
+    table: str,
+    source: Source,
+    workers: int,
+    range_bytes: int
+):
+    # the member is decompressed sequentially, off the event loop; each block
+    # is parsed in the pool while the next ones are read
+    loop = asyncio.get_running_loop()
+    with open_source(source) as f:
+        header = await loop.run_in_executor(None, read_header, f)
+        blocks = stream_blocks(f, range_bytes)
+        while True:
+            futures = []
+            for _ in range(workers):
+                data = await loop.run_in_executor(None, next, blocks, None)
+                if data is None:
+                    break
+                futures.append(loop.run_in_executor(pool, transform_text, table, header, data))
+            for future in futures:
+                await queue.put(await future)
+            if len(futures) < workers:
+                break
+    await queue.put(None)
+
+
+async def produce(
+    pool: ProcessPoolExecutor,
+    queue: asyncio.Queue,
+    table: str,
+    file_path: Source,
+    workers: int,
+    range_bytes: int,
+    cache_dir: Optional[str] = None
+):
+    spec = SPECS_BY_TABLE[table]
+    cached = open_cached(file_path, spec.source, cache_dir) if cache_dir else None
+    if cached is not None:
+        # already normalized: the mapped batches skip the CSV parsing entirely
+        for batch in cached.to_batches(max_chunksize=DEFAULT_CHUNK_SIZE):
+            await queue.put((spec.records(batch.to_pandas()), 0))
+        await queue.put(None)
+        return
+
+    if isinstance(file_path, ZipMember):
+        await produce_stream(pool, queue, table, file_path, workers, range_bytes)
+        return
+
+    loop = asyncio.get_running_loop()
+    ranges = split_file(file_path, range_bytes)
+    # at most `workers` ranges of the same file in flight; the bounded queue
+    # holds parsed batches until the writer reaches this table
+    for i in range(0, len(ranges), workers):
+        futures = [
+            loop.run_in_executor(pool, transform_range, table, file_path, start, end)
+            for start, end in ranges[i:i + workers]
+        ]
+        for future in futures:
+            await queue.put(await future)
+    await queue.put(None)
+
+
+async def write(queues: Dict[str, asyncio.Queue], stats: LoadStats):
+    """Consumes the parsed batches table by table, in FK order."""
+    keys = KeyIndex()
+    conn = await connect()
+    try:
+        async with conn.transaction():
+            for spec in TABLE_SPECS:
+                start = time.perf_counter()
+                counter = {"skipped": 0}
+                seen = set()
+                rows = 0
+                while (batch := await queues[spec.table].get()) is not None:
+                    batch, dropped = batch
+                    counter["skipped"] += dropped
+                    records = unique_records(spec, resolve_records(spec, batch, keys, counter), counter, seen)
+                    rows += await copy_records(conn, spec.table, spec.copy_columns, spec.hashed(records))
+                stats.record(spec.table, rows, counter["skipped"], time.perf_counter() - start)
+                if spec.table in keys.maps:
+                    await keys.load_raw(conn, spec.table)
+    finally:
+        await conn.close()
+
+
+async def run_pipeline(
+    paths: Dict[str, str],
+    workers: int = os.cpu_count() or 1,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    range_bytes: int = DEFAULT_RANGE_BYTES,
+    cache_dir: Optional[str] = None
+) -> LoadStats:
+    """
+    Bulk load with parsing spread over a process pool. Every file is parsed
+    concurrently (tbProf is parsed while tbEstabelecimento is being written),
+    while a single writer applies the batches in FK order. Files with a warm
+    columnar cache are read from it instead of being sent to the pool.
+    """
+    stats = LoadStats()
+    queues = {spec.table: asyncio.Queue(maxsize=queue_size) for spec in TABLE_SPECS}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        producers = [
+            asyncio.create_task(
+                produce(pool, queues[spec.table], spec.table, paths[spec.source], workers, range_bytes, cache_dir)
+            )
+            for spec in TABLE_SPECS
+        ]
+        try:
+            await write(queues, stats)
+            await asyncio.gather(*producers)
+        finally:
+            for producer in producers:
+                producer.cancel()
+    return stats
@@ -1,9 +1,12 @@
-import pandas as pd
+import argparse
 import asyncio
-from datetime import datetime
-from typing import Dict, List
+import tempfile
+import time
+from contextlib import ExitStack
+from typing import Dict, List, Optional
 import os
 from fastapi import HTTPException
+from core.cache import response_cache
 from core.database import get_direct_session, init_models
 from repositories.equipe import EquipeRepository
 from repositories.equipeprofs import EquipeProfRepository
@@ -11,32 +14,36 @@ from repositories.mantenedora import MantenedoraRepository
 from repositories.estabelecimento import EstabelecimentoRepository
 from repositories.endereco import EnderecoRepository
 from repositories.profissional import ProfissionalRepository
+from scripts.CNES.bulk_loader import LoadStats, bulk_load
+from scripts.CNES.delta_sync import delta_sync
+from scripts.CNES.journal import ImportJournal, run_status
+from scripts.CNES.pipeline import run_pipeline
+from scripts.CNES.reader import DEFAULT_CHUNK_SIZE, read_csv_chunks
+from scripts.CNES.resolution import KeyIndex
+from scripts.CNES.sources import Source, dir_sources, zip_sources
+from scripts.CNES.staging import staging_import
+from scripts.CNES.transform import TABLE_SPECS
+from scripts.CNES.validate import has_errors, validate, write_report
 
-def read_csv_file(file_path: str) -> List[Dict]:
-    return pd.read_csv(file_path, sep=';', dtype="str", encoding='latin1', lineterminator="\n").to_dict(orient='records')
+SOURCE_FILES = {
+    "mantenedoras": 'tbMantenedora202501.csv',
+    "estabelecimentos": 'tbEstabelecimento202501.csv',
+    "equipes": 'tbEquipe.csv',
+    "profissionais": 'tbProf.csv',
+    "equipeprofs": 'tbEquipeProf.csv',
+}
 
 async def create_mantenedora(repo: MantenedoraRepository, data: Dict) -> Dict:
     try:
-        date_str = data["TO_CHAR(DT_PREENCHIMENTO,'DD/MM/YYYY')"]
-        if date_str:
-            try:
-                created_date = datetime.strptime(date_str, '%d/%m/%Y')
-            except ValueError:
-                created_date = None
-        else:
-            created_date = None
-
-        print("\n\n")
-        print(data)
-        print("\n\n")
+        # values come already normalized by scripts.CNES.normalize
         mantenedora = {
-            "cnpj_mantenedora": str(data["NU_CNPJ_MANTENEDORA"]),
-            "nome_razao_social_mantenedora": str(data["NO_RAZAO_SOCIAL"]),
-            "numero_telefone_mantenedora": str(data["NU_TELEFONE"]),
-            "codigo_banco": str(data["CO_BANCO"]),
-            "numero_agencia": str(data["NU_AGENCIA"]), 
-            "numero_conta_corrente": str(data["NU_CONTA_CORRENTE"]),
-            "data_criacao_mantenedora": created_date
+            "cnpj_mantenedora": data["NU_CNPJ_MANTENEDORA"],
+            "nome_razao_social_mantenedora": data["NO_RAZAO_SOCIAL"] or "",
+            "numero_telefone_mantenedora": data["NU_TELEFONE"],
+            "codigo_banco": data["CO_BANCO"],
+            "numero_agencia": data["NU_AGENCIA"],
+            "numero_conta_corrente": data["NU_CONTA_CORRENTE"],
+            "data_criacao_mantenedora": data["TO_CHAR(DT_PREENCHIMENTO,'DD/MM/YYYY')"]
         }
 
         return await repo.create(mantenedora)
@@ -47,47 +54,39 @@ async def create_mantenedora(repo: MantenedoraRepository, data: Dict) -> Dict:
 async def create_estabelecimento_with_endereco(
     estab_repo: EstabelecimentoRepository,
     end_repo: EnderecoRepository,
-    estab_data: Dict,
-    mant_data: Dict
+    estab_data: Dict
 ) -> Dict:
     try:
         estabelecimento = {
-            "codigo_unidade": str(estab_data["CO_UNIDADE"]),
-            "codigo_cnes": str(estab_data["CO_CNES"]),
-            "cnpj_mantenedora": str(mant_data["NU_CNPJ_MANTENEDORA"]),
-            "nome_razao_social_estabelecimento": str(estab_data["NO_RAZAO_SOCIAL"]),
-            "nome_fantasia_estabelecimento": str(estab_data["NO_FANTASIA"]),
-            "numero_telefone_estabelecimento": str(estab_data["NU_TELEFONE"]),
-            "email_estabelecimento": str(estab_data.get("NO_EMAIL"))
+            "codigo_unidade": estab_data["CO_UNIDADE"],
+            "codigo_cnes": estab_data["CO_CNES"] or "",
+            "cnpj_mantenedora": estab_data["NU_CNPJ_MANTENEDORA"],
+            "nome_razao_social_estabelecimento": estab_data["NO_RAZAO_SOCIAL"] or "",
+            "nome_fantasia_estabelecimento": estab_data["NO_FANTASIA"] or "",
+            "numero_telefone_estabelecimento": estab_data["NU_TELEFONE"],
+            "email_estabelecimento": estab_data.get("NO_EMAIL")
         }
 
         try:
-            estab_result = await estab_repo.create(estabelecimento)
+            estab_result = await estab_repo.create(estabelecimento, mantenedora_id=estab_data["mantenedora_id"])
             if not estab_result:
                 print(f"Error creating estabelecimento: {estabelecimento['codigo_unidade']}")
                 return None
 
-            # Convert latitude and longitude to float
-            latitude = str(estab_data.get("NU_LATITUDE")) if str(estab_data.get("NU_LATITUDE")) else ""
-            longitude = str(estab_data.get("NU_LONGITUDE")) if str(estab_data.get("NU_LONGITUDE")) else ""
-
             endereco = {
                 "estabelecimento_id": estab_result.id,
-                "latitude": latitude,
-                "longitude": longitude,
-                "cep_estabelecimento": str(estab_data["CO_CEP"]),
-                "bairro": str(estab_data["NO_BAIRRO"]),
-                "logradouro": str(estab_data["NO_LOGRADOURO"]),
-                "numero": str(estab_data["NU_ENDERECO"]),
-                "complemento": str(estab_data["NO_COMPLEMENTO"])
+                "latitude": estab_data.get("NU_LATITUDE"),
+                "longitude": estab_data.get("NU_LONGITUDE"),
+                "cep_estabelecimento": estab_data["CO_CEP"] or "",
+                "bairro": estab_data["NO_BAIRRO"] or "",
+                "logradouro": estab_data["NO_LOGRADOURO"] or "",
+                "numero": estab_data["NU_ENDERECO"],
+                "complemento": estab_data["NO_COMPLEMENTO"]
             }
 
             await end_repo.create(endereco)
             return estab_result
 
-        except ValueError as ve:
-            print(f"Error converting coordinates: {str(ve)}")
-            return None
         except HTTPException as he:
             print(f"HTTP Error: {he.detail}")
             return None
@@ -98,15 +97,14 @@ async def create_estabelecimento_with_endereco(
 
 async def create_equipe(eqipe_repo: EquipeRepository, data: Dict) -> Dict:
     try:
-        print(data)
         equipe = {
-            "codigo_equipe": str(data["SEQ_EQUIPE"]),
-            "nome_equipe": data["NO_USUARIO"],
-            "tipo_equipe": str(data["TP_EQUIPE"]),
-            "codigo_unidade": str(data["CO_UNIDADE"])
+            "codigo_equipe": data["SEQ_EQUIPE"],
+            "nome_equipe": data["NO_USUARIO"] or "",
+            "tipo_equipe": data["TP_EQUIPE"] or "",
+            "codigo_unidade": data["CO_UNIDADE"]
         }
 
-        return await eqipe_repo.create(equipe)
+        return await eqipe_repo.create(equipe, estabelecimento_id=data["estabelecimento_id"])
     except Exception as e:
         print(f"Error creating equipe: {str(e)}")
         return None
@@ -114,10 +112,10 @@ async def create_equipe(eqipe_repo: EquipeRepository, data: Dict) -> Dict:
 async def create_profissional(profRepo: ProfissionalRepository, data: Dict) -> Dict:
     try:
         profissional = {
-            "codigo_profissional_sus": str(data["CO_PROFISSIONAL_SUS"]),
-            "nome_profissional": data["NO_PROFISSIONAL"],
-            "codigo_cns": str(data["CO_CNS"]),
-            "situacao_profissional_cadsus": str(data["ST_NMPROF_CADSUS"]),
+            "codigo_profissional_sus": data["CO_PROFISSIONAL_SUS"],
+            "nome_profissional": data["NO_PROFISSIONAL"] or "",
+            "codigo_cns": data["CO_CNS"] or "",
+            "situacao_profissional_cadsus": data["ST_NMPROF_CADSUS"] or "",
         }
 
         return await profRepo.create(profissional)
@@ -128,57 +126,271 @@ async def create_profissional(profRepo: ProfissionalRepository, data: Dict) -> D
 async def create_equipe_profissional(repo: EquipeProfRepository, data: Dict) -> Dict:
     try:
         equipe_profissional = {
-            "codigo_equipe": str(data["SEQ_EQUIPE"]),
-            "codigo_profissional_sus": str(data["CO_PROFISSIONAL_SUS"])
+            "codigo_equipe": data["SEQ_EQUIPE"],
+            "codigo_profissional_sus": data["CO_PROFISSIONAL_SUS"]
         }
 
-        return await repo.create(equipe_profissional)
+        return await repo.create(
+            equipe_profissional,
+            equipe_id=data["equipe_id"],
+            profissional_id=data["profissional_id"]
+        )
     except Exception as e:
         print(f"Error creating equipe profissional: {str(e)}")
         return None
 
-async def main():
-    await init_models()
-    
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    mantenedoras = read_csv_file(os.path.join(current_dir, 'tbMantenedora202501.csv'))
-    estabelecimentos = read_csv_file(os.path.join(current_dir, 'tbEstabelecimento202501.csv'))
-    equipes = read_csv_file(os.path.join(current_dir, 'tbEquipe.csv'))
-    profissionais = read_csv_file(os.path.join(current_dir, 'tbProf.csv'))
-    equipeprofs = read_csv_file(os.path.join(current_dir, 'tbEquipeProf.csv'))
-    
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Popula o banco com os arquivos do CNES")
+    parser.add_argument(
+        "--mode",
+        choices=["orm", "bulk", "delta", "staging"],
+        default="orm",
+        help=(
+            "orm: insere linha a linha pelos repositórios; bulk: carga via COPY (banco vazio); "
+            "delta: aplica só as inclusões, alterações e exclusões lógicas de uma nova competência; "
+            "staging: copia os arquivos para tabelas de staging e faz o merge em SQL, guardando as linhas recusadas"
+        )
+    )
+    parser.add_argument("--data-dir", default=os.path.dirname(os.path.abspath(__file__)))
+    parser.add_argument(
+        "--zip",
+        default=None,
+        help="arquivo BASE_DE_DADOS_CNES_AAAAMM.zip; os CSVs são lidos direto do zip, sem extração"
+    )
+    parser.add_argument(
+        "--competencia",
+        default=None,
+        help="competência AAAAMM dos arquivos a importar (do zip ou do --data-dir)"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="lê cada arquivo em blocos, com commit e limpeza da sessão a cada bloco"
+    )
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="diretório do cache colunar (Arrow) dos arquivos já lidos e normalizados"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="no modo bulk, processos usados para ler e transformar os arquivos em paralelo"
+    )
+    parser.add_argument(
+        "--resume",
+        nargs="?",
+        const="latest",
+        default=None,
+        metavar="RUN_ID",
+        help="no modo orm, retoma a importação informada (ou a última inacabada) a partir do último bloco gravado"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="só valida os arquivos (chaves ausentes, repetidas e órfãs), sem acessar o banco"
+    )
+    parser.add_argument(
+        "--validate",
+        action="store_true",
+        help="valida os arquivos antes da carga e a interrompe se alguma linha não seria carregada"
+    )
+    parser.add_argument(
+        "--allow-invalid",
+        action="store_true",
+        help="com --validate, carrega mesmo assim (as linhas inválidas são descartadas)"
+    )
+    parser.add_argument("--report", default=None, help="grava o relatório da validação neste arquivo JSON")
+    parser.add_argument(
+        "--status",
+        nargs="?",
+        const="latest",
+        default=None,
+        metavar="RUN_ID",
+        help="mostra o progresso da importação informada (ou da última) e sai"
+    )
+    return parser.parse_args(argv)
+
+async def write_row(session, create, *args) -> bool:
+    """
+    Writes one record in a savepoint of the chunk's transaction: a rejected
+    record is rolled back alone, without the rows written before it.
+    """
+    savepoint = await session.begin_nested()
+    if await create(*args) is None:
+        await savepoint.rollback()
+        return False
+    await savepoint.commit()
+    return True
+
+async def write_mantenedoras(session, keys: KeyIndex, chunk: List[Dict]):
+    mant_repo = MantenedoraRepository(session).within_transaction()
+    written = 0
+    for mant in chunk:
+        written += await write_row(session, create_mantenedora, mant_repo, mant)
+    return written
+
+async def write_estabelecimentos(session, keys: KeyIndex, chunk: List[Dict]):
+    estab_repo = EstabelecimentoRepository(session).within_transaction()
+    end_repo = EnderecoRepository(session).within_transaction()
+    estabelecimentos, orphans = keys.attach(chunk, "mantenedoras", "NU_CNPJ_MANTENEDORA", "mantenedora_id")
+    for estab in orphans:
+        print(f"Warning: Mantenedora not found for estabelecimento {estab['CO_UNIDADE']} with CNPJ {estab['NU_CNPJ_MANTENEDORA']}")
+    written = 0
+    for estab in estabelecimentos:
+        written += await write_row(session, create_estabelecimento_with_endereco, estab_repo, end_repo, estab)
+    return written
+
+async def write_equipes(session, keys: KeyIndex, chunk: List[Dict]):
+    eq_repo = EquipeRepository(session).within_transaction()
+    equipes, orphans = keys.attach(chunk, "estabelecimentos", "CO_UNIDADE", "estabelecimento_id")
+    for equipe in orphans:
+        print(f"Warning: Estabelecimento not found for equipe {equipe['SEQ_EQUIPE']} with CO_UNIDADE {equipe['CO_UNIDADE']}")
+    written = 0
+    for equipe in equipes:
+        written += await write_row(session, create_equipe, eq_repo, equipe)
+    return written
+
+async def write_profissionais(session, keys: KeyIndex, chunk: List[Dict]):
+    prof_repo = ProfissionalRepository(session).within_transaction()
+    written = 0
+    for prof in chunk:
+        written += await write_row(session, create_profissional, prof_repo, prof)
+    return written
+
+async def write_equipeprofs(session, keys: KeyIndex, chunk: List[Dict]):
+    eqprof_repo = EquipeProfRepository(session).within_transaction()
+    equipeprofs, orphans = keys.attach(chunk, "equipes", "SEQ_EQUIPE", "equipe_id")
+    equipeprofs, missing = keys.attach(equipeprofs, "profissionais", "CO_PROFISSIONAL_SUS", "profissional_id")
+    for eqprof in orphans + missing:
+        print(f"Warning: Equipe or profissional not found for equipeprof {eqprof['SEQ_EQUIPE']}/{eqprof['CO_PROFISSIONAL_SUS']}")
+    written = 0
+    for eqprof in equipeprofs:
+        written += await write_row(session, create_equipe_profissional, eqprof_repo, eqprof)
+    return written
+
+# FK order: each table is fully written before the ones that reference it.
+# Writers return how many records of the chunk were written.
+ORM_WRITERS = [
+    ("mantenedoras", write_mantenedoras),
+    ("estabelecimentos", write_estabelecimentos),
+    ("equipes", write_equipes),
+    ("profissionais", write_profissionais),
+    ("equipeprofs", write_equipeprofs),
+]
+
+async def load_orm(
+    paths: Dict[str, Source],
+    chunk_size: Optional[int] = None,
+    cache_dir: Optional[str] = None,
+    resume: Optional[str] = None
+) -> LoadStats:
+    """
+    Imports through the repositories. With a chunk size, each chunk is committed
+    and evicted from the session before the next one is read, so memory stays
+    bounded by the chunk instead of the file.
+
+    Each record is written in its own savepoint and the repositories never
+    commit or roll back, so a chunk commits all of its accepted records
+    together with its checkpoint in the import_runs journal; `resume` (a run
+    id, or "latest") continues a run from its last checkpoint.
+    """
+    stats = LoadStats()
+    keys = KeyIndex()
     async with await get_direct_session() as session:
-        mant_repo = MantenedoraRepository(session)
-        estab_repo = EstabelecimentoRepository(session)
-        end_repo = EnderecoRepository(session)
-        prof_repo = ProfissionalRepository(session)
-        eqprof_repo = EquipeProfRepository(session)
-        eq_repo = EquipeRepository(session)
-
-        for mant in mantenedoras:
-            await create_mantenedora(mant_repo, mant)
-        
-        for estab in estabelecimentos:
-            mant = next((m for m in mantenedoras if (m["NU_CNPJ_MANTENEDORA"]) == (estab["NU_CNPJ_MANTENEDORA"])), None)
-            
-            if not mant:
-                print(f"Warning: Mantenedora not found for estabelecimento {estab['CO_UNIDADE']} with CNPJ {estab['NU_CNPJ_MANTENEDORA']}")
-                continue
-                
-            await create_estabelecimento_with_endereco(estab_repo, end_repo, estab, mant)
-        await session.commit()
-
-        for equipe in equipes:
-            await create_equipe(eq_repo, equipe)
-        await session.commit()
-
-        for prof in profissionais:
-            await create_profissional(prof_repo, prof)
-        await session.commit()
-
-        for eqprof in equipeprofs:
-            await create_equipe_profissional(eqprof_repo, eqprof)
-        await session.commit()
+        if resume:
+            run_id = None if resume == "latest" else resume
+            journal = await ImportJournal.resume(session, paths, run_id)
+        else:
+            journal = await ImportJournal.start(session, paths, [table for table, _ in ORM_WRITERS])
+        for table, write in ORM_WRITERS:
+            if journal.is_done(table):
+                print(f"{table}: already imported, skipping")
+            else:
+                start = time.perf_counter()
+                rows = skipped = 0
+                chunks = read_csv_chunks(paths[table], table, chunk_size, cache_dir)
+                for offset, chunk in journal.pending_chunks(table, chunks):
+                    written = await write(session, keys, chunk)
+                    await journal.checkpoint(table, offset + len(chunk), written, len(chunk) - written)
+                    await session.commit()
+                    session.expunge_all()
+                    rows += written
+                    skipped += len(chunk) - written
+                    del chunk
+                await journal.finish(table)
+                stats.record(table, rows, skipped, time.perf_counter() - start)
+            if table in keys.maps:
+                await keys.load(session, table)
+    return stats
+
+async def print_status(run_id: Optional[str] = None):
+    async with await get_direct_session() as session:
+        entries = await run_status(session, run_id)
+    if not entries:
+        print("Nenhuma importação registrada")
+        return
+    print(f"Import run {entries[0].run_id}")
+    for entry in entries:
+        print(
+            f"  {entry.table_name} ({entry.source_file}): {entry.status}, "
+            f"{entry.rows_committed} rows committed, {entry.rows_written} written, {entry.rows_skipped} skipped"
+        )
+
+async def run(args: argparse.Namespace):
+    """Runs the import described by the command line; returns the loader's stats."""
+    if args.zip:
+        paths = zip_sources(args.zip, args.competencia)
+    elif args.competencia:
+        paths = dir_sources(args.data_dir, args.competencia)
+    else:
+        paths = {table: os.path.join(args.data_dir, name) for table, name in SOURCE_FILES.items()}
+
+    with ExitStack() as stack:
+        cache_dir = args.cache_dir
+        if args.validate and not cache_dir and args.mode != "staging":
+            # the validation parses every file once; the load reads the frames
+            # back from a throwaway columnar cache instead of parsing them again
+            cache_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix="cnes-"))
+
+        if args.dry_run or args.validate:
+            report = validate(paths, cache_dir)
+            if args.report:
+                write_report(report, args.report)
+            if args.dry_run:
+                # non-zero exit when some row would not load, for use in scripts
+                raise SystemExit(1 if has_errors(report) else 0)
+            if has_errors(report) and not args.allow_invalid:
+                raise SystemExit("Carga interrompida: há linhas que não seriam carregadas (use --allow-invalid para carregar mesmo assim)")
+
+        await init_models()
+
+        if args.status:
+            await print_status(None if args.status == "latest" else args.status)
+            return
+
+        stats = await load(args, paths, cache_dir)
+    # the bulk loaders write through asyncpg, out of sight of the ORM session
+    # events, so the API's cached responses are dropped here
+    response_cache.invalidate(*(spec.table for spec in TABLE_SPECS))
+    return stats
+
+async def load(args: argparse.Namespace, paths, cache_dir: Optional[str] = None):
+    if args.mode == "bulk":
+        if args.workers > 1:
+            return await run_pipeline(paths, workers=args.workers, cache_dir=cache_dir)
+        return await bulk_load(paths, cache_dir=cache_dir)
+    if args.mode == "delta":
+        return await delta_sync(paths, cache_dir=cache_dir)
+    if args.mode == "staging":
+        return await staging_import(paths)
+
+    return await load_orm(paths, args.chunk_size if args.stream else None, cache_dir, args.resume)
+
+async def main():
+    await run(parse_args())
 
 if __name__ == "__main__":
     asyncio.run(main())
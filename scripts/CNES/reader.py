@@ -0,0 +1,45 @@
+import io
+import pandas as pd
+from typing import Dict, Iterator, List, Optional
+from scripts.CNES.normalize import frame_to_dicts, normalize_frame
+from scripts.CNES.sources import Source, open_source
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+# Only empty fields are missing values: names such as "NA" must stay text
+CSV_OPTIONS = dict(sep=';', dtype="str", lineterminator="\n", keep_default_na=False, na_values=[""])
+
+
+def read_frames(file_path: Source, chunk_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Yields the file as frames of at most `chunk_size` rows.
+    Without a chunk size the whole file comes as a single frame.
+    """
+    with open_source(file_path) as f:
+        if not chunk_size:
+            yield pd.read_csv(f, encoding='latin1', **CSV_OPTIONS)
+            return
+        with pd.read_csv(f, encoding='latin1', chunksize=chunk_size, **CSV_OPTIONS) as reader:
+            yield from reader
+
+
+def parse_csv_text(text: str, header: List[str]) -> pd.DataFrame:
+    """Parses a headerless slice of a CNES file."""
+    return pd.read_csv(io.StringIO(text), header=None, names=header, **CSV_OPTIONS)
+
+
+def read_normalized(file_path: Source, source: str, chunk_size: Optional[int] = None, cache_dir: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """Normalized frames of a source file, through the columnar cache when `cache_dir` is set."""
+    if cache_dir:
+        # imported here because the cache itself reads through read_frames
+        from scripts.CNES.cache import cached_frames
+        yield from cached_frames(file_path, source, cache_dir, chunk_size or DEFAULT_CHUNK_SIZE)
+        return
+    for frame in read_frames(file_path, chunk_size):
+        yield normalize_frame(source, frame)
+
+
+def read_csv_chunks(file_path: Source, source: str, chunk_size: Optional[int] = None, cache_dir: Optional[str] = None) -> Iterator[List[Dict]]:
+    """Normalized records of a source file, in lists of at most `chunk_size`."""
+    for frame in read_normalized(file_path, source, chunk_size, cache_dir):
+        yield frame_to_dicts(frame)
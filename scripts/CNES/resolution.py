@@ -0,0 +1,71 @@
+from typing import Dict, List, Optional, Tuple
+import asyncpg
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.equipe import Equipe
+from models.estabelecimento import Estabelecimento
+from models.mantenedora import Mantenedora
+from models.profissional import Profissional
+
+# table -> (model, natural key column)
+NATURAL_KEYS = {
+    "mantenedoras": (Mantenedora, "cnpj_mantenedora"),
+    "estabelecimentos": (Estabelecimento, "codigo_unidade"),
+    "equipes": (Equipe, "codigo_equipe"),
+    "profissionais": (Profissional, "codigo_profissional_sus"),
+}
+
+
+class KeyIndex:
+    """
+    Natural key -> id maps used to resolve foreign keys during the import.
+    Each map is built once, with a single query, right after its table is loaded,
+    so no lookup query runs per row.
+    """
+
+    def __init__(self):
+        self.maps: Dict[str, Dict[str, int]] = {table: {} for table in NATURAL_KEYS}
+
+    async def load(self, session: AsyncSession, table: str) -> Dict[str, int]:
+        model, key_column = NATURAL_KEYS[table]
+        result = await session.execute(select(getattr(model, key_column), model.id))
+        self.maps[table] = {key: id for key, id in result.all()}
+        return self.maps[table]
+
+    async def load_raw(self, conn: asyncpg.Connection, table: str) -> Dict[str, int]:
+        _, key_column = NATURAL_KEYS[table]
+        rows = await conn.fetch(f'SELECT {key_column}, id FROM {table}')
+        self.maps[table] = {row[0]: row[1] for row in rows}
+        return self.maps[table]
+
+    def get(self, table: str, key: Optional[str]) -> Optional[int]:
+        return self.maps[table].get(key)
+
+    def attach(self, batch: List[Dict], table: str, key_field: str, id_field: str) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Sets `id_field` on every record of the batch from its `key_field` value.
+        Returns the resolved records and the orphans (key not found in `table`).
+        """
+        ids = self.maps[table]
+        resolved, orphans = [], []
+        for record in batch:
+            id = ids.get(record.get(key_field))
+            if id is None:
+                orphans.append(record)
+                continue
+            record[id_field] = id
+            resolved.append(record)
+        return resolved, orphans
+
+    def resolve(self, record: Tuple, foreign_keys: Dict[int, str]) -> Optional[Tuple]:
+        """
+        Replaces the natural keys at the `foreign_keys` positions of a record
+        with the parent ids. Returns None when a parent is missing.
+        """
+        values = list(record)
+        for position, table in foreign_keys.items():
+            id = self.maps[table].get(values[position])
+            if id is None:
+                return None
+            values[position] = id
+        return tuple(values)
@@ -0,0 +1,100 @@
+import os
+import re
+import zipfile
+from typing import BinaryIO, Dict, Iterable, Optional, Union
+
+# Where the importer reads each table from. A source is either a plain CSV
+# path or a member of the monthly CNES zip (BASE_DE_DADOS_CNES_YYYYMM.zip),
+# which is decompressed as a stream while it is parsed: nothing is
+# extracted to disk.
+
+# table -> file name prefixes, in order of preference. The competência
+# (YYYYMM) follows the prefix in the names of the monthly release.
+SOURCE_PREFIXES = {
+    "mantenedoras": ["tbMantenedora"],
+    "estabelecimentos": ["tbEstabelecimento"],
+    "equipes": ["tbEquipe"],
+    "profissionais": ["tbDadosProfissionalSus", "tbProf"],
+    "equipeprofs": ["rlEstabEquipeProf", "tbEquipeProf"],
+}
+
+
+class ZipMember:
+    """A CSV inside a zip archive. Plain attributes only, so it pickles into worker processes."""
+
+    def __init__(self, zip_path: str, name: str):
+        self.zip_path = zip_path
+        self.name = name
+
+    def open(self) -> BinaryIO:
+        archive = zipfile.ZipFile(self.zip_path)
+        try:
+            # the member stream keeps the archive file open until it is closed
+            return archive.open(self.name)
+        finally:
+            archive.close()
+
+    def info(self) -> zipfile.ZipInfo:
+        with zipfile.ZipFile(self.zip_path) as archive:
+            return archive.getinfo(self.name)
+
+    def __str__(self) -> str:
+        return f"{self.zip_path}!{self.name}"
+
+
+Source = Union[str, ZipMember]
+
+
+def open_source(source: Source) -> BinaryIO:
+    if isinstance(source, ZipMember):
+        return source.open()
+    return open(source, 'rb')
+
+
+def source_name(source: Source) -> str:
+    if isinstance(source, ZipMember):
+        return os.path.basename(source.name)
+    return os.path.basename(source)
+
+
+def source_digest(source: Source) -> Optional[str]:
+    """
+    Content id taken from the zip directory (CRC-32 and size of the member),
+    so a member is identified without decompressing it. None for plain files.
+    """
+    if isinstance(source, ZipMember):
+        info = source.info()
+        return f"zip-{info.CRC:08x}-{info.file_size:x}"
+    return None
+
+
+def match_sources(names: Iterable[str], competencia: Optional[str] = None) -> Dict[str, str]:
+    """
+    Picks, for every table, the CSV among `names` that follows its naming
+    pattern (`<prefix><competencia>.csv`; any competência when none is given).
+    """
+    by_name = {os.path.basename(name).lower(): name for name in names if name.lower().endswith('.csv')}
+    period = re.escape(competencia) if competencia else r"\d{6}"
+    found = {}
+    for table, prefixes in SOURCE_PREFIXES.items():
+        for prefix in prefixes:
+            pattern = re.compile(rf"{prefix.lower()}(?:{period})?\.csv")
+            matches = sorted(name for name in by_name if pattern.fullmatch(name))
+            if matches:
+                # the latest competência when several are present
+                found[table] = by_name[matches[-1]]
+                break
+        else:
+            raise FileNotFoundError(f"Arquivo de {table} não encontrado (competência {competencia or 'qualquer'})")
+    return found
+
+
+def zip_sources(zip_path: str, competencia: Optional[str] = None) -> Dict[str, ZipMember]:
+    with zipfile.ZipFile(zip_path) as archive:
+        names = archive.namelist()
+    return {table: ZipMember(zip_path, name) for table, name in match_sources(names, competencia).items()}
+
+
+def dir_sources(data_dir: str, competencia: str) -> Dict[str, str]:
+    names = os.listdir(data_dir)
+    return {table: os.path.join(data_dir, name) for table, name in match_sources(names, competencia).items()}
@@ -0,0 +1,337 @@
+import asyncpg
+import csv
+import io
+import time
+from typing import Dict, Iterator, List, Tuple
+from models.import_reject import ImportReject
+from scripts.CNES.bulk_loader import LoadStats, connect, copy_records
+from scripts.CNES.sources import Source, open_source
+
+# Set-based import: every CSV is copied as raw text into an UNLOGGED staging
+# table, normalized and validated in SQL, and merged into the final tables.
+# Invalid rows go to import_rejects instead of aborting the transaction.
+
+FUNCTIONS = [
+    """
+    CREATE OR REPLACE FUNCTION cnes_parse_date(value text) RETURNS timestamp
+    LANGUAGE plpgsql IMMUTABLE AS $$
+    BEGIN
+        RETURN to_timestamp(NULLIF(btrim(value), ''), 'DD/MM/YYYY')::timestamp;
+    EXCEPTION WHEN others THEN
+        RETURN NULL;
+    END $$
+    """,
+    # the return type changed from text, which CREATE OR REPLACE cannot do
+    "DROP FUNCTION IF EXISTS cnes_parse_coordinate(text, double precision)",
+    """
+    CREATE OR REPLACE FUNCTION cnes_parse_coordinate(value text, max_abs double precision) RETURNS double precision
+    LANGUAGE plpgsql IMMUTABLE AS $$
+    DECLARE
+        parsed double precision;
+    BEGIN
+        parsed := replace(btrim(value), ',', '.')::double precision;
+        IF abs(parsed) > max_abs THEN
+            RETURN NULL;
+        END IF;
+        RETURN parsed;
+    EXCEPTION WHEN others THEN
+        RETURN NULL;
+    END $$
+    """,
+]
+
+
+def quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _text(column: str) -> str:
+    return f"NULLIF(btrim(s.{quote(column)}), '')"
+
+
+def _required(column: str) -> str:
+    return f"COALESCE({_text(column)}, '')"
+
+
+def _digits(column: str) -> str:
+    return f"NULLIF(regexp_replace(s.{quote(column)}, '\\D', '', 'g'), '')"
+
+
+class StagedTable:
+    """
+    One target table fed from a staging table. `select` builds the normalized
+    rows (aliased `s` for the staging row); `checks` are (condition, reason)
+    pairs that send a row to the reject table; `unique` lists the column sets
+    that must not repeat inside the file (first row wins).
+    """
+
+    def __init__(
+        self,
+        table: str,
+        source: str,
+        columns: Tuple[str, ...],
+        select: str,
+        checks: List[Tuple[str, str]],
+        unique: List[Tuple[str, ...]],
+        conflict: Tuple[str, ...] = None
+    ):
+        self.table = table
+        self.source = source
+        self.columns = columns
+        self.select = select
+        self.checks = checks
+        self.unique = unique
+        self.conflict = conflict
+
+    @property
+    def src(self) -> str:
+        return f"src_{self.table}"
+
+
+STAGED_TABLES = [
+    StagedTable(
+        "mantenedoras", "mantenedoras",
+        (
+            "cnpj_mantenedora", "nome_razao_social_mantenedora", "numero_telefone_mantenedora",
+            "codigo_banco", "numero_agencia", "numero_conta_corrente", "data_criacao_mantenedora",
+        ),
+        f"""
+        SELECT s.stg_row,
+               {_text("NU_CNPJ_MANTENEDORA")} AS cnpj_mantenedora,
+               {_required("NO_RAZAO_SOCIAL")} AS nome_razao_social_mantenedora,
+               {_digits("NU_TELEFONE")} AS numero_telefone_mantenedora,
+               {_text("CO_BANCO")} AS codigo_banco,
+               {_text("NU_AGENCIA")} AS numero_agencia,
+               {_text("NU_CONTA_CORRENTE")} AS numero_conta_corrente,
+               cnes_parse_date(s.{quote("TO_CHAR(DT_PREENCHIMENTO,'DD/MM/YYYY')")}) AS data_criacao_mantenedora
+        FROM stg_mantenedoras s
+        """,
+        [("cnpj_mantenedora IS NULL", "CNPJ da mantenedora ausente")],
+        [("cnpj_mantenedora",)],
+        conflict=("cnpj_mantenedora",)
+    ),
+    StagedTable(
+        "estabelecimentos", "estabelecimentos",
+        (
+            "codigo_unidade", "codigo_cnes", "cnpj_mantenedora", "mantenedora_id",
+            "nome_razao_social_estabelecimento", "nome_fantasia_estabelecimento",
+            "numero_telefone_estabelecimento", "email_estabelecimento",
+        ),
+        f"""
+        SELECT s.stg_row,
+               {_text("CO_UNIDADE")} AS codigo_unidade,
+               {_required("CO_CNES")} AS codigo_cnes,
+               {_text("NU_CNPJ_MANTENEDORA")} AS cnpj_mantenedora,
+               m.id AS mantenedora_id,
+               {_required("NO_RAZAO_SOCIAL")} AS nome_razao_social_estabelecimento,
+               {_required("NO_FANTASIA")} AS nome_fantasia_estabelecimento,
+               {_digits("NU_TELEFONE")} AS numero_telefone_estabelecimento,
+               {_text("NO_EMAIL")} AS email_estabelecimento
+        FROM stg_estabelecimentos s
+        LEFT JOIN mantenedoras m ON m.cnpj_mantenedora = {_text("NU_CNPJ_MANTENEDORA")}
+        """,
+        [
+            ("codigo_unidade IS NULL", "Código da unidade ausente"),
+            ("mantenedora_id IS NULL", "Mantenedora não encontrada"),
+            (
+                "EXISTS (SELECT 1 FROM estabelecimentos e WHERE e.codigo_cnes = src.codigo_cnes AND e.codigo_unidade <> src.codigo_unidade)",
+                "Código CNES já existe"
+            ),
+        ],
+        [("codigo_unidade",), ("codigo_cnes",)],
+        conflict=("codigo_unidade",)
+    ),
+    StagedTable(
+        "enderecos", "estabelecimentos",
+        (
+            "estabelecimento_id", "latitude", "longitude", "cep_estabelecimento",
+            "bairro", "logradouro", "numero", "complemento",
+        ),
+        f"""
+        SELECT s.stg_row,
+               e.id AS estabelecimento_id,
+               cnes_parse_coordinate(s.{quote("NU_LATITUDE")}, 90) AS latitude,
+               cnes_parse_coordinate(s.{quote("NU_LONGITUDE")}, 180) AS longitude,
+               COALESCE({_digits("CO_CEP")}, '') AS cep_estabelecimento,
+               {_required("NO_BAIRRO")} AS bairro,
+               {_required("NO_LOGRADOURO")} AS logradouro,
+               {_text("NU_ENDERECO")} AS numero,
+               {_text("NO_COMPLEMENTO")} AS complemento
+        FROM stg_estabelecimentos s
+        LEFT JOIN estabelecimentos e ON e.codigo_unidade = {_text("CO_UNIDADE")}
+        """,
+        [("estabelecimento_id IS NULL", "Estabelecimento não encontrado")],
+        [("estabelecimento_id",)]
+    ),
+    StagedTable(
+        "equipes", "equipes",
+        ("codigo_equipe", "nome_equipe", "tipo_equipe", "codigo_unidade", "estabelecimento_id"),
+        f"""
+        SELECT s.stg_row,
+               {_text("SEQ_EQUIPE")} AS codigo_equipe,
+               {_required("NO_USUARIO")} AS nome_equipe,
+               {_required("TP_EQUIPE")} AS tipo_equipe,
+               {_required("CO_UNIDADE")} AS codigo_unidade,
+               e.id AS estabelecimento_id
+        FROM stg_equipes s
+        LEFT JOIN estabelecimentos e ON e.codigo_unidade = {_text("CO_UNIDADE")}
+        """,
+        [
+            ("codigo_equipe IS NULL", "Código da equipe ausente"),
+            ("estabelecimento_id IS NULL", "Estabelecimento não encontrado"),
+        ],
+        [("codigo_equipe",)],
+        conflict=("codigo_equipe",)
+    ),
+    StagedTable(
+        "profissionais", "profissionais",
+        ("codigo_profissional_sus", "nome_profissional", "codigo_cns", "situacao_profissional_cadsus"),
+        f"""
+        SELECT s.stg_row,
+               {_text("CO_PROFISSIONAL_SUS")} AS codigo_profissional_sus,
+               {_required("NO_PROFISSIONAL")} AS nome_profissional,
+               {_required("CO_CNS")} AS codigo_cns,
+               {_required("ST_NMPROF_CADSUS")} AS situacao_profissional_cadsus
+        FROM stg_profissionais s
+        """,
+        [("codigo_profissional_sus IS NULL", "Código do profissional SUS ausente")],
+        [("codigo_profissional_sus",)],
+        conflict=("codigo_profissional_sus",)
+    ),
+    StagedTable(
+        "equipeprofs", "equipeprofs",
+        ("equipe_id", "profissional_id"),
+        f"""
+        SELECT s.stg_row,
+               e.id AS equipe_id,
+               p.id AS profissional_id
+        FROM stg_equipeprofs s
+        LEFT JOIN equipes e ON e.codigo_equipe = {_text("SEQ_EQUIPE")}
+        LEFT JOIN profissionais p ON p.codigo_profissional_sus = {_text("CO_PROFISSIONAL_SUS")}
+        """,
+        [
+            ("equipe_id IS NULL", "Equipe não encontrada"),
+            ("profissional_id IS NULL", "Profissional não encontrado"),
+        ],
+        [("equipe_id", "profissional_id")]
+    ),
+]
+
+
+def read_header(file_path: Source) -> List[str]:
+    with io.TextIOWrapper(open_source(file_path), encoding='latin1', newline='') as f:
+        return next(csv.reader(f, delimiter=';'))
+
+
+def staging_rows(file_path: Source, width: int) -> Iterator[Tuple]:
+    # pads short rows and cuts long ones, as pandas does, so a ragged line
+    # does not abort the COPY
+    with io.TextIOWrapper(open_source(file_path), encoding='latin1', newline='') as f:
+        reader = csv.reader(f, delimiter=';')
+        next(reader)
+        for row in reader:
+            if len(row) != width:
+                row = (row + [None] * width)[:width]
+            yield tuple(row)
+
+
+async def stage_file(conn: asyncpg.Connection, source: str, file_path: Source) -> int:
+    header = read_header(file_path)
+    table = f"stg_{source}"
+    columns = ", ".join(f"{quote(column)} text" for column in header)
+    await conn.execute(f"DROP TABLE IF EXISTS {table}")
+    await conn.execute(f"CREATE UNLOGGED TABLE {table} (stg_row bigserial PRIMARY KEY, {columns})")
+    return await copy_records(conn, table, header, staging_rows(file_path, len(header)))
+
+
+async def reject(conn: asyncpg.Connection, staged: StagedTable, condition: str, reason: str) -> int:
+    status = await conn.execute(
+        f"""
+        WITH bad AS (
+            DELETE FROM {staged.src} src WHERE {condition} RETURNING src.stg_row
+        )
+        INSERT INTO {ImportReject.__tablename__} (source, target_table, reason, data, deleted, created_at)
+        SELECT $1, $2, $3, to_jsonb(s) - 'stg_row', false, now()
+        FROM stg_{staged.source} s JOIN bad USING (stg_row)
+        """,
+        staged.source, staged.table, reason
+    )
+    return int(status.split()[-1])
+
+
+async def reject_duplicates(conn: asyncpg.Connection, staged: StagedTable, columns: Tuple[str, ...]) -> int:
+    partition = ", ".join(columns)
+    condition = f"""src.stg_row IN (
+        SELECT stg_row FROM (
+            SELECT stg_row, row_number() OVER (PARTITION BY {partition} ORDER BY stg_row) AS n FROM {staged.src}
+        ) ranked WHERE n > 1
+    )"""
+    return await reject(conn, staged, condition, f"Linha repetida para ({partition})")
+
+
+def merge_sql(staged: StagedTable) -> str:
+    # row_hash is the delta sync's record of the source values; clearing it
+    # makes the next sync compare the rows merged here as changed
+    columns = ", ".join(staged.columns)
+
+    def changed(source: str) -> str:
+        current = ", ".join(f"t.{c}" for c in staged.columns)
+        incoming = ", ".join(f"{source}.{c}" for c in staged.columns)
+        return f"({current}) IS DISTINCT FROM ({incoming}) OR t.deleted"
+
+    if staged.conflict:
+        assignments = ", ".join(f"{c} = EXCLUDED.{c}" for c in staged.columns if c not in staged.conflict)
+        return f"""
+        INSERT INTO {staged.table} AS t ({columns}, deleted)
+        SELECT {columns}, false FROM {staged.src}
+        ON CONFLICT ({", ".join(staged.conflict)}) DO UPDATE
+        SET {assignments}, deleted = false, updated_at = now(), row_hash = NULL
+        WHERE {changed('EXCLUDED')}
+        """
+    # no unique constraint to drive ON CONFLICT: match on the natural key with MERGE
+    key = staged.unique[0]
+    condition = " AND ".join(f"t.{c} = s.{c}" for c in key)
+    assignments = ", ".join(f"{c} = s.{c}" for c in staged.columns if c not in key)
+    update = f"UPDATE SET {assignments + ', ' if assignments else ''}deleted = false, updated_at = now(), row_hash = NULL"
+    return f"""
+    MERGE INTO {staged.table} t
+    USING {staged.src} s ON {condition}
+    WHEN MATCHED AND ({changed('s')}) THEN {update}
+    WHEN NOT MATCHED THEN INSERT ({columns}, deleted) VALUES ({", ".join(f"s.{c}" for c in staged.columns)}, false)
+    """
+
+
+async def merge_table(conn: asyncpg.Connection, staged: StagedTable) -> Dict[str, int]:
+    await conn.execute(f"DROP TABLE IF EXISTS {staged.src}")
+    await conn.execute(f"CREATE TEMP TABLE {staged.src} ON COMMIT DROP AS {staged.select}")
+    rejected = 0
+    for condition, reason in staged.checks:
+        rejected += await reject(conn, staged, condition, reason)
+    for columns in staged.unique:
+        rejected += await reject_duplicates(conn, staged, columns)
+    status = await conn.execute(merge_sql(staged))
+    return {"merged": int(status.split()[-1]), "rejected": rejected}
+
+
+async def staging_import(paths: Dict[str, str]) -> LoadStats:
+    """
+    Imports a CNES snapshot through staging tables. Works on empty and on
+    populated databases: existing rows are updated only when they changed.
+    """
+    stats = LoadStats()
+    conn = await connect()
+    try:
+        async with conn.transaction():
+            for function in FUNCTIONS:
+                await conn.execute(function)
+            for source in dict.fromkeys(staged.source for staged in STAGED_TABLES):
+                start = time.perf_counter()
+                rows = await stage_file(conn, source, paths[source])
+                stats.record(f"stg_{source}", rows, 0, time.perf_counter() - start)
+            for staged in STAGED_TABLES:
+                start = time.perf_counter()
+                result = await merge_table(conn, staged)
+                stats.record(staged.table, result["merged"], result["rejected"], time.perf_counter() - start)
+    finally:
+        await conn.close()
+    return stats
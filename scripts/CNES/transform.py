@@ -0,0 +1,198 @@
+import hashlib
+import pandas as pd
+from datetime import date
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+from scripts.CNES.normalize import to_python
+
+
+# Frame builders: a normalized source frame -> a frame with the table's
+# columns, in order. Foreign key columns carry the parent's natural key; the
+# writer swaps it for the id once the parent table is loaded (see
+# KeyIndex.resolve). Rows without a natural key are dropped by TableSpec.
+
+def _required(series: pd.Series) -> pd.Series:
+    return series.fillna("")
+
+
+def build_mantenedoras(frame: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame({
+        "cnpj_mantenedora": frame["NU_CNPJ_MANTENEDORA"],
+        "nome_razao_social_mantenedora": _required(frame["NO_RAZAO_SOCIAL"]),
+        "numero_telefone_mantenedora": frame["NU_TELEFONE"],
+        "codigo_banco": frame["CO_BANCO"],
+        "numero_agencia": frame["NU_AGENCIA"],
+        "numero_conta_corrente": frame["NU_CONTA_CORRENTE"],
+        "data_criacao_mantenedora": frame["TO_CHAR(DT_PREENCHIMENTO,'DD/MM/YYYY')"],
+        "deleted": False,
+    })
+
+
+def build_estabelecimentos(frame: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame({
+        "codigo_unidade": frame["CO_UNIDADE"],
+        "codigo_cnes": _required(frame["CO_CNES"]),
+        "cnpj_mantenedora": frame["NU_CNPJ_MANTENEDORA"],
+        "mantenedora_id": frame["NU_CNPJ_MANTENEDORA"],
+        "nome_razao_social_estabelecimento": _required(frame["NO_RAZAO_SOCIAL"]),
+        "nome_fantasia_estabelecimento": _required(frame["NO_FANTASIA"]),
+        "numero_telefone_estabelecimento": frame["NU_TELEFONE"],
+        "email_estabelecimento": frame["NO_EMAIL"],
+        "deleted": False,
+    })
+
+
+def build_enderecos(frame: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame({
+        "estabelecimento_id": frame["CO_UNIDADE"],
+        "latitude": frame["NU_LATITUDE"],
+        "longitude": frame["NU_LONGITUDE"],
+        "cep_estabelecimento": _required(frame["CO_CEP"]),
+        "bairro": _required(frame["NO_BAIRRO"]),
+        "logradouro": _required(frame["NO_LOGRADOURO"]),
+        "numero": frame["NU_ENDERECO"],
+        "complemento": frame["NO_COMPLEMENTO"],
+        "deleted": False,
+    })
+
+
+def build_equipes(frame: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame({
+        "codigo_equipe": frame["SEQ_EQUIPE"],
+        "nome_equipe": _required(frame["NO_USUARIO"]),
+        "tipo_equipe": _required(frame["TP_EQUIPE"]),
+        "codigo_unidade": _required(frame["CO_UNIDADE"]),
+        "estabelecimento_id": frame["CO_UNIDADE"],
+        "deleted": False,
+    })
+
+
+def build_profissionais(frame: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame({
+        "codigo_profissional_sus": frame["CO_PROFISSIONAL_SUS"],
+        "nome_profissional": _required(frame["NO_PROFISSIONAL"]),
+        "codigo_cns": _required(frame["CO_CNS"]),
+        "situacao_profissional_cadsus": _required(frame["ST_NMPROF_CADSUS"]),
+        "deleted": False,
+    })
+
+
+def build_equipeprofs(frame: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame({
+        "equipe_id": frame["SEQ_EQUIPE"],
+        "profissional_id": frame["CO_PROFISSIONAL_SUS"],
+        "deleted": False,
+    })
+
+
+def _canonical(value) -> str:
+    # one text form per value, whatever type or formatting it was read with:
+    # 1, 1.0 and Decimal("1.00") are the same number
+    if value is None:
+        return "n"
+    if isinstance(value, bool):
+        return "b1" if value else "b0"
+    if isinstance(value, (int, float, Decimal)):
+        number = Decimal(repr(value)) if isinstance(value, float) else Decimal(value)
+        return "d" + format(number.normalize(), "f")
+    if isinstance(value, date):
+        return "t" + value.isoformat()
+    text = str(value)
+    return f"s{len(text)}:{text}"
+
+
+def row_hash(values: Tuple) -> bytes:
+    """Hash of a row's source values, stored in row_hash and compared by the delta sync."""
+    encoded = "|".join(_canonical(value) for value in values)
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).digest()
+
+
+class TableSpec:
+    """
+    How one target table is built from a CNES source file.
+    `foreign_keys` maps a column position to the parent table whose natural
+    key it holds before resolution; `key_columns` is the natural key used
+    to drop repeated rows and to match rows in the delta sync.
+    """
+
+    def __init__(
+        self,
+        table: str,
+        source: str,
+        columns: Tuple[str, ...],
+        build: Callable[[pd.DataFrame], pd.DataFrame],
+        key_columns: Tuple[str, ...],
+        foreign_keys: Dict[int, str] = None
+    ):
+        self.table = table
+        self.source = source
+        self.columns = columns
+        self.build = build
+        self.key_columns = key_columns
+        self.key_positions = tuple(columns.index(c) for c in key_columns)
+        self.foreign_keys = foreign_keys or {}
+
+    def key(self, record: Tuple) -> Tuple:
+        return tuple(record[i] for i in self.key_positions)
+
+    @property
+    def copy_columns(self) -> Tuple[str, ...]:
+        """Columns written by the COPY loaders: the table's plus row_hash."""
+        return self.columns + ("row_hash",)
+
+    def hashed(self, records: Iterable[Tuple]) -> Iterator[Tuple]:
+        # the trailing `deleted` flag is not part of the source row
+        for record in records:
+            yield record + (row_hash(record[:-1]),)
+
+    def records(self, frame: pd.DataFrame) -> List[Tuple]:
+        """Builds the table rows of a normalized frame as plain tuples."""
+        table = self.build(frame)[list(self.columns)].dropna(subset=list(self.key_columns))
+        return list(to_python(table).itertuples(index=False, name=None))
+
+
+# FK order: every table comes after the tables it references.
+TABLE_SPECS = [
+    TableSpec(
+        "mantenedoras", "mantenedoras",
+        (
+            "cnpj_mantenedora", "nome_razao_social_mantenedora", "numero_telefone_mantenedora",
+            "codigo_banco", "numero_agencia", "numero_conta_corrente", "data_criacao_mantenedora", "deleted",
+        ),
+        build_mantenedoras, ("cnpj_mantenedora",)
+    ),
+    TableSpec(
+        "estabelecimentos", "estabelecimentos",
+        (
+            "codigo_unidade", "codigo_cnes", "cnpj_mantenedora", "mantenedora_id",
+            "nome_razao_social_estabelecimento", "nome_fantasia_estabelecimento",
+            "numero_telefone_estabelecimento", "email_estabelecimento", "deleted",
+        ),
+        build_estabelecimentos, ("codigo_unidade",), {3: "mantenedoras"}
+    ),
+    TableSpec(
+        "enderecos", "estabelecimentos",
+        (
+            "estabelecimento_id", "latitude", "longitude", "cep_estabelecimento",
+            "bairro", "logradouro", "numero", "complemento", "deleted",
+        ),
+        build_enderecos, ("estabelecimento_id",), {0: "estabelecimentos"}
+    ),
+    TableSpec(
+        "equipes", "equipes",
+        ("codigo_equipe", "nome_equipe", "tipo_equipe", "codigo_unidade", "estabelecimento_id", "deleted"),
+        build_equipes, ("codigo_equipe",), {4: "estabelecimentos"}
+    ),
+    TableSpec(
+        "profissionais", "profissionais",
+        ("codigo_profissional_sus", "nome_profissional", "codigo_cns", "situacao_profissional_cadsus", "deleted"),
+        build_profissionais, ("codigo_profissional_sus",)
+    ),
+    TableSpec(
+        "equipeprofs", "equipeprofs",
+        ("equipe_id", "profissional_id", "deleted"),
+        build_equipeprofs, ("equipe_id", "profissional_id"), {0: "equipes", 1: "profissionais"}
+    ),
+]
+
+SPECS_BY_TABLE = {spec.table: spec for spec in TABLE_SPECS}
@@ -0,0 +1,96 @@
+import json
+import time
+import pandas as pd
+from typing import Dict, List, Optional
+from scripts.CNES.reader import DEFAULT_CHUNK_SIZE, read_normalized
+from scripts.CNES.sources import Source, source_name
+from scripts.CNES.transform import TABLE_SPECS, TableSpec
+
+# Pre-load referential-integrity check. Every source is parsed into the
+# table frames the loaders would write, reduced to the natural key and FK
+# columns, and checked with vectorized anti-joins against the parents:
+# no database access, so a whole month can be validated before loading.
+
+SAMPLE_SIZE = 5
+
+
+def key_frame(spec: TableSpec, file_path: Source, cache_dir: Optional[str] = None) -> pd.DataFrame:
+    """The natural key and FK columns of every row of the table, in file order."""
+    columns = list(dict.fromkeys(
+        list(spec.key_columns) + [spec.columns[position] for position in spec.foreign_keys]
+    ))
+    frames = [
+        spec.build(frame)[columns]
+        for frame in read_normalized(file_path, spec.source, DEFAULT_CHUNK_SIZE, cache_dir)
+    ]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _sample(values: pd.Series) -> List:
+    return values.drop_duplicates().head(SAMPLE_SIZE).tolist()
+
+
+def check_table(spec: TableSpec, frame: pd.DataFrame, valid_keys: Dict[str, pd.Index]) -> Dict:
+    """
+    Counts the rows of one table that would not load: missing natural key,
+    repeated natural key (first occurrence wins) and, per foreign key, parents
+    that are absent or rejected themselves. Returns the report and, under
+    "keys", the natural keys that pass every check.
+    """
+    keys = list(spec.key_columns)
+    missing = frame[keys].isna().any(axis=1)
+    duplicated = ~missing & frame.duplicated(subset=keys, keep='first')
+    ok = ~missing & ~duplicated
+
+    orphans = {}
+    for position, parent in spec.foreign_keys.items():
+        column = spec.columns[position]
+        orphan = ok & ~frame[column].isin(valid_keys[parent])
+        orphans[parent] = {"rows": int(orphan.sum()), "sample": _sample(frame.loc[orphan, column])}
+        ok &= ~orphan
+
+    report = {
+        "rows": len(frame),
+        "missing_key": int(missing.sum()),
+        "duplicates": int(duplicated.sum()),
+        "duplicate_sample": _sample(frame.loc[duplicated, keys[0]]),
+        "orphans": orphans,
+        "valid": int(ok.sum()),
+    }
+    if len(keys) == 1:
+        report["keys"] = pd.Index(frame.loc[ok, keys[0]])
+    return report
+
+
+def validate(paths: Dict[str, Source], cache_dir: Optional[str] = None) -> Dict[str, Dict]:
+    """Checks every table in FK order and prints one line per table."""
+    report = {}
+    valid_keys: Dict[str, pd.Index] = {}
+    for spec in TABLE_SPECS:
+        start = time.perf_counter()
+        frame = key_frame(spec, paths[spec.source], cache_dir)
+        result = check_table(spec, frame, valid_keys)
+        if "keys" in result:
+            valid_keys[spec.table] = result.pop("keys")
+        result["file"] = source_name(paths[spec.source])
+        result["seconds"] = time.perf_counter() - start
+        report[spec.table] = result
+
+        orphans = ", ".join(f"{parent}: {item['rows']}" for parent, item in result["orphans"].items())
+        print(
+            f"{spec.table} ({result['file']}): {result['rows']} rows, {result['valid']} valid, "
+            f"{result['missing_key']} without key, {result['duplicates']} duplicated"
+            + (f", orphans ({orphans})" if orphans else "")
+        )
+    return report
+
+
+def has_errors(report: Dict[str, Dict]) -> bool:
+    return any(result["valid"] < result["rows"] for result in report.values())
+
+
+def write_report(report: Dict[str, Dict], path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
@@ -0,0 +1,83 @@
+import argparse
+import json
+import time
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+from core.serialization import dump_many
+from models.endereco import Endereco
+from models.equipe import Equipe  # noqa: F401 (mapper registry)
+from models.estabelecimento import Estabelecimento
+from models.mantenedora import Mantenedora  # noqa: F401
+from models.profissional import Profissional  # noqa: F401
+from schemas.estabelecimento import Estabelecimento as EstabelecimentoSchema
+
+# Serialization cost of a list response, per row, on transient ORM objects
+# (no database): the old `key: value` strings, the FastAPI default
+# (validate every object against the response_model, then jsonable_encoder)
+# and the core.serialization fast path.
+
+
+def build_rows(count: int) -> list[Estabelecimento]:
+    rows = []
+    for i in range(count):
+        estabelecimento = Estabelecimento(
+            id=i + 1,
+            codigo_unidade=f"{i:013d}",
+            codigo_cnes=f"{i:07d}",
+            cnpj_mantenedora=f"{i:014d}",
+            nome_razao_social_estabelecimento=f"ESTABELECIMENTO {i}",
+            nome_fantasia_estabelecimento=f"UBS {i}",
+            numero_telefone_estabelecimento="6133334444",
+            email_estabelecimento=f"ubs{i}@saude.gov.br",
+            mantenedora_id=1,
+        )
+        estabelecimento.endereco = Endereco(
+            id=i + 1,
+            estabelecimento_id=i + 1,
+            latitude=-15.7801,
+            longitude=-47.9292,
+            cep_estabelecimento="70000000",
+            bairro="CENTRO",
+            logradouro="RUA A",
+            numero="100",
+        )
+        rows.append(estabelecimento)
+    return rows
+
+
+def legacy(rows) -> bytes:
+    data = [[str(key) + ": " + str(value) for key, value in row.__dict__.items() if not key.startswith("_")] for row in rows]
+    return json.dumps({"data": data}).encode()
+
+
+def validated(rows) -> bytes:
+    adapter = TypeAdapter(list[EstabelecimentoSchema])
+    data = adapter.validate_python(rows, from_attributes=True)
+    return json.dumps({"data": jsonable_encoder(data)}).encode()
+
+
+def fast_path(rows) -> bytes:
+    return to_json({"data": dump_many(EstabelecimentoSchema, rows)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede a serialização das listagens")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = build_rows(args.rows)
+    for name, serialize in (("legacy", legacy), ("validated", validated), ("fast_path", fast_path)):
+        best = min(_timed(serialize, rows) for _ in range(args.repeat))
+        print(f"{name:>10}: {best * 1e6 / args.rows:8.2f} µs/row")
+
+
+def _timed(serialize, rows) -> float:
+    start = time.perf_counter()
+    serialize(rows)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+import core.conditional
+import core.export
+import main
+from core.autocomplete import estabelecimentos_autocomplete, profissionais_autocomplete
+from core.cache import response_cache
+from core.database import Base, get_db
+from core.spatial import estabelecimentos_index
+from models.endereco import Endereco
+from models.equipe import Equipe
+from models.equipeprof import EquipeProf
+from models.estabelecimento import Estabelecimento
+from models.import_run import ImportRun
+from models.mantenedora import Mantenedora
+from models.profissional import Profissional
+from models.table_change import TableChange
+
+# Repository and API tests run on a throwaway SQLite file (aiosqlite), with
+# the foreign keys enforced so ON DELETE CASCADE behaves as in PostgreSQL.
+# import_rejects is left out: its JSONB column only exists in PostgreSQL, and
+# so do the triggers that keep table_changes (tests write it themselves).
+MODELS = (Mantenedora, Estabelecimento, Endereco, Equipe, Profissional, EquipeProf, ImportRun, TableChange)
+
+
+@pytest.fixture
+def database(tmp_path):
+    """Session factory of an empty database with the tables of MODELS."""
+    pytest.importorskip("aiosqlite")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'cnes.db'}", poolclass=NullPool)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _enforce_foreign_keys(connection, _):
+        connection.execute("PRAGMA foreign_keys = ON")
+
+    async def create():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=[model.__table__ for model in MODELS])
+
+    asyncio.run(create())
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+async def seed(session_factory, count: int = 5):
+    """`count` of each row: mantenedora i owns estabelecimento i, with its endereco, equipe i and profissional i."""
+    async with session_factory() as session:
+        for i in range(1, count + 1):
+            session.add(Mantenedora(id=i, cnpj_mantenedora=f"{i:014d}", nome_razao_social_mantenedora=f"Mantenedora {i}"))
+            session.add(Profissional(
+                id=i, codigo_profissional_sus=f"P{i:05d}", nome_profissional=f"Profissional {i}",
+                codigo_cns=f"{i:015d}", situacao_profissional_cadsus="A"
+            ))
+        await session.flush()
+        for i in range(1, count + 1):
+            session.add(Estabelecimento(
+                id=i, codigo_unidade=f"U{i:05d}", codigo_cnes=f"{i:07d}", cnpj_mantenedora=f"{i:014d}",
+                mantenedora_id=i, nome_razao_social_estabelecimento=f"Razao {i}",
+                nome_fantasia_estabelecimento=f"Fantasia {i}"
+            ))
+        await session.flush()
+        for i in range(1, count + 1):
+            session.add(Endereco(
+                id=i, estabelecimento_id=i, latitude=-15.0 - i / 10, longitude=-47.0 - i / 10,
+                cep_estabelecimento=f"{i:08d}", bairro="Centro", logradouro="Rua A"
+            ))
+            session.add(Equipe(
+                id=i, codigo_equipe=f"E{i:05d}", nome_equipe=f"Equipe {i}", tipo_equipe="70",
+                codigo_unidade=f"U{i:05d}", estabelecimento_id=i
+            ))
+        await session.flush()
+        for i in range(1, count + 1):
+            session.add(EquipeProf(id=i, equipe_id=i, profissional_id=i))
+        await session.commit()
+
+
+@pytest.fixture
+def api(database, monkeypatch):
+    """TestClient of the app on `database`, with an empty response cache and no startup (lifespan)."""
+    async def get_test_db():
+        async with database() as session:
+            try:
+                yield session
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+    monkeypatch.setitem(main.app.dependency_overrides, get_db, get_test_db)
+    monkeypatch.setattr(core.conditional, "async_session", database)
+    monkeypatch.setattr(core.export, "async_session", database)
+    response_cache.clear()
+    response_cache.table_versions.clear()
+    main.table_versions.known.clear()
+    # the in-memory indexes reload from this database on their first use
+    monkeypatch.setattr(estabelecimentos_index, "version", None)
+    monkeypatch.setattr(estabelecimentos_autocomplete, "version", None)
+    monkeypatch.setattr(profissionais_autocomplete, "version", None)
+    return TestClient(main.app)
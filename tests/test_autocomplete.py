@@ -0,0 +1,65 @@
+import asyncio
+from sqlalchemy import insert, update
+import main
+from conftest import seed
+from core.autocomplete import PrefixIndex, normalize
+from models.estabelecimento import Estabelecimento
+from models.table_change import TableChange
+
+
+def loaded(rows) -> PrefixIndex:
+    index = PrefixIndex("estabelecimentos")
+    index.load(rows)
+    return index
+
+
+def test_normalize():
+    assert normalize("  Hospital   São  José ") == "HOSPITAL SAO JOSE"
+    assert normalize(None) == ""
+
+
+def test_complete_matches_names_and_codes():
+    index = loaded([(1, "Hospital São José", "0000001"), (2, "Posto Central", "0000002"), (3, "Hospital Regional", "0000013")])
+    # in key order: "HOSPITAL REGIONAL" < "HOSPITAL SAO JOSE"
+    assert index.complete("hosp") == [(3, "Hospital Regional", "0000013"), (1, "Hospital São José", "0000001")]
+    assert index.complete("hospital sao") == [(1, "Hospital São José", "0000001")]
+    assert [id for id, *_ in index.complete("00000")] == [1, 2, 3]
+    assert index.complete("hosp", limit=1) == [(3, "Hospital Regional", "0000013")]
+    assert index.complete("  ") == []
+    assert index.complete("clinica") == []
+
+
+def test_upsert_replaces_the_old_keys():
+    index = loaded([(1, "Posto Central", "0000001")])
+    index.upsert(1, "Clínica Central", "0000001")
+    index.upsert(2, "Posto Norte", "0000002")
+    assert index.complete("posto") == [(2, "Posto Norte", "0000002")]
+    assert index.complete("clinica") == [(1, "Clínica Central", "0000001")]
+    assert sorted(index.keys) == index.keys
+
+
+def test_remove():
+    index = loaded([(1, "Posto Central", "0000001"), (2, "Posto Central", "0000002")])
+    index.remove(1)
+    index.remove(99)
+    assert index.complete("posto") == [(2, "Posto Central", "0000002")]
+    assert index.complete("0000001") == []
+    assert 1 not in index.labels
+
+
+def test_a_write_from_another_process_reloads_the_index(api, database, monkeypatch):
+    monkeypatch.setattr(main.table_versions, "max_age", 0)
+    asyncio.run(seed(database))
+    assert [row["id"] for row in api.get("/autocomplete/estabelecimentos", params={"prefix": "fantasia 1"}).json()] == [1]
+
+    # an import from another process: outside the ORM session, so no version
+    # bump here, only the counter the trigger of migration f1c8d3a6b927 keeps
+    async def rename():
+        async with database.kw["bind"].begin() as conn:
+            await conn.execute(
+                update(Estabelecimento).where(Estabelecimento.id == 1).values(nome_fantasia_estabelecimento="Renomeado")
+            )
+            await conn.execute(insert(TableChange).values(table_name="estabelecimentos", version=1))
+    asyncio.run(rename())
+    assert api.get("/autocomplete/estabelecimentos", params={"prefix": "fantasia 1"}).json() == []
+    assert [row["id"] for row in api.get("/autocomplete/estabelecimentos", params={"prefix": "renomeado"}).json()] == [1]
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from core.clusters import CLUSTER_DTYPE, MAX_CELLS, MAX_ZOOM, cluster_cell, grid_zoom, pack_clusters
+
+
+def cells(zoom, min_lat, min_lon, max_lat, max_lon) -> float:
+    cell = cluster_cell(zoom)
+    width = max_lon - min_lon if min_lon <= max_lon else 360.0 - (min_lon - max_lon)
+    return ((max_lat - min_lat) / cell + 1) * (width / cell + 1)
+
+
+def test_cell_halves_at_each_zoom():
+    assert cluster_cell(0) == 90.0
+    assert cluster_cell(MAX_ZOOM) == cluster_cell(MAX_ZOOM - 1) / 2
+
+
+def test_a_city_keeps_its_zoom():
+    assert grid_zoom(12, -16.1, -48.3, -15.5, -47.3) == 12
+
+
+@pytest.mark.parametrize("box", [
+    (-34.0, -74.0, 6.0, -34.0),  # Brazil
+    (-90.0, -180.0, 90.0, 180.0),
+    (-10.0, 170.0, 10.0, -170.0),  # across the antimeridian
+])
+def test_a_wide_box_is_grouped_at_the_deepest_zoom_that_fits(box):
+    zoom = grid_zoom(MAX_ZOOM, *box)
+    assert cells(zoom, *box) <= MAX_CELLS
+    assert zoom == 0 or cells(zoom + 1, *box) > MAX_CELLS
+
+
+def test_pack_clusters():
+    packed = pack_clusters([
+        {"latitude": -15.5, "longitude": -47.5, "quantidade": 3, "endereco_id": None},
+        {"latitude": -15.0, "longitude": -47.0, "quantidade": 1, "endereco_id": 42},
+    ])
+    records = np.frombuffer(packed, dtype=CLUSTER_DTYPE)
+    assert records["quantidade"].tolist() == [3, 1]
+    assert records["endereco_id"].tolist() == [0, 42]
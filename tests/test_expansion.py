@@ -0,0 +1,88 @@
+import pytest
+from fastapi import HTTPException
+from core.expansion import EXPANSIONS, MAX_EXPAND_DEPTH, expansion_tables, parse_expand, response_schema
+from main import ROUTE_TABLES
+from schemas.endereco import Endereco
+from schemas.equipe import Equipe
+from schemas.estabelecimento import Estabelecimento
+from schemas.mantenedora import Mantenedora
+from schemas.profissional import Profissional
+
+
+def rejected(schema, expand) -> str:
+    with pytest.raises(HTTPException) as error:
+        parse_expand(schema, expand)
+    assert error.value.status_code == 400
+    return error.value.detail
+
+
+@pytest.mark.parametrize("expand", [None, "", " , "])
+def test_nothing_to_expand(expand):
+    assert parse_expand(Estabelecimento, expand) == ()
+
+
+def test_paths_are_trimmed_and_deduplicated():
+    expand = " mantenedora, equipe.profissionais ,mantenedora,"
+    assert parse_expand(Estabelecimento, expand) == ("mantenedora", "equipe.profissionais")
+
+
+def test_depth_is_capped():
+    path = ".".join(["equipe", "profissionais", "equipes"][:MAX_EXPAND_DEPTH + 1])
+    assert "Expansão muito profunda" in rejected(Estabelecimento, path)
+
+
+@pytest.mark.parametrize("schema, expand", [
+    (Estabelecimento, "profissionais"),
+    (Estabelecimento, "equipe.mantenedora"),
+    (Mantenedora, "estabelecimentos."),
+    (Endereco, "Estabelecimento"),
+])
+def test_unknown_relationship(schema, expand):
+    detail = rejected(schema, expand)
+    assert detail.startswith(f"Expansão inválida: {expand}")
+
+
+def test_unknown_relationship_lists_the_valid_ones():
+    assert rejected(Estabelecimento, "equipe.mantenedora").endswith("Use: estabelecimento, profissionais")
+
+
+def test_response_schema_without_expand_keeps_the_fields():
+    schema = response_schema(Estabelecimento, ("codigo_cnes",), ())
+    assert set(schema.model_fields) == {"codigo_cnes"}
+
+
+def test_response_schema_nests_the_expanded_rows():
+    schema = response_schema(Estabelecimento, ("id", "codigo_cnes"), ("mantenedora", "equipe.profissionais"))
+    assert set(schema.model_fields) == {"id", "codigo_cnes", "mantenedora", "equipe"}
+    equipe = schema.model_fields["equipe"].annotation.__args__[0]
+    # a level without a path below it comes without its own relationships
+    assert "estabelecimento" not in equipe.model_fields
+    profissional = equipe.model_fields["profissionais"].annotation.__args__[0]
+    assert "equipes" not in profissional.model_fields
+
+    row = schema.model_validate({"id": 1, "codigo_cnes": "0000001", "mantenedora": None, "equipe": None})
+    assert row.model_dump() == {"id": 1, "codigo_cnes": "0000001", "mantenedora": None, "equipe": None}
+
+
+def test_response_schema_is_cached():
+    assert response_schema(Mantenedora, None, ("estabelecimentos",)) is response_schema(
+        Mantenedora, None, ("estabelecimentos",)
+    )
+
+
+def test_expansion_tables_follow_the_association_tables():
+    assert set(expansion_tables(Profissional, depth=1)) == {"equipeprofs", "equipes"}
+    assert set(expansion_tables(Equipe, depth=1)) == {"estabelecimentos", "equipeprofs", "profissionais"}
+    assert expansion_tables(Equipe, depth=0) == ()
+
+
+@pytest.mark.parametrize("route, schema", [
+    ("/enderecos", Endereco),
+    ("/equipes", Equipe),
+    ("/estabelecimentos", Estabelecimento),
+    ("/mantenedoras", Mantenedora),
+    ("/profissionais", Profissional),
+])
+def test_routes_track_every_expandable_table(route, schema):
+    assert schema in EXPANSIONS
+    assert set(expansion_tables(schema)) <= set(ROUTE_TABLES[route])
@@ -0,0 +1,92 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+from core.filters import MAX_IN_VALUES, RESERVED_PARAMS, Filter, filter_clause, parse_filters, parse_order_by
+from models.endereco import Endereco
+from models.estabelecimento import Estabelecimento
+from repositories.endereco import EnderecoRepository
+from repositories.estabelecimento import EstabelecimentoRepository
+
+estabelecimentos = EstabelecimentoRepository(None)
+enderecos = EnderecoRepository(None)
+
+
+def sql(model, filter: Filter) -> str:
+    clause = filter_clause(model, filter)
+    return str(clause.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def rejected(repository, params) -> str:
+    with pytest.raises(HTTPException) as error:
+        parse_filters(repository, params)
+    assert error.value.status_code == 400
+    return error.value.detail
+
+
+def test_equality_is_the_default_operator():
+    assert parse_filters(estabelecimentos, [("codigo_cnes", "0000001"), ("mantenedora_id__eq", "7")]) == [
+        Filter("codigo_cnes", "eq", "0000001"),
+        Filter("mantenedora_id", "eq", 7),
+    ]
+
+
+def test_reserved_and_empty_params_are_skipped():
+    params = [(name, "id") for name in RESERVED_PARAMS] + [("codigo_cnes", "")]
+    assert parse_filters(estabelecimentos, params) == []
+
+
+def test_values_are_converted_to_the_column_type():
+    filters = parse_filters(estabelecimentos, [("id__in", "1,2,,3"), ("id__range", "10,")])
+    assert filters == [Filter("id", "in", [1, 2, 3]), Filter("id", "range", (10, None))]
+    assert parse_filters(enderecos, [("latitude__range", ",-10.5")]) == [Filter("latitude", "range", (None, -10.5))]
+
+
+@pytest.mark.parametrize("raw, expected", [("true", True), ("1", True), ("FALSE", False), ("0", False)])
+def test_is_null(raw, expected):
+    assert parse_filters(enderecos, [("latitude__is_null", raw)]) == [Filter("latitude", "is_null", expected)]
+
+
+@pytest.mark.parametrize("params, message", [
+    ([("nome_razao_social_estabelecimento", "x")], "Filtro inválido"),
+    ([("codigo_cnes__range", "1,2")], "Operador inválido"),
+    ([("mantenedora_id__like", "1")], "Operador inválido"),
+    ([("mantenedora_id", "abc")], "Valor inválido"),
+    ([("id__in", ",")], "aceita de 1 a"),
+    ([("id__in", ",".join(map(str, range(MAX_IN_VALUES + 1))))], "aceita de 1 a"),
+    ([("id__range", "5")], "__range=min,max"),
+    ([("id__range", ",")], "__range=min,max"),
+])
+def test_invalid_filters(params, message):
+    assert message in rejected(estabelecimentos, params)
+
+
+def test_invalid_is_null():
+    assert "__is_null=true ou false" in rejected(enderecos, [("latitude__is_null", "talvez")])
+
+
+def test_order_by():
+    assert parse_order_by(estabelecimentos, None) == []
+    assert parse_order_by(estabelecimentos, "-codigo_cnes, id") == [("codigo_cnes", True), ("id", False)]
+    with pytest.raises(HTTPException) as error:
+        parse_order_by(estabelecimentos, "nome_fantasia_estabelecimento")
+    assert error.value.status_code == 400
+
+
+def test_prefix_escapes_like_wildcards():
+    clause = filter_clause(Estabelecimento, Filter("codigo_cnes", "prefix", "12%_\\"))
+    # the whole pattern is a single bound value
+    assert clause.right.value == "12\\%\\_\\\\%"
+    assert clause.modifiers["escape"] == "\\"
+
+
+@pytest.mark.parametrize("filter, expected", [
+    (Filter("id", "eq", 3), "enderecos.id = 3"),
+    (Filter("id", "in", [1, 2]), "enderecos.id IN (1, 2)"),
+    (Filter("id", "range", (1, 9)), "enderecos.id BETWEEN 1 AND 9"),
+    (Filter("id", "range", (None, 9)), "enderecos.id <= 9"),
+    (Filter("id", "range", (1, None)), "enderecos.id >= 1"),
+    (Filter("latitude", "is_null", True), "enderecos.latitude IS NULL"),
+    (Filter("latitude", "is_null", False), "enderecos.latitude IS NOT NULL"),
+])
+def test_filter_clause(filter, expected):
+    assert sql(Endereco, filter) == expected
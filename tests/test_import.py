@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+from sqlalchemy import func, select
+from models.import_run import ImportRun
+from models.mantenedora import Mantenedora
+from scripts.CNES.journal import ImportJournal
+from scripts.CNES.populate_db import write_mantenedoras
+from scripts.CNES.resolution import KeyIndex
+
+
+def mantenedora(cnpj: str) -> dict:
+    return {
+        "NU_CNPJ_MANTENEDORA": cnpj,
+        "NO_RAZAO_SOCIAL": f"Mantenedora {cnpj}",
+        "NU_TELEFONE": None,
+        "CO_BANCO": None,
+        "NU_AGENCIA": None,
+        "NU_CONTA_CORRENTE": None,
+        "TO_CHAR(DT_PREENCHIMENTO,'DD/MM/YYYY')": None,
+    }
+
+
+def journal(rows_committed: int) -> ImportJournal:
+    entry = ImportRun(rows_committed=rows_committed, rows_written=0, rows_skipped=0, status="running")
+    return ImportJournal(None, "run", {"mantenedoras": entry})
+
+
+@pytest.mark.parametrize("committed, expected", [
+    (0, [(0, [0, 1, 2]), (3, [3, 4, 5]), (6, [6])]),
+    (3, [(3, [3, 4, 5]), (6, [6])]),
+    (4, [(4, [4, 5]), (6, [6])]),
+    (7, []),
+])
+def test_pending_chunks_skip_the_committed_rows(committed, expected):
+    chunks = [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(journal(committed).pending_chunks("mantenedoras", chunks)) == expected
+
+
+def test_rejected_row_keeps_the_rest_of_its_chunk(database):
+    async def main():
+        chunk = [mantenedora("1"), mantenedora("2"), mantenedora("1"), mantenedora("3")]
+        async with database() as session:
+            written = await write_mantenedoras(session, KeyIndex(), chunk)
+            await session.commit()
+        async with database() as session:
+            cnpjs = await session.execute(select(Mantenedora.cnpj_mantenedora).order_by(Mantenedora.id))
+            return written, cnpjs.scalars().all()
+    written, cnpjs = asyncio.run(main())
+    assert written == 3
+    assert cnpjs == ["1", "2", "3"]
+
+
+def test_resume_continues_from_the_last_checkpoint(database, tmp_path):
+    source = tmp_path / "tbMantenedora.csv"
+    source.write_text("NU_CNPJ_MANTENEDORA\n1\n2\n3\n")
+    paths = {"mantenedoras": str(source)}
+
+    async def main():
+        async with database() as session:
+            started = await ImportJournal.start(session, paths, ["mantenedoras"])
+            await started.checkpoint("mantenedoras", 2, 2, 0)
+            await session.commit()
+        async with database() as session:
+            resumed = await ImportJournal.resume(session, paths)
+            pending = list(resumed.pending_chunks("mantenedoras", [["1", "2"], ["3"]]))
+            await resumed.checkpoint("mantenedoras", 3, 1, 0)
+            await resumed.finish("mantenedoras")
+        async with database() as session:
+            entry = (await session.execute(select(ImportRun))).scalar_one()
+            unfinished = await session.scalar(select(func.count()).where(ImportRun.status != "done"))
+            return started.run_id, resumed.run_id, pending, entry, unfinished
+    started, resumed, pending, entry, unfinished = asyncio.run(main())
+    assert resumed == started
+    assert pending == [(2, ["3"])]
+    assert (entry.rows_committed, entry.rows_written, entry.status) == (3, 3, "done")
+    assert unfinished == 0
+
+
+def test_resume_refuses_a_changed_source(database, tmp_path):
+    source = tmp_path / "tbMantenedora.csv"
+    source.write_text("NU_CNPJ_MANTENEDORA\n1\n")
+    paths = {"mantenedoras": str(source)}
+
+    async def main():
+        async with database() as session:
+            await ImportJournal.start(session, paths, ["mantenedoras"])
+        source.write_text("NU_CNPJ_MANTENEDORA\n2\n")
+        async with database() as session:
+            await ImportJournal.resume(session, paths)
+    with pytest.raises(ValueError, match="mudou"):
+        asyncio.run(main())
@@ -0,0 +1,68 @@
+import contextlib
+import io
+import re
+import pytest
+from alembic import command
+from alembic.config import Config
+from core.database import Base
+from models.endereco import Endereco
+from models.equipe import Equipe
+from models.equipeprof import EquipeProf
+from models.estabelecimento import Estabelecimento
+from models.import_reject import ImportReject
+from models.import_run import ImportRun
+from models.mantenedora import Mantenedora
+from models.profissional import Profissional
+
+# The chain is rendered offline (`alembic upgrade head --sql`), so these
+# checks need no database: a fresh `upgrade head` must create every table
+# before touching it, and end with the tables and indexes of the models.
+
+
+@pytest.fixture(scope="module")
+def upgrade_sql() -> str:
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        command.upgrade(Config("alembic.ini", stdout=output), "head", sql=True)
+    return output.getvalue()
+
+
+def statements(sql: str) -> list[str]:
+    sql = "\n".join(line for line in sql.splitlines() if not line.startswith("--"))
+    return [" ".join(statement.split()) for statement in sql.split(";") if statement.strip()]
+
+
+def test_tables_exist_before_they_are_used(upgrade_sql):
+    created = set()
+    for statement in statements(upgrade_sql):
+        table = re.match(r"CREATE TABLE (\w+)", statement)
+        if table:
+            created.add(table.group(1))
+            continue
+        target = re.match(r"(?:CREATE (?:UNIQUE )?INDEX \w+ ON|ALTER TABLE|DROP INDEX \w+ ON) (\w+)", statement)
+        if target:
+            assert target.group(1) in created, statement
+
+
+def test_every_model_table_is_created(upgrade_sql):
+    created = set(re.findall(r"CREATE TABLE (\w+)", upgrade_sql))
+    assert set(Base.metadata.tables) <= created
+
+
+def test_every_model_column_is_created(upgrade_sql):
+    columns = {}
+    for statement in statements(upgrade_sql):
+        table = re.match(r"CREATE TABLE (\w+) \((.*)\)$", statement)
+        if table:
+            columns[table.group(1)] = set(re.findall(r"(?:^|,) *(\w+) [A-Z]", table.group(2).strip()))
+        added = re.match(r"ALTER TABLE (\w+) ADD COLUMN (\w+)", statement)
+        if added:
+            columns[added.group(1)].add(added.group(2))
+    for name, table in Base.metadata.tables.items():
+        assert {column.name for column in table.columns} <= columns[name], name
+
+
+def test_every_model_index_is_created(upgrade_sql):
+    created = set(re.findall(r"CREATE (?:UNIQUE )?INDEX (\w+)", upgrade_sql))
+    expected = {index.name for table in Base.metadata.tables.values() for index in table.indexes}
+    assert expected <= created
@@ -0,0 +1,99 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+from core.pagination import decode_cursor, encode_cursor, paginate
+
+
+class FakeRepository:
+    """In-memory stand-in for a BaseRepository: get_page_after over a list of rows."""
+
+    sort_keys = ("id", "codigo_unidade")
+
+    def __init__(self, count: int):
+        self.rows = [SimpleNamespace(id=i, codigo_unidade=f"U{count - i:04d}") for i in range(1, count + 1)]
+        self.limits = []
+        self.counted = 0
+
+    async def get_page_after(self, limit, sort="id", after=None, offset=0):
+        self.limits.append(limit)
+        rows = sorted(self.rows, key=lambda row: getattr(row, sort))
+        if after is not None:
+            rows = [row for row in rows if getattr(row, sort) > after]
+        return rows[offset:offset + limit]
+
+    async def get_total_count(self):
+        self.counted += 1
+        return len(self.rows)
+
+
+def run(repository, **kwargs):
+    return asyncio.run(paginate(repository, **{"page": 0, "limit": 10, **kwargs}))
+
+
+@pytest.mark.parametrize("value", [0, 41, "U0042", "ação/+=="])
+def test_cursor_round_trip(value):
+    cursor = encode_cursor("codigo_unidade", value)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, "codigo_unidade") == value
+
+
+def test_cursor_of_another_sort_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(encode_cursor("id", 5), "codigo_unidade")
+    assert error.value.status_code == 400
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "e30", encode_cursor("id", 1)[:-3]])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, "id")
+    assert error.value.status_code == 400
+
+
+def test_cursor_walk_visits_every_row_once():
+    repository = FakeRepository(25)
+    items, pagination = run(repository)
+    seen = [row.id for row in items]
+    while pagination["next_cursor"]:
+        items, pagination = run(repository, cursor=pagination["next_cursor"])
+        seen += [row.id for row in items]
+    assert seen == list(range(1, 26))
+    # one look-ahead row per page tells whether there is a next one
+    assert repository.limits == [11, 11, 11]
+
+
+def test_last_page_has_no_cursor():
+    items, pagination = run(FakeRepository(20), page=1)
+    assert [row.id for row in items] == list(range(11, 21))
+    assert pagination["next_cursor"] is None
+
+
+def test_cursor_follows_the_sort_key():
+    repository = FakeRepository(15)
+    items, pagination = run(repository, limit=5, sort="codigo_unidade")
+    items, _ = run(repository, limit=5, sort="codigo_unidade", cursor=pagination["next_cursor"])
+    assert [row.codigo_unidade for row in items] == ["U0005", "U0006", "U0007", "U0008", "U0009"]
+
+
+def test_unknown_sort_key_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        run(FakeRepository(5), sort="nome_fantasia_estabelecimento")
+    assert error.value.status_code == 400
+
+
+def test_total_is_counted_only_without_cursor_by_default():
+    repository = FakeRepository(25)
+    _, pagination = run(repository)
+    assert pagination["total"] == 25 and pagination["offset"] == 0
+    _, pagination = run(repository, cursor=pagination["next_cursor"])
+    assert "total" not in pagination and "offset" not in pagination
+    assert repository.counted == 1
+
+
+def test_include_total_overrides_the_default():
+    repository = FakeRepository(25)
+    _, pagination = run(repository, include_total=False)
+    assert "total" not in pagination
+    _, pagination = run(repository, cursor=encode_cursor("id", 10), include_total=True)
+    assert pagination["total"] == 25
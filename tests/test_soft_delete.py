@@ -0,0 +1,70 @@
+import asyncio
+from sqlalchemy import update
+from conftest import seed
+from core.filters import Filter
+from models.estabelecimento import Estabelecimento
+from models.profissional import Profissional
+from repositories.equipe import EquipeRepository
+from repositories.estabelecimento import EstabelecimentoRepository
+
+# rows the delta sync marks deleted = true stay in the tables but no read returns them
+
+
+async def soft_delete(session_factory):
+    await seed(session_factory)
+    async with session_factory() as session:
+        await session.execute(update(Estabelecimento).where(Estabelecimento.id == 2).values(deleted=True))
+        await session.execute(update(Profissional).where(Profissional.id == 1).values(deleted=True))
+        await session.commit()
+
+
+def run(database, read):
+    async def main():
+        await soft_delete(database)
+        async with database() as session:
+            return await read(session)
+    return asyncio.run(main())
+
+
+def ids(rows):
+    return [row.id for row in rows]
+
+
+def test_lists_and_lookups(database):
+    async def read(session):
+        repository = EstabelecimentoRepository(session)
+        return (
+            ids(await repository.get_all()),
+            await repository.get_by_id(2),
+            await repository.get_total_count(),
+            await repository.get_by_codigo_cnes("0000002"),
+        )
+    rows, deleted, total, by_codigo = run(database, read)
+    assert rows == [1, 3, 4, 5]
+    assert deleted is None
+    assert total == 4
+    assert by_codigo is None
+
+
+def test_pages_filters_and_streams(database):
+    async def read(session):
+        repository = EstabelecimentoRepository(session)
+        page = ids(await repository.get_page_after(limit=10, after=1))
+        filtered = ids(await repository.get_by_filters([Filter("id", "in", [1, 2, 3])]))
+        streamed = [estabelecimento.id async for rows in repository.stream(batch_size=2) for estabelecimento in rows]
+        return page, filtered, streamed
+    page, filtered, streamed = run(database, read)
+    assert page == [3, 4, 5]
+    assert filtered == [1, 3]
+    assert streamed == [1, 3, 4, 5]
+
+
+def test_loaded_relationships(database):
+    async def read(session):
+        equipes = EquipeRepository(session).expand(("estabelecimento",))
+        return {equipe.id: equipe for equipe in await equipes.get_all()}
+    equipes = run(database, read)
+    assert equipes[1].profissionais == []
+    assert [profissional.id for profissional in equipes[3].profissionais] == [3]
+    assert equipes[2].estabelecimento is None
+    assert equipes[3].estabelecimento.id == 3
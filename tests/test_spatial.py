@@ -0,0 +1,167 @@
+import asyncio
+import numpy as np
+import pytest
+from sqlalchemy import update
+from conftest import seed
+from core.spatial import SpatialIndex, haversine_km, parse_coordinate
+from models.estabelecimento import Estabelecimento
+
+
+def random_rows(count: int, seed: int, lat=(-34.0, 6.0), lon=(-74.0, -34.0)):
+    """(endereco_id, estabelecimento_id, latitude, longitude) rows, by default over Brazil."""
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(*lat, count)
+    lons = rng.uniform(*lon, count)
+    return [(i, 1000 + i, float(lats[i]), float(lons[i])) for i in range(count)]
+
+
+def brute_force(rows, lat, lon):
+    """(estabelecimento_id, km) of every row, nearest first."""
+    lats = np.array([row[2] for row in rows])
+    lons = np.array([row[3] for row in rows])
+    distances = haversine_km(lat, lon, lats, lons)
+    return [(rows[i][1], float(distances[i])) for i in np.argsort(distances, kind="stable")]
+
+
+def loaded(rows) -> SpatialIndex:
+    index = SpatialIndex()
+    index.load(rows)
+    return index
+
+
+def assert_same(found, expected):
+    assert [owner for owner, _ in found] == [owner for owner, _ in expected]
+    assert [km for _, km in found] == pytest.approx([km for _, km in expected], rel=1e-6, abs=1e-6)
+
+
+@pytest.mark.parametrize("k", [1, 10, 100])
+def test_nearest_matches_brute_force(k):
+    rows = random_rows(5000, seed=1)
+    index = loaded(rows)
+    rng = np.random.default_rng(2)
+    for lat, lon in zip(rng.uniform(-34, 6, 25), rng.uniform(-74, -34, 25)):
+        assert_same(index.nearest(lat, lon, k), brute_force(rows, lat, lon)[:k])
+
+
+def test_nearest_within_radius():
+    rows = random_rows(3000, seed=3)
+    index = loaded(rows)
+    expected = [item for item in brute_force(rows, -15.78, -47.93) if item[1] <= 150]
+    assert_same(index.nearest(-15.78, -47.93, 1000, radius_km=150), expected)
+
+
+@pytest.mark.parametrize("lat, lon", [(0.0, 179.9), (0.0, -179.9), (89.9, 10.0), (-89.9, -120.0)])
+def test_nearest_across_antimeridian_and_poles(lat, lon):
+    rows = random_rows(4000, seed=4, lat=(-90.0, 90.0), lon=(-180.0, 180.0))
+    index = loaded(rows)
+    assert_same(index.nearest(lat, lon, 5), brute_force(rows, lat, lon)[:5])
+
+
+def test_writes_are_visible_before_and_after_rebuild():
+    rows = random_rows(2000, seed=5)
+    index = SpatialIndex(rebuild_at=50)
+    index.load(rows)
+    moved = random_rows(120, seed=6)
+    for endereco_id, _, lat, lon in moved:
+        # moves existing addresses: the old position must disappear
+        index.upsert(endereco_id, 1000 + endereco_id, lat, lon)
+    for endereco_id in range(200, 260):
+        index.remove(endereco_id)
+
+    current = {row[0]: row for row in rows}
+    current.update({row[0]: row for row in moved})
+    for endereco_id in range(200, 260):
+        current.pop(endereco_id)
+    current = list(current.values())
+    assert len(index) == len(current)
+    for lat, lon in [(-15.78, -47.93), (-23.55, -46.63), (-3.1, -60.0)]:
+        assert_same(index.nearest(lat, lon, 20), brute_force(current, lat, lon)[:20])
+
+
+def test_invalid_coordinates_are_left_out():
+    index = loaded([(1, 10, "-15,78", "-47,93"), (2, 20, None, "-47.9"), (3, 30, "95", "-47.9"), (4, 40, "abc", "1")])
+    assert len(index) == 1
+    assert [owner for owner, _ in index.nearest(-15.78, -47.93, 10)] == [10]
+
+
+@pytest.mark.parametrize("value, max_abs, expected", [
+    ("-15,78", 90, -15.78), (" 12.5 ", 90, 12.5), (-47.9, 180, -47.9),
+    ("", 90, None), ("nan", 90, None), ("91", 90, None), (None, 90, None),
+])
+def test_parse_coordinate(value, max_abs, expected):
+    assert parse_coordinate(value, max_abs) == expected
+
+
+def test_empty_index():
+    assert SpatialIndex().nearest(-15.78, -47.93, 5) == []
+
+
+def brute_force_assign(rows, lats, lons, owners=None):
+    candidates = [row for row in rows if owners is None or row[1] in owners]
+    nearest = [brute_force(candidates, lat, lon)[0] for lat, lon in zip(lats, lons)]
+    return [owner for owner, _ in nearest], [km for _, km in nearest]
+
+
+def test_assign_matches_brute_force():
+    rows = random_rows(5000, seed=7)
+    index = loaded(rows)
+    rng = np.random.default_rng(8)
+    lats, lons = rng.uniform(-34, 6, 700), rng.uniform(-74, -34, 700)
+    ids, distances = index.assign(lats, lons)
+    expected_ids, expected_distances = brute_force_assign(rows, lats, lons)
+    assert ids == expected_ids
+    assert distances == pytest.approx(expected_distances, rel=1e-6, abs=1e-6)
+
+
+def test_assign_restricted_to_owners():
+    rows = random_rows(3000, seed=9)
+    index = loaded(rows)
+    owners = [row[1] for row in rows[::37]]
+    rng = np.random.default_rng(10)
+    lats, lons = rng.uniform(-34, 6, 300), rng.uniform(-74, -34, 300)
+    ids, distances = index.assign(lats, lons, owners)
+    expected_ids, expected_distances = brute_force_assign(rows, lats, lons, set(owners))
+    assert ids == expected_ids
+    assert distances == pytest.approx(expected_distances, rel=1e-6, abs=1e-6)
+
+
+def test_assign_sees_pending_writes():
+    rows = random_rows(1000, seed=11)
+    index = SpatialIndex(rebuild_at=10_000)
+    index.load(rows)
+    index.upsert(5000, 9999, -15.78, -47.93)
+    index.remove(0)
+    ids, distances = index.assign([-15.78, rows[0][2]], [-47.93, rows[0][3]])
+    assert ids[0] == 9999 and distances[0] == pytest.approx(0, abs=1e-6)
+    assert ids[1] != rows[0][1]
+
+
+def test_assign_without_facilities():
+    index = loaded(random_rows(100, seed=12))
+    assert index.assign([-15.78, -23.55], [-47.93, -46.63], owners=[-1]) == ([None, None], [None, None])
+
+
+def nearest_ids(api, k: int) -> list[int]:
+    # seeded establishment i is at (-15 - i/10, -47 - i/10): 1 is the closest, then 2, 3...
+    response = api.get("/estabelecimentos/proximos", params={"lat": -15.1, "lon": -47.1, "k": k})
+    assert response.status_code == 200
+    return [estabelecimento["id"] for estabelecimento in response.json()]
+
+
+def test_proximos_refills_past_establishments_missing_from_the_database(api, database):
+    async def soft_delete():
+        await seed(database)
+        async with database() as session:
+            await session.execute(update(Estabelecimento).where(Estabelecimento.id.in_([1, 3])).values(deleted=True))
+            await session.commit()
+    asyncio.run(soft_delete())
+    # their enderecos are still in the index
+    assert nearest_ids(api, 2) == [2, 4]
+    assert nearest_ids(api, 10) == [2, 4, 5]
+
+
+def test_proximos_after_a_cascaded_delete(api, database):
+    asyncio.run(seed(database))
+    assert nearest_ids(api, 5) == [1, 2, 3, 4, 5]
+    assert api.delete("/mantenedoras/1").status_code == 204
+    assert nearest_ids(api, 5) == [2, 3, 4, 5]